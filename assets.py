@@ -0,0 +1,138 @@
+"""Startup asset cache: images pre-scaled and converted to the display format.
+
+`load_scaled(path, size)` returns a bundled image scaled to `size` and,
+once a display mode is set, converted to the display's pixel format so
+blitting it needs no per-frame conversion. Results are kept at two levels:
+
+- in memory for the rest of the process (dropped on `pygame.quit()`,
+  like the `atlas` caches)
+- on disk in `ASSET_CACHE_DIR` as raw RGB pixels, named after the image,
+  the size and a hash of the source file. A later launch reads them with
+  one `pygame.image.frombytes` instead of decoding the PNG and scaling
+  it; a changed source file gets a new hash and therefore a new entry.
+
+`background(size)` is the menu background: the bundled image if present,
+otherwise `generate_background.render_background` drawn at exactly
+`size`. The disk cache is best effort; if it cannot be read or written
+the image is simply prepared again.
+"""
+
+import hashlib
+import io
+import os
+import sys
+
+import pygame
+
+import generate_background
+from config import ASSET_CACHE_DIR
+
+BACKGROUND = os.path.join('images', 'background.png')
+
+# version of the generated background; part of its cache key
+_GENERATED_KEY = hashlib.sha1(repr((
+    generate_background.GRAY_CENTER, generate_background.GRAY_DROP, generate_background.GRAY_MIN,
+    generate_background.STRIPE_COLOR, generate_background.STRIPE_SPACING,
+    generate_background.CHECKER_COLOR, generate_background.CHECKER_SPACING,
+)).encode()).hexdigest()[:16]
+
+_surfaces = {}
+
+
+def get_resource_path(relative_path):
+    """Get path to resource, handling both development and PyInstaller bundled environments."""
+    try:
+        base_path = sys._MEIPASS
+    except AttributeError:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+def clear_cache():
+    """Drop the in-memory surfaces (the disk cache is kept)."""
+    _surfaces.clear()
+
+
+def _cache_file(name, size, digest):
+    """Return the disk cache path of image `name` at `size` with source hash `digest`."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return os.path.join(ASSET_CACHE_DIR, f"{stem}-{size[0]}x{size[1]}-{digest}.rgb")
+
+
+def _read_cached(path, size):
+    """Return the cached surface at `path`, or None if it is missing or does not match `size`."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) != size[0] * size[1] * 3:
+        return None
+    return pygame.image.frombytes(data, size, 'RGB')
+
+
+def _write_cached(path, surface):
+    """Store `surface` at `path` and remove older entries of the same image and size."""
+    directory, filename = os.path.split(path)
+    prefix = filename.rsplit('-', 1)[0] + '-'
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(pygame.image.tobytes(surface, 'RGB'))
+        os.replace(tmp, path)
+        for other in os.listdir(directory):
+            if other.startswith(prefix) and other != filename:
+                os.remove(os.path.join(directory, other))
+    except OSError:
+        pass
+
+
+def _cached(name, size, digest, render):
+    """Return image `name` at `size` from memory, the disk cache, or `render()` (which is then cached)."""
+    key = (name, size, digest)
+    surface = _surfaces.get(key)
+    if surface is not None:
+        return surface
+    path = _cache_file(name, size, digest) if ASSET_CACHE_DIR else None
+    surface = _read_cached(path, size) if path else None
+    if surface is None:
+        surface = render()
+        if path:
+            _write_cached(path, surface)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    if not _surfaces:
+        pygame.register_quit(clear_cache)
+    _surfaces[key] = surface
+    return surface
+
+
+def load_scaled(relative_path, size):
+    """Return the bundled image at `relative_path` scaled to `size`, cached as described above.
+
+    Raises `OSError` if the image does not exist and `pygame.error` if it
+    cannot be decoded.
+    """
+    size = (int(size[0]), int(size[1]))
+    path = get_resource_path(relative_path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()[:16]
+
+    def render():
+        image = pygame.image.load(io.BytesIO(data), path)
+        return image if image.get_size() == size else pygame.transform.scale(image, size)
+
+    return _cached(relative_path, size, digest, render)
+
+
+def background(size):
+    """Return the menu background at `size`: the bundled image, or a generated one if it is missing."""
+    try:
+        return load_scaled(BACKGROUND, size)
+    except (OSError, pygame.error) as e:
+        print(f"Warning: Could not load background image {BACKGROUND}: {e}; generating it")
+    size = (int(size[0]), int(size[1]))
+    return _cached('generated-background', size, _GENERATED_KEY,
+                   lambda: generate_background.render_background(size))
@@ -0,0 +1,174 @@
+"""Pre-rendered tile and glyph atlas used by `main.Game`.
+
+Every cell state (covered, revealed 0-8, flag, mine, exploded mine) and
+every smiley face is drawn once into its own surface when the atlas is
+built. The frame loop then only blits ready-made surfaces (in one
+`Surface.blits` batch) instead of drawing shapes and creating fonts per
+cell. Fonts are cached the same way.
+
+Atlases are cached per (cell size, smiley size), so each zoom level's
+tiles are built once. Fonts and surfaces do not survive
+`pygame.quit()`, so the caches are dropped automatically when it runs.
+"""
+
+import pygame
+
+# Tile keys: 0-8 are revealed safe cells showing that many adjacent mines
+COVERED = 9
+FLAG = 10
+MINE = 11
+EXPLODED = 12
+TILE_COUNT = 13
+
+SMILEY_STATES = ('normal', 'lost', 'won')
+
+_fonts = {}
+_atlases = {}
+
+
+def get_font(size, bold=False):
+    """Return a cached default `pygame.font.Font` of the given size."""
+    key = (size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        _watch_quit()
+        font = _fonts[key] = pygame.font.SysFont(None, size, bold=bold)
+    return font
+
+
+def tile_for(cell):
+    """Return the tile key that shows `cell` in its current state."""
+    if not cell.revealed:
+        return FLAG if cell.flagged else COVERED
+    if cell.mine:
+        return EXPLODED if cell.exploded else MINE
+    return cell.adjacent
+
+
+def _cell_tile(size, key):
+    """Draw one cell tile (same artwork the grid used to draw per frame)."""
+    surface = pygame.Surface((size, size))
+    rect = surface.get_rect()
+    surface.fill((180,180,180) if key in (COVERED, FLAG) else (220,220,220))
+    pygame.draw.rect(surface, (0,0,0), rect, 1)
+    # artwork proportions are those of the default 24 px cell, so zoom levels look alike
+    if key == FLAG:
+        # draw a flag: vertical pole and triangular flag
+        pole_x = rect.centerx - 2
+        pole_y = rect.top + size // 6
+        pole_h = rect.height - size // 3
+        pygame.draw.line(surface, (0, 0, 0), (pole_x, pole_y), (pole_x, pole_y + pole_h), 2)
+        # flag triangle (red)
+        flag_w = size // 3
+        flag_h = size // 4
+        flag_points = [
+            (pole_x + 2, pole_y),
+            (pole_x + 2 + flag_w, pole_y + flag_h // 2),
+            (pole_x + 2, pole_y + flag_h)
+        ]
+        pygame.draw.polygon(surface, (200, 0, 0), flag_points)
+    elif key in (MINE, EXPLODED):
+        if key == EXPLODED:
+            pygame.draw.rect(surface, (200,50,50), rect)
+        radius = max(1, rect.width//2 - size // 6)
+        pygame.draw.circle(surface, (0,0,0), rect.center, radius)
+    elif 0 < key < COVERED:
+        txt = get_font(size * 3 // 4).render(str(key), True, (0,0,0))
+        surface.blit(txt, (size // 6, size // 12))
+    return surface
+
+
+def _smiley(size, display_state):
+    """Draw the header smiley for 'normal', 'lost' or 'won' on a header-gray square."""
+    surface = pygame.Surface(size)
+    surface.fill((192, 192, 192))
+    sw, sh = size
+    cx = sw // 2
+    cy = sh // 2
+    # make the smiley smaller so it doesn't overlap header text
+    radius = int(min(sw, sh) * 0.28)
+
+    # face (yellow circle)
+    pygame.draw.circle(surface, (255, 215, 0), (cx, cy), radius)
+
+    # eyes positions
+    eye_dx = max(1, radius // 2)
+    eye_dy = -max(1, radius // 6)
+    eye_r = max(2, radius // 6)
+    left_eye = (cx - eye_dx, cy + eye_dy)
+    right_eye = (cx + eye_dx, cy + eye_dy)
+
+    # draw eyes or sunglasses for 'won'
+    if display_state == 'won':
+        rect_w = max(4, eye_r * 2)
+        rect_h = max(2, eye_r)
+        pygame.draw.rect(surface, (0,0,0), (left_eye[0]-rect_w//2, left_eye[1]-rect_h//2, rect_w, rect_h))
+        pygame.draw.rect(surface, (0,0,0), (right_eye[0]-rect_w//2, right_eye[1]-rect_h//2, rect_w, rect_h))
+    else:
+        pygame.draw.circle(surface, (0,0,0), left_eye, eye_r)
+        pygame.draw.circle(surface, (0,0,0), right_eye, eye_r)
+
+    # mouth geometry
+    mouth_w = max(6, radius)
+    mouth_h = max(2, radius // 4)
+    mouth_y = cy + radius // 3
+
+    # Draw mouth: normal -> smile, lost -> frown, won -> straight line
+    if display_state in ('normal', 'lost'):
+        sign = 1 if display_state == 'normal' else -1
+        for i in range(-mouth_w//2, mouth_w//2):
+            x1 = cx + i
+            rel = (i / (mouth_w/2))
+            y_off = int(sign * (1 - rel*rel) * mouth_h)
+            surface.set_at((x1, mouth_y + y_off), (0,0,0))
+    else:
+        pygame.draw.line(surface, (0,0,0), (cx - mouth_w//2, mouth_y), (cx + mouth_w//2, mouth_y), 2)
+    return surface
+
+
+class TileAtlas:
+    """All cell tiles and smiley faces for one cell size, rendered once.
+
+    Attributes:
+        cell_size (int): edge length of a cell tile in pixels
+        tiles (list): `TILE_COUNT` surfaces indexed by tile key
+        smileys (dict): smiley surface per state in `SMILEY_STATES`
+    """
+
+    def __init__(self, cell_size, smiley_size):
+        self.cell_size = cell_size
+        self.tiles = [self._prepare(_cell_tile(cell_size, key)) for key in range(TILE_COUNT)]
+        self.smileys = {state: self._prepare(_smiley(smiley_size, state)) for state in SMILEY_STATES}
+
+    @staticmethod
+    def _prepare(surface):
+        # match the display's pixel format when a window exists, for fast blits
+        if pygame.display.get_surface() is not None:
+            return surface.convert()
+        return surface
+
+
+def clear_cache():
+    """Drop cached fonts and atlases (registered to run on `pygame.quit()`)."""
+    _fonts.clear()
+    _atlases.clear()
+
+
+def _watch_quit():
+    """Make sure the caches are dropped on the next `pygame.quit()`.
+
+    pygame forgets registered quit callbacks once they have run, so this is
+    repeated whenever the caches go from empty to non-empty.
+    """
+    if not _fonts and not _atlases:
+        pygame.register_quit(clear_cache)
+
+
+def get_atlas(cell_size, smiley_size):
+    """Return the cached `TileAtlas` for this cell and smiley size, building it once."""
+    key = (cell_size, tuple(smiley_size))
+    atlas = _atlases.get(key)
+    if atlas is None:
+        _watch_quit()
+        atlas = _atlases[key] = TileAtlas(cell_size, tuple(smiley_size))
+    return atlas
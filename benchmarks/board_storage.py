@@ -0,0 +1,102 @@
+"""Memory and construction-time comparison of the Board backends.
+
+Run from the repository root:
+
+    python -m benchmarks.board_storage [--max-classic-cells N]
+
+For every size the script reports how long `__init__` takes and how much
+memory the finished board retains (measured with `tracemalloc`), for the
+classic `Board` (one `Cell` per square) and for `PackedBoard`.
+Each measurement runs in a fresh interpreter so that tearing down millions
+of `Cell` objects cannot skew the next allocation. The classic backend is
+skipped above `--max-classic-cells` because it needs several GB of RAM for
+the largest sizes.
+"""
+
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from board import Board
+from config import DIFFICULTIES
+from packed_board import PackedBoard
+
+SIZES = [
+    ('beginner',) + DIFFICULTIES['beginner'][:2],
+    ('intermediate',) + DIFFICULTIES['intermediate'][:2],
+    ('expert',) + DIFFICULTIES['expert'][:2],
+    ('500x500', 500, 500),
+    ('1000x1000', 1000, 1000),
+    ('2000x2000', 2000, 2000),
+    ('4000x4000', 4000, 4000),
+]
+
+
+BACKENDS = {'board': Board, 'packed': PackedBoard}
+
+
+def measure(board_cls, width, height):
+    """Return (construction seconds, retained bytes) for one board."""
+    gc.collect()
+    start = time.perf_counter()
+    board = board_cls(width, height, 0)
+    elapsed = time.perf_counter() - start
+    del board
+    gc.collect()
+
+    tracemalloc.start()
+    board = board_cls(width, height, 0)
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del board
+    return elapsed, retained
+
+
+def measure_isolated(backend, width, height):
+    """Run `measure` for one backend in a child interpreter."""
+    out = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.board_storage', '--single', backend, str(width), str(height)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def fmt_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f"{n:.1f} {unit}" if unit != 'B' else f"{n} B"
+        n /= 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-classic-cells', type=int, default=1_000_000,
+                        help='skip the classic Board above this many cells')
+    parser.add_argument('--single', nargs=3, metavar=('BACKEND', 'WIDTH', 'HEIGHT'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.single:
+        backend, width, height = args.single
+        print(json.dumps(measure(BACKENDS[backend], int(width), int(height))))
+        return
+
+    print(f"{'size':<14}{'cells':>12}  {'Board init':>12}{'Board mem':>12}  {'Packed init':>12}{'Packed mem':>12}")
+    for name, width, height in SIZES:
+        cells = width * height
+        t, mem = measure_isolated('packed', width, height)
+        packed = f"{t * 1000:>10.2f}ms{fmt_bytes(mem):>12}"
+        if cells <= args.max_classic_cells:
+            t, mem = measure_isolated('board', width, height)
+            classic = f"{t * 1000:>10.2f}ms{fmt_bytes(mem):>12}"
+        else:
+            classic = f"{'skipped':>12}{'':>12}"
+        print(f"{name:<14}{cells:>12}  {classic}  {packed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Flood-fill benchmark: recursive reveal vs. the iterative engines.
+
+Run from the repository root:
+
+    python -m benchmarks.flood_fill
+
+Every case is a sparse board (large openings) revealed from its top-left
+corner. Three implementations are timed on identical layouts:
+
+- recursive: the original recursive `Board.reveal`, kept here as reference
+- Board:     the queue-based `Board.reveal`
+- Packed:    the scanline `PackedBoard.reveal`
+
+The recursive version is run with the default recursion limit and reports
+``RecursionError`` where it cannot finish.
+"""
+
+import random
+import time
+
+from board import Board
+from packed_board import PackedBoard
+
+# (label, width, height, mine density)
+CASES = [
+    ('expert open', 30, 16, 0.0),
+    ('expert 3%', 30, 16, 0.03),
+    ('30x30 2%', 30, 30, 0.02),
+    ('100x100 1%', 100, 100, 0.01),
+    ('300x300 1%', 300, 300, 0.01),
+    ('1000x1000 1%', 1000, 1000, 0.01),
+    ('2000x2000 0.5%', 2000, 2000, 0.005),
+]
+# the classic Board needs several seconds and hundreds of MB beyond this size
+MAX_CLASSIC_CELLS = 1_000_000
+
+
+def recursive_reveal(board, x, y):
+    """The original recursive `Board.reveal`, for comparison."""
+    cell = board.grid[y][x]
+    if cell.revealed or cell.flagged:
+        return
+    cell.reveal()
+    if cell.adjacent == 0 and not cell.mine:
+        for n in board.neighbors(x, y):
+            if not n.revealed:
+                recursive_reveal(board, n.x, n.y)
+
+
+def build(board_cls, width, height, mine_indices):
+    """Return a board of `board_cls` with the given mines already placed."""
+    board = board_cls(width, height, len(mine_indices))
+    grid = board.grid
+    for i in mine_indices:
+        y, x = divmod(i, width)
+        grid[y][x].mine = True
+        for n in board.neighbors(x, y):
+            n.adjacent += 1
+    board.mines_placed = True
+    return board
+
+
+def layout(width, height, density, seed=1234):
+    """Return mine indices for a seeded layout that keeps the top-left 3x3 clear."""
+    rng = random.Random(seed)
+    safe = {y * width + x for y in range(min(2, height)) for x in range(min(2, width))}
+    count = int(width * height * density)
+    mines = set()
+    while len(mines) < count:
+        i = rng.randrange(width * height)
+        if i not in safe:
+            mines.add(i)
+    return sorted(mines)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    try:
+        fn(*args)
+    except RecursionError:
+        return None
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'case':<16}{'revealed':>10}  {'recursive':>12}{'Board':>12}{'Packed':>12}")
+    for label, width, height, density in CASES:
+        mines = layout(width, height, density)
+        packed = build(PackedBoard, width, height, mines)
+        start = time.perf_counter()
+        revealed = len(packed.reveal(0, 0))
+        t_packed = time.perf_counter() - start
+
+        if width * height <= MAX_CLASSIC_CELLS:
+            t_rec = timed(recursive_reveal, build(Board, width, height, mines), 0, 0)
+            t_board = timed(build(Board, width, height, mines).reveal, 0, 0)
+            rec = f"{t_rec * 1000:>10.2f}ms" if t_rec is not None else f"{'RecursionError':>12}"
+            board = f"{t_board * 1000:>10.2f}ms"
+        else:
+            rec = board = f"{'skipped':>12}"
+        print(f"{label:<16}{revealed:>10}  {rec}{board}{t_packed * 1000:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Per-frame CPU time of `Game.draw` under the dummy SDL video driver.
+
+Run from the repository root:
+
+    python -m benchmarks.frame_time [--frames N]
+
+For each board size three kinds of frame are timed with
+`time.process_time`:
+
+- full:  a forced full repaint (what every frame cost before dirty rects)
+- idle:  nothing changed since the last frame
+- flag:  one flag toggled since the last frame
+- pan:   the view scrolled by one `SCROLL_STEP`
+
+Boards larger than the window only draw the cells in view, so the full
+and pan columns should stay flat as the board grows.
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame  # noqa: E402  (driver must be chosen before import)
+
+from config import SCROLL_STEP  # noqa: E402
+from main import Game  # noqa: E402
+
+SIZES = [
+    ('expert', 'expert'),
+    ('100x100', (100, 100, 2000)),
+    ('200x150', (200, 150, 6000)),
+    ('1000x1000', (1000, 1000, 160000)),
+]
+
+
+def time_frames(game, frames, before_frame):
+    """Return mean CPU milliseconds of `game.draw()` over `frames` frames."""
+    total = 0.0
+    for _ in range(frames):
+        before_frame()
+        start = time.process_time()
+        game.draw()
+        total += time.process_time() - start
+    return total / frames * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    random.seed(42)
+    print(f"{'board':<10}{'full':>12}{'idle':>12}{'flag':>12}{'pan':>12}")
+    for label, difficulty in SIZES:
+        game = Game(difficulty)
+        # open the board so revealed numbers are part of the picture
+        game.board.place_mines(game.cols // 2, game.rows // 2)
+        game.board.reveal(game.cols // 2, game.rows // 2)
+        game.draw()
+
+        full = time_frames(game, args.frames, game.invalidate)
+        idle = time_frames(game, args.frames, lambda: None)
+
+        def toggle_flag():
+            while True:
+                x, y = random.randrange(game.cols), random.randrange(game.rows)
+                if game.board.toggle_flag(x, y):
+                    game.mark_dirty((y * game.cols + x,))
+                    return
+        flag = time_frames(game, args.frames, toggle_flag)
+
+        step = [SCROLL_STEP]
+
+        def pan():
+            # scroll back and forth so the view never sticks at a board edge
+            if not game.camera.pan(step[0], step[0]):
+                step[0] = -step[0]
+                game.camera.pan(step[0], step[0])
+            game.invalidate()
+        game.camera.center_on(game.cols / 2, game.rows / 2)
+        panned = time_frames(game, args.frames, pan)
+        print(f"{label:<10}{full:>10.3f}ms{idle:>10.3f}ms{flag:>10.3f}ms{panned:>10.3f}ms")
+        pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
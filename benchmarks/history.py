@@ -0,0 +1,84 @@
+"""Cost of undo/redo with `history.History` against deep-copied board snapshots.
+
+Run from the repository root:
+
+    python -m benchmarks.history [--moves N]
+
+For each size a seeded game of N moves is played twice, without and with
+a history attached: random clicks that avoid the mines (so the game
+lasts) and random flags. The report lists the mean time per move of
+both runs, per undo and per redo over all moves, and the history's
+memory per move. For comparison, one `copy.deepcopy(board)` is timed on
+the smaller boards; snapshot-based undo would pay that after every move.
+"""
+
+import argparse
+import copy
+import random
+import time
+
+from engine import GameEngine
+from history import History
+
+# (label, cols, rows, mines, deepcopy comparison)
+SIZES = [
+    ('expert', 30, 16, 99, True),
+    ('300x300', 300, 300, 14_400, True),
+    ('1000x1000', 1000, 1000, 160_000, False),
+]
+
+
+def play(engine, moves, rng):
+    """Make up to `moves` board-changing moves on `engine`; return (moves made, seconds in the engine)."""
+    made = 0
+    spent = 0.0
+    w, h = engine.width, engine.height
+    while made < moves:
+        if engine.is_over:
+            break
+        x, y = rng.randrange(w), rng.randrange(h)
+        flag = rng.random() < 0.2 or (engine.board.mines_placed and engine.board.cell(x, y).mine)
+        start = time.perf_counter()
+        changed = engine.flag(x, y) if flag else engine.click(x, y)
+        spent += time.perf_counter() - start
+        made += bool(changed)
+    return made, spent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--moves', type=int, default=200, help='recorded moves per size')
+    args = parser.parse_args(argv)
+
+    print(f"{'size':<11}{'moves':>7}{'move':>11}{'recorded':>11}{'undo':>11}{'redo':>11}"
+          f"{'bytes/move':>12}{'deepcopy':>12}")
+    for label, cols, rows, mines, deepcopy in SIZES:
+        random.seed(f"history-bench:{label}")
+        rng = random.Random(label)
+        # the same game without and with a history attached
+        plain = GameEngine(cols, rows, mines)
+        random.seed(f"history-bench:{label}")
+        moves, bare = play(plain, args.moves, random.Random(label))
+        engine = GameEngine(cols, rows, mines)
+        history = History(engine)
+        random.seed(f"history-bench:{label}")
+        moves, recorded = play(engine, args.moves, rng)
+        start = time.perf_counter()
+        while history.undo():
+            pass
+        undo = time.perf_counter() - start
+        start = time.perf_counter()
+        while history.redo():
+            pass
+        redo = time.perf_counter() - start
+        line = (f"{label:<11}{moves:>7}{bare / moves * 1e6:>9.1f}us{recorded / moves * 1e6:>9.1f}us"
+                f"{undo / moves * 1e6:>9.1f}us{redo / moves * 1e6:>9.1f}us{history.bytes / moves:>12,.0f}")
+        if deepcopy:
+            start = time.perf_counter()
+            copy.deepcopy(engine.board)
+            line += f"{(time.perf_counter() - start) * 1e3:>10.1f}ms"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
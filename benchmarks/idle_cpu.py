@@ -0,0 +1,68 @@
+"""Idle CPU usage of `Game.run` in the 'fixed' and 'event' loop modes.
+
+Run from the repository root:
+
+    python -m benchmarks.idle_cpu [--seconds N]
+
+Each scenario runs the real main loop with no input for N seconds (a
+`QUIT` event is scheduled with `pygame.time.set_timer`) and reports loop
+wake-ups (frames) per second and CPU time as a percentage of wall time:
+
+- fresh:   a new board, timer not started
+- ticking: first click done, timer running (one visible change per second)
+
+Note that SDL's dummy video driver cannot block inside `SDL_WaitEventTimeout`
+and polls every millisecond instead, so under the dummy driver the 'event'
+CPU figure mostly measures that SDL fallback. The frames/s column is driver
+independent; real desktop drivers (X11, Wayland, Windows, Cocoa) sleep for
+the whole wait.
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame  # noqa: E402  (driver must be chosen before import)
+
+from main import Game  # noqa: E402
+
+
+def idle_cpu(loop_mode, ticking, seconds):
+    """Run one idle game loop; return (frames per second, CPU percent of wall time)."""
+    game = Game('expert')
+    game.loop_mode = loop_mode
+    frames = [0]
+    draw = game.draw
+
+    def counting_draw():
+        frames[0] += 1
+        draw()
+    game.draw = counting_draw
+    if ticking:
+        game.board.place_mines(0, 0)
+        game.board.reveal(0, 0)
+        game.timer_start = pygame.time.get_ticks()
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), 1)
+    wall, cpu = time.perf_counter(), time.process_time()
+    game.run()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return frames[0] / wall, cpu / wall * 100
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    print(f"{'scenario':<10}{'fixed fps':>11}{'fixed cpu':>11}{'event fps':>11}{'event cpu':>11}")
+    for label, ticking in (('fresh', False), ('ticking', True)):
+        fixed_fps, fixed_cpu = idle_cpu('fixed', ticking, args.seconds)
+        event_fps, event_cpu = idle_cpu('event', ticking, args.seconds)
+        print(f"{label:<10}{fixed_fps:>11.2f}{fixed_cpu:>10.2f}%{event_fps:>11.2f}{event_cpu:>10.2f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Latency and memory of `InfiniteBoard` as the explored area grows.
+
+Run from the repository root:
+
+    python -m benchmarks.infinite_board [--steps N] [--stride CELLS]
+
+The player walks away from the origin in a straight line, clicking one
+safe cell every `--stride` cells, so every step loads new chunks. After
+each tenth of the walk the script prints the mean click latency of that
+stretch (chunk loads included), the memory the board retains (`tracemalloc`), and how many
+chunks sit in each tier. Both figures should stay flat while the spill
+directory absorbs the explored area.
+"""
+
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+
+from infinite_board import InfiniteBoard
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=5000, help='clicks along the walk')
+    parser.add_argument('--stride', type=int, default=40, help='cells between clicks')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    board = InfiniteBoard(seed=args.seed)
+    board.place_mines(0, 0)
+    board.reveal(0, 0)
+    gc.collect()
+    tracemalloc.start()
+    report = max(1, args.steps // 10)
+    print(f"{'distance':>10}  {'click':>9}  {'memory':>9}  {'live':>5}{'cold':>6}{'on disk':>9}")
+    try:
+        elapsed = 0.0
+        for step in range(1, args.steps + 1):
+            x = step * args.stride
+            start = time.perf_counter()
+            # step past mines; peeking is fine here, and it also times the chunk load
+            y = next(y for y in range(64) if not board.cell(x, y).mine)
+            board.reveal(x, y)
+            elapsed += time.perf_counter() - start
+            if step % report == 0:
+                memory, _ = tracemalloc.get_traced_memory()
+                spilled = len(os.listdir(board.spill_dir)) if board.spill_dir else 0
+                counts = board.chunk_counts
+                print(f"{x:>10}  {elapsed / report * 1000:>7.2f}ms  {memory / 1e6:>7.2f}MB  "
+                      f"{counts['live']:>5}{counts['cold']:>6}{spilled:>9}")
+                elapsed = 0.0
+    finally:
+        tracemalloc.stop()
+        board.close()
+
+
+if __name__ == '__main__':
+    main()
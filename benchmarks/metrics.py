@@ -0,0 +1,102 @@
+"""Boards per second of `metrics` against a flood-fill computation of the same numbers.
+
+Run from the repository root:
+
+    python -m benchmarks.metrics [--boards N] [--workers N]
+
+For each size, seeded layouts (first click in the middle) are scored
+three ways and the results are checked against each other:
+
+- flood fill: openings counted by revealing every unrevealed zero cell of
+  a `Board` with `Board.reveal`, isolated numbers as the safe cells left
+  covered, islands with a breadth-first search over them
+- metrics:    `metrics.layout_metrics` (one labeling pass per mask)
+- batch:      `metrics.score_layouts` over a process pool of `--workers`
+
+Large boards get fewer layouts (see `SIZES`).
+"""
+
+import argparse
+import random
+import time
+from collections import deque
+
+from board import Board
+from config import DIFFICULTIES
+from metrics import BoardMetrics, layout_metrics, score_layouts
+from mines import neighbor_table, sample_mines
+
+# (label, cols, rows, mines, share of --boards)
+SIZES = [(name, *size, 1) for name, size in DIFFICULTIES.items()] + [
+    ('100x100', 100, 100, 1600, 0.1),
+    ('1000x1000', 1000, 1000, 160_000, 0.002),
+]
+
+
+def flood_fill_metrics(width, height, mines):
+    """Return the `BoardMetrics` of a layout, computed cell by cell with flood fills."""
+    board = Board(width, height, len(mines))
+    board.set_mines(mines)
+    cells = [cell for row in board.grid for cell in row]
+    openings = 0
+    for cell in cells:
+        if not cell.mine and cell.adjacent == 0 and not cell.revealed:
+            board.reveal(cell.x, cell.y)
+            openings += 1
+    isolated = {i for i, cell in enumerate(cells) if not cell.mine and not cell.revealed}
+    neighbors = neighbor_table(width, height)
+    islands = 0
+    seen = set()
+    for i in isolated:
+        if i in seen:
+            continue
+        islands += 1
+        seen.add(i)
+        todo = deque([i])
+        while todo:
+            for n in neighbors[todo.popleft()]:
+                if n in isolated and n not in seen:
+                    seen.add(n)
+                    todo.append(n)
+    numbers = [0] * 9
+    for cell in cells:
+        if not cell.mine:
+            numbers[cell.adjacent] += 1
+    return BoardMetrics(openings + len(isolated), openings, len(isolated), islands, tuple(numbers))
+
+
+def layouts(width, height, mines, count):
+    """Return `count` seeded layouts of one size."""
+    random.seed(f"metrics-bench:{width}x{height}x{mines}")
+    return [(width, height, list(sample_mines(width, height, mines, width // 2, height // 2)))
+            for _ in range(count)]
+
+
+def rate(fn, items):
+    """Return (results, items per second) of applying `fn` to every item."""
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, len(items) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boards', type=int, default=2000, help='layouts per preset')
+    parser.add_argument('--workers', type=int, default=None, help='batch pool size (default: all CPUs)')
+    args = parser.parse_args(argv)
+
+    print(f"{'size':<14}{'boards':>8}{'flood fill':>14}{'metrics':>14}{'batch':>14}  boards/s")
+    for label, width, height, mines, share in SIZES:
+        batch = layouts(width, height, mines, max(1, int(args.boards * share)))
+        slow, slow_rate = rate(lambda layout: flood_fill_metrics(*layout), batch)
+        fast, fast_rate = rate(lambda layout: layout_metrics(*layout), batch)
+        start = time.perf_counter()
+        pooled = list(score_layouts(batch, workers=args.workers))
+        pool_rate = len(batch) / (time.perf_counter() - start)
+        if not slow == fast == pooled:
+            raise AssertionError(f"{label}: metrics differ from the flood-fill results")
+        print(f"{label:<14}{len(batch):>8}{slow_rate:>14,.1f}{fast_rate:>14,.1f}{pool_rate:>14,.1f}")
+
+
+if __name__ == '__main__':
+    main()
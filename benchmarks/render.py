@@ -0,0 +1,79 @@
+"""Thumbnails per minute of `render`, one process and across a pool.
+
+Run from the repository root:
+
+    python -m benchmarks.render [--thumbnails N] [--workers N]
+
+For each case, seeded games are played a few clicks in and turned into
+`render.RenderJob`s writing to a temporary directory. The report lists
+the image size and thumbnails per minute (PNG encoding and writing
+included) rendered in this process and by `render.render_many` over a
+pool of `--workers`:
+
+- expert at 24 / 8 px:  tile artwork (`atlas` tiles blitted per cell)
+- expert at 4 px:       palette pixels scaled up
+- 1000x1000 at 1 px:    one pixel per cell
+- 4000x4000 overview:   downsampled into `--overview` pixels
+
+Large boards get fewer thumbnails (see `CASES`).
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from engine import GameEngine
+from render import RenderJob, render_many
+
+# (label, cols, rows, mines, cell size, max size or None for --overview, share of --thumbnails)
+CASES = [
+    ('expert 24px', 30, 16, 99, 24, (10_000, 10_000), 1),
+    ('expert 8px', 30, 16, 99, 8, (10_000, 10_000), 1),
+    ('expert 4px', 30, 16, 99, 4, (10_000, 10_000), 1),
+    ('1000x1000 1px', 1000, 1000, 160_000, 1, (10_000, 10_000), 0.05),
+    ('4000x4000', 4000, 4000, 2_560_000, 1, None, 0.01),
+]
+
+
+def played_board(width, height, mines, rng):
+    """Return the board of a seeded game after a few random clicks."""
+    engine = GameEngine(width, height, mines)
+    for _ in range(5):
+        if engine.is_over:
+            break
+        engine.click(rng.randrange(width), rng.randrange(height))
+    return engine.board
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--thumbnails', type=int, default=600, help='thumbnails per expert case')
+    parser.add_argument('--workers', type=int, default=None, help='pool size (default: all CPUs)')
+    parser.add_argument('--overview', type=int, nargs=2, default=(400, 400), metavar=('W', 'H'),
+                        help='largest overview size in pixels')
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<16}{'image':>11}{'thumbs':>8}{'1 process':>12}{'pool':>12}  thumbnails/min")
+    with tempfile.TemporaryDirectory() as out:
+        for label, cols, rows, mines, cell_size, max_size, share in CASES:
+            max_size = max_size or tuple(args.overview)
+            random.seed(f"render-bench:{label}")
+            rng = random.Random(label)
+            # a handful of distinct boards, repeated up to the thumbnail count
+            boards = [played_board(cols, rows, mines, rng) for _ in range(4)]
+            count = max(2, int(args.thumbnails * share))
+            jobs = [RenderJob.for_board(boards[i % len(boards)], os.path.join(out, f"{i}.png"), cell_size, max_size)
+                    for i in range(count)]
+            rates = []
+            for workers in (1, args.workers):
+                start = time.perf_counter()
+                done = sum(1 for _ in render_many(jobs, workers))
+                rates.append(done * 60 / (time.perf_counter() - start))
+            image = f"{jobs[0].width * jobs[0].cell_size}x{jobs[0].height * jobs[0].cell_size}"
+            print(f"{label:<16}{image:>11}{count:>8}{rates[0]:>12,.0f}{rates[1]:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Save and resume cost of `savegame` by board size.
+
+Run from the repository root:
+
+    python -m benchmarks.savegame [--flags N] [--dir PATH]
+
+For every size a game is opened with one click and saved once in full.
+Then N flags are toggled and saved again, which only rewrites the pages
+holding those cells. The report lists both save times, the file size,
+and how long `load_game` takes to resume the file into RAM and as a
+memory map (`MappedBoard`).
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from engine import GameEngine
+from savegame import SaveFile, load_game
+
+SIZES = [
+    ('expert', 30, 16, 99),
+    ('1000x1000', 1000, 1000, 160_000),
+    ('4000x4000', 4000, 4000, 2_560_000),
+]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--flags', type=int, default=20, help='flags toggled before the incremental save')
+    parser.add_argument('--dir', default=None, help='directory for the save files (default: a temp dir)')
+    args = parser.parse_args(argv)
+
+    random.seed(42)
+    print(f"{'board':<12}{'file':>10}{'full save':>12}{'incr save':>12}{'load RAM':>12}{'load mmap':>12}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for label, width, height, mines in SIZES:
+            path = os.path.join(tmp, f"{label}.msws")
+            engine = GameEngine(width, height, mines)
+            engine.click(width // 2, height // 2)
+            save = SaveFile(path)
+            _, full = timed(lambda: save.save(engine))
+            for _ in range(args.flags):
+                x, y = random.randrange(width), random.randrange(height)
+                save.mark(engine.flag(x, y))
+            _, incremental = timed(lambda: save.save(engine))
+            _, ram = timed(lambda: load_game(path, mapped=False))
+            (mapped, _), mmap_ms = timed(lambda: load_game(path, mapped=True))
+            mapped.board.close()
+            print(f"{label:<12}{os.path.getsize(path) / 2**20:>8.2f}MB{full:>10.2f}ms{incremental:>10.2f}ms"
+                  f"{ram:>10.2f}ms{mmap_ms:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Action latency and memory per session of the game server under load.
+
+Run from the repository root:
+
+    python -m benchmarks.server_load [--sessions 1000 10000] [--connections N] [--actions N]
+
+For every session count a fresh `server.py` process is started on a free
+port. The harness opens `--connections` client connections, creates the
+sessions spread over them (expert boards) and then plays `--actions`
+actions per session: the first click in the middle, then clicks on random
+cells that are still covered according to the diffs received so far, and
+a reset once a game is over. Every connection keeps one request in
+flight, so about `--connections` requests are queued at the server.
+
+Reported per session count:
+
+- p50 / p99:   round-trip latency of one action in milliseconds
+- actions/s:   requests answered per second over all connections
+- KB/session:  growth of the server's resident memory per session,
+               measured after the games were played
+- sessions/GB: 1 GiB divided by that
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from server import GameClient
+
+SIZE = 'expert'
+
+
+class _Game:
+    """Client-side view of one session, kept up to date from the diffs."""
+
+    __slots__ = ('id', 'width', 'height', 'view', 'state')
+
+    def __init__(self, reply):
+        self.id = reply['session']
+        self.width = reply['width']
+        self.height = reply['height']
+        self.view = bytearray(b'.' * (self.width * self.height))
+        self.state = reply['state']
+
+    def apply(self, reply):
+        if reply.get('reset'):
+            self.view[:] = b'.' * len(self.view)
+        view = self.view
+        for i, c in zip(reply['cells'], reply['values'].encode()):
+            view[i] = c
+        self.state = reply['state']
+
+    def next_move(self, rng):
+        """Return the request of the next action: (op, fields)."""
+        if self.state in ('won', 'lost'):
+            return 'reset', {}
+        if self.state == 'ready':
+            return 'click', {'x': self.width // 2, 'y': self.height // 2}
+        view = self.view
+        while True:
+            i = rng.randrange(len(view))
+            if view[i] == ord('.'):
+                y, x = divmod(i, self.width)
+                return 'click', {'x': x, 'y': y}
+
+
+async def _connection(client, count, actions, rng, latencies):
+    """Create `count` sessions on `client` and play `actions` rounds over them."""
+    games = [_Game(await client.request('new', size=SIZE)) for _ in range(count)]
+    for _ in range(actions):
+        for game in games:
+            op, fields = game.next_move(rng)
+            start = time.perf_counter()
+            reply = await client.request(op, session=game.id, **fields)
+            latencies.append(time.perf_counter() - start)
+            if 'error' in reply:
+                raise RuntimeError(reply['error'])
+            if op == 'reset':
+                reply.update(cells=[], values='')
+            game.apply(reply)
+
+
+async def _load(port, sessions, connections, actions, seed):
+    """Run one load test against the server on `port`; return its measurements."""
+    clients = [await GameClient.connect('127.0.0.1', port) for _ in range(connections)]
+    base = (await clients[0].request('stats'))['rss_bytes']
+    latencies = []
+    start = time.perf_counter()
+    share, extra = divmod(sessions, connections)
+    await asyncio.gather(*(
+        _connection(client, share + (k < extra), actions, random.Random(seed * 1000 + k), latencies)
+        for k, client in enumerate(clients)
+    ))
+    seconds = time.perf_counter() - start
+    stats = await clients[0].request('stats')
+    for client in clients:
+        await client.close()
+    if stats['sessions'] != sessions:
+        raise RuntimeError(f"expected {sessions} live sessions, server has {stats['sessions']}")
+    cuts = statistics.quantiles(latencies, n=100)
+    per_session = (stats['rss_bytes'] - base) / sessions if base is not None else None
+    return {
+        'p50': cuts[49] * 1000,
+        'p99': cuts[98] * 1000,
+        'actions_per_s': len(latencies) / seconds,
+        'bytes_per_session': per_session,
+    }
+
+
+def run_case(sessions, connections, actions, seed):
+    """Start a server process, load it and stop it; return the measurements."""
+    server = subprocess.Popen([sys.executable, 'server.py', '--port', '0', '--max-sessions', str(sessions)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        line = server.stdout.readline()
+        if not line.startswith('listening on'):
+            raise RuntimeError(f"server did not start: {line!r}")
+        port = int(line.rsplit(':', 1)[1])
+        return asyncio.run(_load(port, sessions, min(connections, sessions), actions, seed))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1000, 10000], help='concurrent games per run')
+    parser.add_argument('--connections', type=int, default=100, help='client connections')
+    parser.add_argument('--actions', type=int, default=20, help='actions per session')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'sessions':>9}{'p50':>10}{'p99':>10}{'actions/s':>12}{'KB/session':>12}{'sessions/GB':>13}")
+    for sessions in args.sessions:
+        r = run_case(sessions, args.connections, args.actions, args.seed)
+        size = r['bytes_per_session']
+        if size:
+            memory = f"{size / 1024:>12.2f}{(1 << 30) / size:>13,.0f}"
+        else:
+            memory = f"{'n/a':>12}{'n/a':>13}"
+        print(f"{sessions:>9}{r['p50']:>8.3f}ms{r['p99']:>8.3f}ms{r['actions_per_s']:>12,.0f}{memory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Per-move cost of `solver.Solver` over a fixed corpus of seeded boards.
+
+Run from the repository root:
+
+    python -m benchmarks.solver [--boards N] [--full]
+
+For every preset, N boards are generated from fixed seeds and played to
+the end with the solver policy from `simulate` (certain clicks first,
+then the lowest-probability guess). Each move times the solver work:
+`update` with the changed cells, then `hint` and, when nothing is certain,
+`best_guess`. The report lists the mean, median, 99th percentile and
+worst move in milliseconds, plus the win rate.
+
+With ``--full`` every move also times a from-scratch `Solver(board)` on
+the same position, to show what the incremental update saves.
+"""
+
+import argparse
+import random
+import time
+
+from config import DIFFICULTIES
+from engine import GameEngine, WON
+from solver import Solver
+
+
+def play(width, height, mines, seed, full):
+    """Play one seeded game; return (won, per-move seconds, from-scratch seconds)."""
+    random.seed(f"solver-bench:{width}x{height}x{mines}:{seed}")
+    engine = GameEngine(width, height, mines)
+    changed = engine.click(width // 2, height // 2)
+    times, scratch = [], []
+    solver = None
+    while not engine.is_over:
+        start = time.perf_counter()
+        if solver is None:
+            solver = Solver(engine.board)
+        else:
+            solver.update(changed)
+        hint = solver.hint()
+        if hint is not None and hint[0] == 'click':
+            _, x, y = hint
+        else:
+            x, y = solver.best_guess()
+        times.append(time.perf_counter() - start)
+        if full:
+            start = time.perf_counter()
+            Solver(engine.board).hint()
+            scratch.append(time.perf_counter() - start)
+        changed = engine.click(x, y)
+    return engine.state == WON, times, scratch
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boards', type=int, default=50, help='seeded boards per preset')
+    parser.add_argument('--full', action='store_true', help='also time a from-scratch solve per move')
+    args = parser.parse_args(argv)
+
+    print(f"{'preset':<14}{'moves':>8}{'win rate':>10}  {'mean':>9}{'p50':>9}{'p99':>9}{'max':>9}"
+          + (f"  {'scratch mean':>13}" if args.full else ''))
+    for name, (width, height, mines) in DIFFICULTIES.items():
+        wins, times, scratch = 0, [], []
+        for seed in range(args.boards):
+            won, t, s = play(width, height, mines, seed, args.full)
+            wins += won
+            times.extend(t)
+            scratch.extend(s)
+        ms = [t * 1000 for t in times]
+        line = (f"{name:<14}{len(ms):>8}{wins / args.boards:>10.1%}  {sum(ms) / len(ms):>7.2f}ms"
+                f"{percentile(ms, 0.5):>7.2f}ms{percentile(ms, 0.99):>7.2f}ms{max(ms):>7.2f}ms")
+        if args.full:
+            line += f"  {sum(scratch) * 1000 / len(scratch):>11.2f}ms"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
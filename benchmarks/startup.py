@@ -0,0 +1,98 @@
+"""Cold start to the first menu frame, with and without the asset cache.
+
+Run from the repository root:
+
+    python -m benchmarks.startup [--runs N]
+
+Every run is a fresh interpreter under SDL_VIDEODRIVER=dummy that imports
+`main`, builds the `DifficultyMenu` and draws its first frame. Modes:
+
+- png:       the old path: `pygame.init()` (all modules) and
+             `pygame.image.load` + `transform.scale` per launch
+- uncached:  `main.init_pygame` and `assets.background` with the disk cache disabled
+- cold:      `assets.background` with an empty cache directory (first launch)
+- warm:      `assets.background` with the cache filled by an earlier launch
+
+The report lists the median over `--runs` of the process wall time, the
+imports (mostly pygame itself), the menu setup up to its first frame and
+the background load alone.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = r"""
+import os, sys, time
+t0 = time.perf_counter()
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+mode, cache_dir = sys.argv[1], sys.argv[2]
+import pygame
+import assets
+assets.ASSET_CACHE_DIR = None if mode in ('png', 'uncached') else cache_dir
+import main
+bg_ms = []
+if mode == 'png':
+    main.init_pygame = pygame.init
+
+    def load(size):
+        t = time.perf_counter()
+        image = pygame.transform.scale(pygame.image.load(assets.get_resource_path(assets.BACKGROUND)), size)
+        bg_ms.append((time.perf_counter() - t) * 1000)
+        return image
+else:
+    def load(size, _background=main.background):
+        t = time.perf_counter()
+        image = _background(size)
+        bg_ms.append((time.perf_counter() - t) * 1000)
+        return image
+main.background = load
+t1 = time.perf_counter()
+menu = main.DifficultyMenu()
+menu.draw()
+t2 = time.perf_counter()
+print((t1 - t0) * 1000, (t2 - t1) * 1000, bg_ms[0])
+"""
+
+MODES = ('png', 'uncached', 'cold', 'warm')
+
+
+def launch(mode, cache_dir):
+    """Run one child; return (wall ms, import ms, menu-to-first-frame ms, background ms)."""
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD, mode, cache_dir], capture_output=True, text=True,
+                         check=True, cwd=os.getcwd())
+    wall = (time.perf_counter() - start) * 1000
+    imports, menu, bg = (float(v) for v in out.stdout.split()[-3:])
+    return wall, imports, menu, bg
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7, help='launches per mode')
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':<10}{'wall':>12}{'imports':>12}{'menu':>12}{'background':>13}")
+    tmp = tempfile.mkdtemp(prefix='mswp-assets-')
+    try:
+        for mode in MODES:
+            samples = []
+            for _ in range(args.runs):
+                cache_dir = os.path.join(tmp, 'cache')
+                if mode == 'cold':
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                samples.append(launch(mode, cache_dir))
+            wall, imports, menu, bg = (statistics.median(s[k] for s in samples) for k in range(4))
+            print(f"{mode:<10}{wall:>10.1f}ms{imports:>10.1f}ms{menu:>10.2f}ms{bg:>11.2f}ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
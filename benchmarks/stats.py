@@ -0,0 +1,77 @@
+"""Write and query costs of the `stats` game history with many recorded games.
+
+Run from the repository root:
+
+    python -m benchmarks.stats [--games N]
+
+A fresh database in a temporary directory is filled with N seeded games
+spread over the presets, each added with its mine layout so the writer
+thread computes the 3BV as it would for a played game. Reported:
+
+- add:      time `StatsStore.add` takes in the caller (what the frame
+            loop pays per finished game), mean, p99 and worst
+- written:  games per second the writer thread stores, 3BV included
+- queries:  mean time of `summary()`, `best()`, `percentile()` and
+            `percentile_rank()` on the full database
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from config import DIFFICULTIES
+from mines import sample_mines
+from stats import GameRecord, StatsStore
+
+# distinct layouts per preset, reused across the recorded games
+LAYOUTS = 50
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=300_000, help='recorded games')
+    parser.add_argument('--queries', type=int, default=200, help='repetitions of each query')
+    args = parser.parse_args(argv)
+
+    random.seed('stats-bench')
+    rng = random.Random('stats-bench')
+    presets = list(DIFFICULTIES.items())
+    layouts = {name: [list(sample_mines(w, h, m, w // 2, h // 2)) for _ in range(LAYOUTS)]
+               for name, (w, h, m) in presets}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StatsStore(os.path.join(tmp, 'stats.sqlite3'))
+        adds = []
+        start = time.perf_counter()
+        for i in range(args.games):
+            name, (w, h, m) = presets[i % len(presets)]
+            won = rng.random() < 0.4
+            record = GameRecord(time.time(), name, w, h, m, rng.getrandbits(63), (h // 2) * w + w // 2,
+                                rng.uniform(5, 300), rng.randrange(5, 200), 'won' if won else 'lost')
+            t = time.perf_counter()
+            store.add(record, layouts[name][i % LAYOUTS])
+            adds.append(time.perf_counter() - t)
+        store.flush()
+        written = args.games / (time.perf_counter() - start)
+        adds.sort()
+        print(f"add: {sum(adds) / len(adds) * 1e6:.1f}us mean, {adds[len(adds) * 99 // 100] * 1e6:.1f}us p99, "
+              f"{adds[-1] * 1e3:.2f}ms worst")
+        print(f"written: {written:,.0f} games/s")
+
+        queries = [
+            ('summary()', lambda: store.summary()),
+            ("best('expert')", lambda: store.best('expert')),
+            ("percentile('expert', 50)", lambda: store.percentile('expert', 50)),
+            ("percentile_rank('expert', t)", lambda: store.percentile_rank('expert', rng.uniform(5, 300))),
+        ]
+        for label, query in queries:
+            start = time.perf_counter()
+            for _ in range(args.queries):
+                query()
+            print(f"{label:<30}{(time.perf_counter() - start) / args.queries * 1e3:>9.3f}ms")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
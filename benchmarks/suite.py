@@ -0,0 +1,264 @@
+"""Reproducible benchmark suite for the board hot paths and headless drawing.
+
+Run from the repository root:
+
+    python -m benchmarks.suite [--max-cells N] [--repeat N] [--only REGEX]
+                               [--json OUT] [--save-baseline] [--baseline FILE]
+                               [--threshold 0.25]
+
+Every case runs on all `config.DIFFICULTIES` presets plus the scaled
+sizes in `SCALED` (up to `--max-cells` cells):
+
+- init:           `make_board` (the backend the game uses for that size)
+- place_mines:    `place_mines` from a centered first click
+- reveal_typical: the first-click reveal on a board at expert density
+- reveal_worst:   revealing a mine-free board from a corner (one opening)
+- check_win:      one `check_win()` call (per-call time)
+- flagged_count:  one `flagged_count` read (per-call time)
+- draw_full:      a full `Game.draw` repaint under SDL_VIDEODRIVER=dummy
+- draw_flag:      a `Game.draw` after one flag changed
+
+Each case is run once untimed to warm up, then measured `--repeat` times
+with its setup outside the timed region and a fixed seed per repetition.
+Fast cases are timed over a batch of fresh setups and divided by the
+batch size. The report keeps the best and the median time per run;
+`--json OUT` writes the results as JSON ('-' for stdout).
+
+Regression check: `--save-baseline` stores the results in the baseline
+file (default `benchmarks/baseline.json`). A later run with `--baseline`
+compares every case's best time against it and exits with status 1 if
+any case got slower by more than `--threshold` (0.25 = 25%). Baselines
+are machine specific, so record one on the machine that runs the checks.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from config import DIFFICULTIES  # noqa: E402
+from packed_board import make_board  # noqa: E402
+
+# Scaled custom sizes: (label, cols, rows); mines at the expert density
+SCALED = [
+    ('100x100', 100, 100),
+    ('300x300', 300, 300),
+    ('1000x1000', 1000, 1000),
+    ('2000x2000', 2000, 2000),
+]
+EXPERT_DENSITY = DIFFICULTIES['expert'][2] / (DIFFICULTIES['expert'][0] * DIFFICULTIES['expert'][1])
+# calls per sample for the O(1) queries, so one sample is long enough to time
+QUERY_CALLS = 10_000
+# fast cases run in batches of fresh setups so one sample takes at least
+# MIN_SAMPLE seconds (timer resolution and scheduler noise stay small)
+MIN_SAMPLE = 0.005
+MAX_BATCH = 200
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def sizes(max_cells):
+    """Return (label, cols, rows, mines) for the presets and the scaled sizes up to `max_cells`."""
+    result = [(name, cols, rows, mines) for name, (cols, rows, mines) in DIFFICULTIES.items()]
+    for label, cols, rows in SCALED:
+        if cols * rows <= max_cells:
+            result.append((label, cols, rows, int(cols * rows * EXPERT_DENSITY)))
+    return result
+
+
+def seed(case, label, rep):
+    random.seed(f"suite:{case}:{label}:{rep}")
+
+
+def placed_board(cols, rows, mines):
+    board = make_board(cols, rows, mines)
+    board.place_mines(cols // 2, rows // 2)
+    return board
+
+
+# Every case is (setup(cols, rows, mines) -> state, run(state)); only `run` is timed.
+def _query_loop(attr):
+    def run(board):
+        for _ in range(QUERY_CALLS):
+            getattr(board, attr)() if attr == 'check_win' else getattr(board, attr)
+    return run
+
+
+CASES = {
+    'init': (lambda c, r, m: (c, r, m), lambda args: make_board(*args)),
+    'place_mines': (lambda c, r, m: make_board(c, r, m), lambda b: b.place_mines(b.width // 2, b.height // 2)),
+    'reveal_typical': (placed_board, lambda b: b.reveal(b.width // 2, b.height // 2)),
+    'reveal_worst': (lambda c, r, m: make_board(c, r, 0), lambda b: (b.set_mines([]), b.reveal(0, 0))),
+    'check_win': (placed_board, _query_loop('check_win')),
+    'flagged_count': (placed_board, _query_loop('flagged_count')),
+}
+PER_CALL = {'check_win', 'flagged_count'}
+# only one Game (display surface) can exist at a time
+UNBATCHED = {'draw_full', 'draw_flag'}
+
+
+def draw_cases():
+    """Return the `Game.draw` cases, or {} if pygame is not available."""
+    try:
+        import pygame
+        from main import Game
+    except ImportError:
+        return {}
+
+    def new_game(cols, rows, mines):
+        pygame.quit()
+        game = Game((cols, rows, mines))
+        game.engine.click(cols // 2, rows // 2)
+        game.draw()
+        return game
+
+    def flag_setup(cols, rows, mines):
+        game = new_game(cols, rows, mines)
+        # a covered cell in view, so the frame really draws it
+        x0, y0, x1, y1 = game.camera.visible_range()
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                if game.engine.flag(x, y):
+                    game.mark_dirty((y * cols + x,))
+                    return game
+        return game
+
+    def full_setup(cols, rows, mines):
+        game = new_game(cols, rows, mines)
+        game.invalidate()
+        return game
+
+    return {
+        'draw_full': (full_setup, lambda game: game.draw()),
+        'draw_flag': (flag_setup, lambda game: game.draw()),
+    }
+
+
+def measure(case, setup, run, label, cols, rows, mines, repeat):
+    """Time `run` `repeat` times on fresh seeded setups; return a result dict (milliseconds)."""
+    # one untimed run first, so imports, caches and CPU clocks are warmed up;
+    # it also sizes the batches so a sample of a fast case lasts MIN_SAMPLE
+    seed(case, label, -1)
+    state = setup(cols, rows, mines)
+    start = time.perf_counter()
+    run(state)
+    batch = max(1, min(MAX_BATCH, int(MIN_SAMPLE / max(time.perf_counter() - start, 1e-9))))
+    if case in UNBATCHED:
+        batch = 1
+    samples = []
+    for rep in range(repeat):
+        seed(case, label, rep)
+        states = [setup(cols, rows, mines) for _ in range(batch)]
+        start = time.perf_counter()
+        for state in states:
+            run(state)
+        samples.append((time.perf_counter() - start) / batch)
+    if case in PER_CALL:
+        samples = [s / QUERY_CALLS for s in samples]
+    return {
+        'case': case,
+        'size': label,
+        'cells': cols * rows,
+        'best_ms': min(samples) * 1000,
+        'median_ms': statistics.median(samples) * 1000,
+        'repeat': repeat,
+    }
+
+
+def run_suite(args):
+    cases = dict(CASES)
+    if not args.no_draw:
+        cases.update(draw_cases())
+    only = re.compile(args.only) if args.only else None
+    results = {}
+    for label, cols, rows, mines in sizes(args.max_cells):
+        for case, (setup, run) in cases.items():
+            key = f"{case}/{label}"
+            if only and not only.search(key):
+                continue
+            results[key] = measure(case, setup, run, label, cols, rows, mines, args.repeat)
+            if not args.quiet:
+                r = results[key]
+                print(f"{key:<32}{r['best_ms']:>12.4f}ms{r['median_ms']:>12.4f}ms", file=sys.stderr, flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (lines, regressions) comparing best times against `baseline`."""
+    lines, regressions = [], []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base is None:
+            lines.append(f"{key:<32}{r['best_ms']:>12.4f}ms{'(new)':>24}")
+            continue
+        ratio = r['best_ms'] / base['best_ms'] if base['best_ms'] else 1.0
+        mark = ''
+        if ratio > 1 + threshold:
+            mark = '  REGRESSION'
+            regressions.append(key)
+        lines.append(f"{key:<32}{r['best_ms']:>12.4f}ms{base['best_ms']:>12.4f}ms{ratio:>9.2f}x{mark}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-cells', type=int, default=4_000_000, help='largest scaled size to include')
+    parser.add_argument('--repeat', type=int, default=5, help='measurements per case')
+    parser.add_argument('--only', default=None, help='regex selecting case/size keys, e.g. "reveal|expert"')
+    parser.add_argument('--no-draw', action='store_true', help='skip the Game.draw cases')
+    parser.add_argument('--json', default=None, help="write results as JSON to this file ('-' for stdout)")
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE, default=None,
+                        help='compare against a baseline file (default: benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, default=None,
+                        help='store these results as the baseline (default: benchmarks/baseline.json)')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown before a case fails')
+    parser.add_argument('--quiet', action='store_true', help='no per-case progress lines')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'repeat': args.repeat,
+            'max_cells': args.max_cells,
+        },
+        'results': results,
+    }
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.save_baseline}", file=sys.stderr)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        lines, regressions = compare(results, baseline, args.threshold)
+        print(f"{'case/size':<32}{'now':>14}{'baseline':>14}{'ratio':>10}")
+        print('\n'.join(lines))
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}: "
+                  + ', '.join(regressions))
+            status = 1
+        else:
+            print(f"no regressions beyond {args.threshold:.0%}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
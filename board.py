@@ -1,9 +1,18 @@
 import random
-from typing import List, Tuple
+from array import array
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
 from cell import Cell
+from changes import ChangeStream
+from mines import adjacency_counts, mine_mask, sample_mines
 
+# Bits of a `player_state()` byte (the same bits `packed_board` stores per cell)
+STATE_REVEALED = 0x02
+STATE_FLAGGED = 0x04
+STATE_EXPLODED = 0x08
 
-class Board:
+
+class Board(ChangeStream):
     """Represents the game board and contains board-related logic.
 
     Responsibilities:
@@ -12,8 +21,25 @@ class Board:
     - Compute adjacent mine counts
     - Reveal cells and propagate reveals for empty cells
     - Provide helpers for win/loss checks and flags
+
+    Flag, revealed-cell and explosion state is also kept in running counters
+    (`flagged_count`, `safe_left`, `exploded`) so win/loss checks and the
+    header mine counter cost O(1). Change cells through `reveal`,
+    `toggle_flag`, `flag_all_mines` and `reveal_all_mines` to keep them in sync.
+
+    Those methods also publish what they changed to the listeners of the
+    board's change stream (see `changes.ChangeStream`).
+
+    `clear()` turns a used board back into an empty one in place, so a new
+    game of the same size reuses the cells instead of allocating them.
+    `reveal_cells`, `cover_cells`, `set_flags` and `remove_mines` change
+    exactly the cells they are given, without the game rules; `history`
+    uses them to undo and redo moves.
     """
 
+    # `clear()` may be used instead of building a new board
+    reusable = True
+
     def __init__(self, width: int, height: int, mines: int):
         self.width = width
         self.height = height
@@ -21,11 +47,39 @@ class Board:
         # 2D grid y-major: grid[row][col]
         self.grid: List[List[Cell]] = [ [Cell(x,y) for x in range(width)] for y in range(height) ]
         self.mines_placed = False
+        self._reset_counters()
+
+    def _reset_counters(self):
+        """Reset the mine list and running counters to the empty-board state."""
+        # flat indices of the placed mines (empty until place_mines runs)
+        self.mine_indices: Sequence[int] = ()
+        # running counters, see class docstring
+        self.revealed_count = 0
+        self._flag_count = 0
+        # (x, y) of the mine that was revealed, if any
+        self.exploded: Optional[Tuple[int, int]] = None
+
+    def clear(self):
+        """Make this an empty board again (no mines, every cell covered), reusing its cells.
+
+        Listeners are kept and get a batch with `reset` set.
+        """
+        for row in self.grid:
+            for cell in row:
+                cell.mine = cell.revealed = cell.flagged = cell.exploded = False
+                cell.adjacent = 0
+        self.mines_placed = False
+        self._reset_counters()
+        self.notify_reset()
 
     def in_bounds(self, x, y):
         """Return True if (x,y) is inside the board bounds."""
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def cell(self, x: int, y: int) -> Cell:
+        """Return the cell at (x,y)."""
+        return self.grid[y][x]
+
     def neighbors(self, x, y):
         """Yield neighbor Cell objects around (x,y) (8-way)."""
         for dy in (-1,0,1):
@@ -36,87 +90,246 @@ class Board:
                 if self.in_bounds(nx, ny):
                     yield self.grid[ny][nx]
 
-    def place_mines(self, safe_x: int, safe_y: int):
+    def place_mines(self, safe_x: int, safe_y: int, rng: Optional[random.Random] = None):
         """Place mines on the board after the first click.
 
         Mines are not placed until the first click to guarantee the initial click is safe.
         The 3x3 area around (safe_x, safe_y) is excluded from possible mine locations.
+        Positions are drawn from `rng` if given, else from the `random` module.
         This method is idempotent: calling it again after mines are placed is a no-op.
         """
         if self.mines_placed:
             return
 
-        # Clear any previous mine markers (defensive) and reset adjacent counts
+        # Sample mine indices outside the 3x3 safe area
+        self.set_mines(sample_mines(self.width, self.height, self.mines, safe_x, safe_y, rng))
+
+    def set_mines(self, mine_indices: Sequence[int]):
+        """Place mines at the given flat indices and compute the adjacent counts.
+
+        Used by `place_mines` after sampling, and to install a layout chosen
+        elsewhere (e.g. a pre-generated no-guess board). Any earlier mines
+        are replaced; player state such as flags is kept.
+        """
+        mask = mine_mask(self.width, self.height, mine_indices)
+        counts = adjacency_counts(self.width, self.height, mask)
+
+        # Copy the layout onto the cells (also clears any previous mine markers)
+        i = 0
+        for row in self.grid:
+            for cell in row:
+                cell.mine = mask[i] == 1
+                cell.adjacent = counts[i]
+                i += 1
+
+        self.mine_indices = mine_indices
+        self.mines_placed = True
+        self._record(mines_placed=True)
+
+    def remove_mines(self):
+        """Take the mine layout off the board again, as before the first click."""
         for row in self.grid:
             for cell in row:
                 cell.mine = False
                 cell.adjacent = 0
+        self.mine_indices = ()
+        self.mines_placed = False
+        self._record(mines_placed=True)
 
-        # Build candidate list excluding the 3x3 safe area
-        candidates = []
-        for y in range(self.height):
-            for x in range(self.width):
-                skip = False
-                for dy in (-1,0,1):
-                    for dx in (-1,0,1):
-                        if x == safe_x + dx and y == safe_y + dy:
-                            skip = True
-                            break
-                    if skip:
-                        break
-                if not skip:
-                    candidates.append((x,y))
-
-        # Randomly select mine locations from candidates
-        mines_to_place = min(self.mines, len(candidates))
-        chosen = random.sample(candidates, mines_to_place)
-        for x,y in chosen:
-            self.grid[y][x].mine = True
-
-        # Recompute adjacent mine counts for every cell
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = self.grid[y][x]
-                cell.adjacent = sum(1 for n in self.neighbors(x,y) if n.mine)
+    def reveal_cells(self, indices: Sequence[int], exploded: Sequence[int] = ()):
+        """Reveal exactly the covered cells at the flat `indices`: no flood fill, no game rules.
 
-        self.mines_placed = True
+        `exploded` are the flat indices of the mines among them that blew up
+        (a chord can hit several); the last one becomes `exploded`.
+        """
+        w = self.width
+        grid = self.grid
+        for i in indices:
+            cell = grid[i // w][i % w]
+            cell.revealed = True
+            if not cell.mine:
+                self.revealed_count += 1
+        for i in exploded:
+            grid[i // w][i % w].exploded = True
+            self.exploded = (i % w, i // w)
+        self._record(revealed=indices, exploded=exploded)
+
+    def cover_cells(self, indices: Sequence[int]):
+        """Cover the revealed cells at the flat `indices` again; the inverse of `reveal_cells`."""
+        w = self.width
+        grid = self.grid
+        for i in indices:
+            cell = grid[i // w][i % w]
+            cell.revealed = False
+            if cell.exploded:
+                cell.exploded = False
+                self.exploded = None
+            if not cell.mine:
+                self.revealed_count -= 1
+        self._record(covered=indices)
+
+    def set_flags(self, indices: Sequence[int], flagged: bool):
+        """Set (or clear) the flag of the covered cells at the flat `indices`, all currently without (with) one."""
+        w = self.width
+        grid = self.grid
+        for i in indices:
+            grid[i // w][i % w].flagged = flagged
+        self._flag_count += len(indices) if flagged else -len(indices)
+        self._record(**{'flagged' if flagged else 'unflagged': indices})
 
     def reveal_all_mines(self):
-        """Reveal all mines on the board (used when the player loses)."""
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = self.grid[y][x]
-                if cell.mine:
-                    cell.revealed = True
+        """Reveal all mines on the board (used when the player loses).
+
+        Only mines are revealed, so `safe_left` is unchanged.
+        """
+        w = self.width
+        shown = array('q')
+        for i in self.mine_indices:
+            y, x = divmod(int(i), w)
+            cell = self.grid[y][x]
+            if not cell.revealed:
+                cell.revealed = True
+                shown.append(int(i))
+        self._record(revealed=shown)
+
+    def flag_all_mines(self):
+        """Flag every mine (used to auto-flag the remaining mines on a win)."""
+        w = self.width
+        flagged = array('q')
+        for i in self.mine_indices:
+            y, x = divmod(int(i), w)
+            cell = self.grid[y][x]
+            if not cell.flagged:
+                cell.flagged = True
+                self._flag_count += 1
+                flagged.append(int(i))
+        self._record(flagged=flagged)
+
+    def toggle_flag(self, x: int, y: int) -> bool:
+        """Toggle the flag on the cell at (x,y); return True if the flag state changed.
+
+        Revealed cells cannot be flagged.
+        """
+        cell = self.grid[y][x]
+        if cell.revealed:
+            return False
+        cell.toggle_flag()
+        self._flag_count += 1 if cell.flagged else -1
+        if self._listeners:
+            self._record(**{'flagged' if cell.flagged else 'unflagged': (y * self.width + x,)})
+        return True
+
+    def player_state(self) -> bytes:
+        """Return what the player did to every cell, one byte per flat index.
+
+        Each byte holds the `STATE_*` bits (revealed, flagged, exploded);
+        the mine layout is not included. Together with the layout this is a
+        complete snapshot of the board (see `load_player_state`).
+        """
+        state = bytearray(self.width * self.height)
+        i = 0
+        for row in self.grid:
+            for cell in row:
+                state[i] = ((STATE_REVEALED if cell.revealed else 0) | (STATE_FLAGGED if cell.flagged else 0)
+                            | (STATE_EXPLODED if cell.exploded else 0))
+                i += 1
+        return bytes(state)
+
+    def load_player_state(self, state: bytes):
+        """Overwrite the player state of every cell from a `player_state()` snapshot.
+
+        The mine layout is kept, so install it first (`set_mines`) when
+        restoring a game in progress. The running counters are recomputed.
+        """
+        revealed = flagged = 0
+        exploded = None
+        i = 0
+        for row in self.grid:
+            for cell in row:
+                b = state[i]
+                cell.revealed = bool(b & STATE_REVEALED)
+                cell.flagged = bool(b & STATE_FLAGGED)
+                cell.exploded = bool(b & STATE_EXPLODED)
+                if cell.revealed and not cell.mine:
+                    revealed += 1
+                flagged += cell.flagged
+                if cell.exploded:
+                    exploded = (cell.x, cell.y)
+                i += 1
+        self.revealed_count = revealed
+        self._flag_count = flagged
+        self.exploded = exploded
+        self.notify_reset()
 
     @property
     def flagged_count(self) -> int:
         """Return the number of flags currently set on the board."""
-        return sum(1 for y in range(self.height) for x in range(self.width) if self.grid[y][x].flagged)
+        return self._flag_count
+
+    @property
+    def safe_left(self) -> int:
+        """Return the number of non-mine cells that are still covered."""
+        return self.width * self.height - len(self.mine_indices) - self.revealed_count
 
     def check_win(self) -> bool:
         """Return True when all non-mine cells have been revealed.
 
         This is used to detect a winning state after each reveal.
         """
-        for y in range(self.height):
-            for x in range(self.width):
-                c = self.grid[y][x]
-                if not c.mine and not c.revealed:
-                    return False
-        return True
+        return self.safe_left == 0
+
+    def check_loss(self) -> bool:
+        """Return True once a mine has been revealed."""
+        return self.exploded is not None
 
-    def reveal(self, x: int, y: int):
-        """Reveal the cell at (x,y). If the cell is empty (adjacent==0), recursively reveal neighbors.
+    def reveal(self, x: int, y: int) -> array:
+        """Reveal the cell at (x,y). If the cell is empty (adjacent==0), flood-fill its neighbors.
 
-        Revealing is a no-op on already revealed or flagged cells.
+        The flood fill runs on an explicit queue, so openings of any size never
+        hit the recursion limit. Revealing is a no-op on already revealed or
+        flagged cells. Revealing a mine marks it exploded and records it in
+        `exploded`.
+
+        Returns a packed `array('q')` of the flat indices (``y * width + x``) of
+        every cell this call revealed, so callers can update counters and
+        redraw only those cells. The array is empty for a no-op. The same
+        cells are published to the change stream.
         """
+        revealed = array('q')
         cell = self.grid[y][x]
         if cell.revealed or cell.flagged:
-            return
+            return revealed
         cell.reveal()
-        # propagate if no adjacent mines
-        if cell.adjacent == 0 and not cell.mine:
-            for n in self.neighbors(x,y):
-                if not n.revealed:
-                    self.reveal(n.x, n.y)
+        w, h = self.width, self.height
+        revealed.append(y * w + x)
+        if cell.mine:
+            cell.exploded = True
+            self.exploded = (x, y)
+            if self._listeners:
+                self._record(revealed=revealed, exploded=revealed)
+            return revealed
+        if cell.adjacent:
+            self.revealed_count += 1
+            if self._listeners:
+                self._record(revealed=revealed)
+            return revealed
+
+        # breadth-first over empty cells; numbered cells are revealed but not expanded
+        grid = self.grid
+        queue = deque(((x, y),))
+        while queue:
+            cx, cy = queue.popleft()
+            for ny in range(max(0, cy - 1), min(h, cy + 2)):
+                row = grid[ny]
+                for nx in range(max(0, cx - 1), min(w, cx + 2)):
+                    n = row[nx]
+                    if n.revealed or n.flagged:
+                        continue
+                    n.revealed = True
+                    revealed.append(ny * w + nx)
+                    if n.adjacent == 0:
+                        queue.append((nx, ny))
+        self.revealed_count += len(revealed)
+        if self._listeners:
+            self._record(revealed=revealed)
+        return revealed
@@ -0,0 +1,146 @@
+"""Batched change events published by the boards.
+
+A board (`board.Board`, `packed_board.PackedBoard`,
+`infinite_board.InfiniteBoard`) mixes in `ChangeStream`. Listeners
+registered with `subscribe()` are called with one `ChangeBatch` listing
+the cells that changed, instead of one callback per cell, so renderers,
+statistics and network code do work proportional to what changed and
+never rescan the grid.
+
+Without a batch open, every board call that changes cells publishes its
+own batch. `GameEngine` actions run inside `batch()` (see `batched`), so
+one click, chord or flag -- including the loss/win sweep it triggers --
+arrives as a single batch. A board without listeners skips the
+bookkeeping entirely.
+"""
+
+import functools
+from array import array
+from contextlib import contextmanager
+
+
+class ChangeBatch:
+    """Cells that changed during one action.
+
+    Cells are keys of the board that published the batch: flat indices
+    (``y * width + x``) for `Board`, ``(x, y)`` tuples for
+    `InfiniteBoard`. Each sequence lists cells in the order they changed.
+
+    Attributes:
+      - revealed: cells that became revealed (mines included on a loss)
+      - covered: cells that became covered again (undo, see `history`)
+      - flagged / unflagged: cells whose flag was set / removed
+      - exploded: the mine that was revealed, if any (also in `revealed`)
+      - mines_placed: the mine layout was installed, or taken off again
+        (`Board.remove_mines`, when the first click is undone)
+      - reset: every cell may have changed (new board, loaded state);
+        listeners should rescan instead of relying on the lists
+    """
+
+    __slots__ = ('revealed', 'covered', 'flagged', 'unflagged', 'exploded', 'mines_placed', 'reset')
+
+    def __init__(self, new_keys=list):
+        self.revealed = new_keys()
+        self.covered = new_keys()
+        self.flagged = new_keys()
+        self.unflagged = new_keys()
+        self.exploded = new_keys()
+        self.mines_placed = False
+        self.reset = False
+
+    def cells(self):
+        """Return every cell whose visible state changed (revealed, covered, flagged or unflagged)."""
+        return self.revealed + self.covered + self.flagged + self.unflagged
+
+    def __bool__(self):
+        return bool(self.revealed or self.covered or self.flagged or self.unflagged or self.mines_placed
+                    or self.reset)
+
+    def __repr__(self):
+        return (f"ChangeBatch(revealed={len(self.revealed)}, covered={len(self.covered)}, "
+                f"flagged={len(self.flagged)}, unflagged={len(self.unflagged)}, exploded={list(self.exploded)}, "
+                f"mines_placed={self.mines_placed}, reset={self.reset})")
+
+
+class ChangeStream:
+    """Mixin that lets a board publish `ChangeBatch`es to its listeners.
+
+    Public methods:
+      - subscribe(listener): call `listener(batch)` after every change
+      - unsubscribe(listener)
+      - batch(): context manager coalescing all changes into one batch
+      - notify_reset(): publish a batch with `reset` set
+
+    Boards report changes with `_record(field=cells, flag=True, ...)`.
+    """
+
+    # class-level defaults, so boards need no extra setup in __init__
+    _listeners = ()
+    _pending = None
+    _batch_depth = 0
+    # sequence type for the cell keys of a batch
+    _new_keys = staticmethod(lambda: array('q'))
+
+    def subscribe(self, listener):
+        """Call `listener(batch)` with every published `ChangeBatch`; return `listener`."""
+        if not self._listeners:
+            self._listeners = []
+        self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        """Stop calling `listener`; unknown listeners are ignored."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @contextmanager
+    def batch(self):
+        """Collect the changes made inside the block and publish them as one batch at its end.
+
+        Batches nest; only the outermost block publishes.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._publish()
+
+    def notify_reset(self):
+        """Tell the listeners that every cell may have changed."""
+        self._record(reset=True)
+
+    def _record(self, **changes):
+        """Add `changes` (field name -> cells, or True for a flag) to the pending batch."""
+        if not self._listeners:
+            return
+        batch = self._pending
+        if batch is None:
+            batch = self._pending = ChangeBatch(self._new_keys)
+        for field, value in changes.items():
+            if value is True:
+                setattr(batch, field, True)
+            else:
+                getattr(batch, field).extend(value)
+        if not self._batch_depth:
+            self._publish()
+
+    def _publish(self):
+        """Send the pending batch, if it holds anything, to every listener."""
+        batch, self._pending = self._pending, None
+        if batch:
+            for listener in list(self._listeners):
+                listener(batch)
+
+
+def batched(action):
+    """Decorator for engine actions: run the action inside one `batch()` of `self.board`."""
+    @functools.wraps(action)
+    def wrapper(self, *args):
+        board = self.board
+        if not board._listeners:
+            return action(self, *args)
+        with board.batch():
+            return action(self, *args)
+    return wrapper
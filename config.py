@@ -4,15 +4,32 @@
 Place project-wide constants that affect sizing, layout and default difficulties here.
 """
 
+import os
+
 # Pixel size of a single cell square
 CELL_SIZE = 24
 
 # Height (in pixels) of the header area that shows mines/timer/smiley
 HEADER_HEIGHT = 40
 
-# Small margin used by UI elements (unused in minimal scaffold but left for extension)
+# Small margin used by UI elements (e.g. around the minimap)
 MARGIN = 5
 
+# Largest game window in pixels (header included). Boards that do not fit
+# scroll inside it (see `viewport.Camera`); the window also never exceeds
+# the desktop.
+MAX_WINDOW_SIZE = (1280, 800)
+
+# Cell sizes in pixels that zooming steps through (CELL_SIZE is the default)
+ZOOM_LEVELS = (8, 12, 16, 24, 32, 48)
+
+# Pixels scrolled per mouse-wheel notch or arrow key press
+SCROLL_STEP = 72
+
+# Largest size in pixels of the minimap overview shown while the board
+# does not fit the window
+MINIMAP_MAX_SIZE = (160, 120)
+
 # Difficulty presets: (cols, rows, mines)
 DIFFICULTIES = {
     'beginner': (9, 9, 10),
@@ -22,3 +39,101 @@ DIFFICULTIES = {
 
 # Main loop frame-rate
 FPS = 30
+
+# Main loop scheduling. 'fixed' polls input and redraws FPS times per second;
+# 'event' sleeps in pygame.event.wait until input arrives or the timer display
+# is due to change, so an idle window uses (almost) no CPU. FPS still caps
+# the frame rate while input is streaming in.
+LOOP_MODE = 'event'
+
+# Boards with at least this many cells use the compact `packed_board.PackedBoard`
+# backend instead of one `Cell` object per square
+PACKED_BOARD_MIN_CELLS = 250_000
+
+# No-guess mode: the first click installs a pre-generated layout that
+# `solver.Solver` can clear without guessing. Layouts are produced by a
+# background process pool (see `noguess.LayoutCache`); if none fits the
+# first click yet, that game falls back to the classic random layout.
+NO_GUESS = False
+# Layouts kept per (cols, rows, mines, first-click position class)
+NO_GUESS_CACHE_SIZE = 8
+# Where the layout cache persists between runs (None keeps it in memory only)
+NO_GUESS_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.mswp', 'no_guess_layouts.json')
+# Candidate layouts one background job tries before giving up
+NO_GUESS_ATTEMPTS = 2000
+
+# Infinite board mode (`infinite_board.InfiniteBoard`). The world is split
+# into square chunks whose mines are derived from (seed, chunk coordinates).
+INFINITE_CHUNK_SIZE = 64
+# Fraction of cells holding a mine; must be at least
+# `infinite_board.MIN_DENSITY` so that openings stay finite
+INFINITE_MINE_DENSITY = 0.16
+# Decoded chunks kept in memory (about CHUNK_SIZE**2 bytes each)
+INFINITE_LIVE_CHUNKS = 64
+# Compressed chunks kept in memory before the oldest are spilled to disk
+INFINITE_COLD_CHUNKS = 1024
+
+# Replays (`replay.py`): with RECORD_REPLAYS every game is logged to
+# REPLAY_DIR as a compact binary file while it is played
+RECORD_REPLAYS = False
+REPLAY_DIR = os.path.join(os.path.expanduser('~'), '.mswp', 'replays')
+# Recorded actions between keyframe snapshots: seeking applies at most this
+# many actions, each keyframe costs about one compressed board
+REPLAY_KEYFRAME_INTERVAL = 256
+
+# Save/resume (`savegame.py`). With AUTOSAVE the game in progress is saved
+# to AUTOSAVE_PATH at most every AUTOSAVE_INTERVAL seconds (only the pages
+# that changed are written), when it ends and on quit; the next start
+# resumes it instead of showing the menu.
+AUTOSAVE = True
+AUTOSAVE_PATH = os.path.join(os.path.expanduser('~'), '.mswp', 'autosave.msws')
+AUTOSAVE_INTERVAL = 5
+# Saves of boards with at least this many cells are opened as a memory map
+# (`savegame.MappedBoard`) instead of being loaded into RAM
+SAVE_MAPPED_MIN_CELLS = 64_000_000
+
+# Game history (`stats.py`): with STATS every finished game is added to
+# the SQLite database at STATS_PATH (on a background thread) for personal
+# bests, win rates and percentiles
+STATS = True
+STATS_PATH = os.path.join(os.path.expanduser('~'), '.mswp', 'stats.sqlite3')
+
+# Frame profiler (`profiler.py`). With PROFILE the game times every phase
+# of each frame from the start and shows the overlay; F3 also switches it
+# on (and the overlay off/on) while playing, F4 exports the buffer to
+# PROFILE_DIR as JSON and as a Chrome trace.
+PROFILE = False
+PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.mswp', 'profiles')
+# Frames (and input latencies) kept in the ring buffer
+PROFILE_FRAMES = 600
+# Milliseconds between overlay updates
+PROFILE_OVERLAY_INTERVAL = 250
+
+# Undo/redo (`history.py`): one delta per action, the oldest dropped first
+# once deltas and checkpoints take more than HISTORY_MAX_BYTES; a
+# compressed board checkpoint every HISTORY_CHECKPOINT_INTERVAL actions
+# bounds the cost of long jumps
+HISTORY_MAX_BYTES = 16 * 1024 * 1024
+HISTORY_CHECKPOINT_INTERVAL = 256
+
+# Startup asset cache (`assets.py`): pre-scaled copies of images such as
+# the menu background, keyed by size and a hash of the source file, so a
+# launch skips decoding and rescaling them (None disables the disk cache)
+ASSET_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.mswp', 'assets')
+
+# Game server (`server.py`): line-delimited JSON over TCP
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+# Sessions without a request for this many seconds are evicted
+SERVER_IDLE_TIMEOUT = 600
+# Live sessions; `new` is refused once this many are active
+SERVER_MAX_SESSIONS = 200_000
+# Largest board a session may create, in cells
+SERVER_MAX_CELLS = 65_536
+
+# Board thumbnails (`render.py`): cells at least THUMBNAIL_TILE_MIN_SIZE
+# pixels wide are drawn with the game's tile artwork, smaller ones as
+# flat colored squares; batches are rendered THUMBNAIL_CHUNK_SIZE jobs
+# at a time per worker process
+THUMBNAIL_TILE_MIN_SIZE = 8
+THUMBNAIL_CHUNK_SIZE = 16
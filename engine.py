@@ -0,0 +1,212 @@
+"""Headless Minesweeper rules engine.
+
+`GameEngine` owns a board and applies the game rules to player actions:
+first-click mine placement, loss detection, the win check and auto-flagging
+on a win. It has no pygame dependency, so solvers, simulations and servers
+can drive games at machine speed without SDL in the process. `main.Game`
+is a thin pygame adapter over it.
+
+Every action returns an `array('q')` of the flat cell indices
+(``y * width + x``) whose visible state changed, so callers only redraw or
+send what changed. Observers that are not the caller (renderers, stats,
+network code) can `subscribe` to the board's change stream instead: each
+action arrives as one `changes.ChangeBatch`.
+"""
+
+import random
+from array import array
+
+from changes import batched
+from packed_board import make_board
+
+# Game states, in the order a game moves through them
+READY = 'ready'      # no click yet, mines not placed
+PLAYING = 'playing'
+WON = 'won'
+LOST = 'lost'
+
+
+class GameEngine:
+    """Applies Minesweeper rules to click, flag and chord actions.
+
+    Public methods:
+      - reset(): start a fresh board with the same size
+      - click(x, y): reveal a cell (places mines on the first click)
+      - flag(x, y): toggle a flag on a covered cell
+      - chord(x, y): reveal the neighbors of a satisfied number
+      - subscribe(listener) / unsubscribe(listener): receive one
+        `changes.ChangeBatch` per action; kept across `reset()`
+
+    State queries: `state`, `is_over`, `mines_left`, `clicks`, `no_guess`,
+    `first_click`, `board`.
+
+    `seed`, when set, seeds a `random.Random` of its own that samples the
+    mines, so the same seed and first click always give the same layout
+    and the global `random` state is left alone. It is kept across
+    `reset()`; callers that want a new layout per game set a new seed for
+    each one.
+    """
+
+    def __init__(self, width: int, height: int, mines: int, layouts=None, seed=None):
+        """Create an engine for a board of the given size.
+
+        `layouts` is an optional source of pre-generated layouts such as
+        `noguess.LayoutCache`: on the first click the engine asks it for a
+        layout that fits the click and falls back to random placement when
+        it has none. `seed` is the initial `seed`.
+        """
+        self.width = width
+        self.height = height
+        self.mines = mines
+        self.layouts = layouts
+        self.board = None
+        self._listeners = []
+        self.state = READY
+        self.clicks = 0
+        self.no_guess = False
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        """Start a fresh board of the same size and mine count.
+
+        The board is cleared and reused when it supports that (see
+        `Board.clear`). Listeners stay subscribed (or move to the new board)
+        and get a batch with `reset` set.
+        """
+        old = self.board
+        self.board = self._new_board()
+        self.state = READY
+        # number of actions that changed the board (clicks, chords, flags)
+        self.clicks = 0
+        # True once the board came from `layouts` (solvable without guessing)
+        self.no_guess = False
+        # flat index of the click that placed the mines
+        self.first_click = None
+        if self.board is not old:
+            for listener in self._listeners:
+                self.board.subscribe(listener)
+            self.board.notify_reset()
+
+    def subscribe(self, listener):
+        """Call `listener(batch)` with the `changes.ChangeBatch` of every action; return `listener`."""
+        self._listeners.append(listener)
+        return self.board.subscribe(listener)
+
+    def unsubscribe(self, listener):
+        """Stop calling `listener`."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+        self.board.unsubscribe(listener)
+
+    def _new_board(self):
+        """Return an empty board for `reset`: the current one cleared if it is reusable, else a new one.
+
+        A board that is replaced is closed if it has a `close()` (a
+        `savegame.MappedBoard` releases its memory map of the save file).
+        """
+        board = self.board
+        if getattr(board, 'reusable', False):
+            board.clear()
+            return board
+        if hasattr(board, 'close'):
+            board.close()
+        return make_board(self.width, self.height, self.mines)
+
+    @property
+    def is_over(self) -> bool:
+        """Return True once the game has been won or lost."""
+        return self.state in (WON, LOST)
+
+    @property
+    def mines_left(self) -> int:
+        """Return the header mine counter: mines minus flags, never below 0."""
+        return max(0, self.mines - self.board.flagged_count)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        """Return True if (x,y) is a cell on the board."""
+        return self.board.in_bounds(x, y)
+
+    @batched
+    def click(self, x: int, y: int) -> array:
+        """Reveal the cell at (x,y) and apply the win/loss rules.
+
+        The first click places the mines with (x,y) inside the safe zone.
+        Clicks after the game is over, outside the board, or on revealed or
+        flagged cells change nothing.
+        """
+        if self.is_over or not self.in_bounds(x, y):
+            return self._no_change()
+        if self.state == READY:
+            self._place_mines(x, y)
+            self.state = PLAYING
+        changed = self.board.reveal(x, y)
+        return self._after_reveal(changed)
+
+    def _place_mines(self, x: int, y: int):
+        """Install a pre-generated layout for a first click at (x,y), else sample one."""
+        layout = None
+        if self.layouts is not None:
+            layout = self.layouts.take(self.width, self.height, self.mines, x, y)
+        self.first_click = y * self.width + x
+        if layout is None:
+            self.board.place_mines(x, y, None if self.seed is None else random.Random(self.seed))
+        else:
+            self.board.set_mines(layout)
+            self.no_guess = True
+
+    @batched
+    def flag(self, x: int, y: int) -> array:
+        """Toggle the flag on the covered cell at (x,y)."""
+        if self.is_over or not self.in_bounds(x, y):
+            return array('q')
+        if not self.board.toggle_flag(x, y):
+            return array('q')
+        self.clicks += 1
+        return array('q', (y * self.width + x,))
+
+    @batched
+    def chord(self, x: int, y: int) -> array:
+        """Reveal all unflagged neighbors of a revealed number whose flags are all placed.
+
+        Does nothing unless (x,y) is revealed and the number of flagged
+        neighbors equals its adjacent-mine count. A wrong flag makes the
+        chord hit a mine and lose the game, as in classic Minesweeper.
+        """
+        if self.state != PLAYING or not self.in_bounds(x, y):
+            return self._no_change()
+        board = self.board
+        cell = board.cell(x, y)
+        if not cell.revealed or cell.adjacent == 0:
+            return self._no_change()
+        neighbors = list(board.neighbors(x, y))
+        if sum(1 for n in neighbors if n.flagged) != cell.adjacent:
+            return self._no_change()
+        changed = self._no_change()
+        for n in neighbors:
+            if not n.revealed and not n.flagged:
+                changed.extend(board.reveal(n.x, n.y))
+        if not changed:
+            return changed
+        return self._after_reveal(changed)
+
+    def _no_change(self) -> array:
+        """Return an empty change list of the type this engine reports."""
+        return array('q')
+
+    def _after_reveal(self, changed: array) -> array:
+        """Apply the loss and win rules after a reveal that changed `changed`."""
+        if not changed:
+            return changed
+        self.clicks += 1
+        board = self.board
+        if board.check_loss():
+            board.reveal_all_mines()
+            changed.extend(int(i) for i in board.mine_indices)
+            self.state = LOST
+        elif board.check_win():
+            # auto-flag remaining mines for clarity
+            board.flag_all_mines()
+            changed.extend(int(i) for i in board.mine_indices)
+            self.state = WON
+        return changed
@@ -0,0 +1,267 @@
+"""Undo/redo for a game, kept as compact per-action deltas.
+
+`History` listens to an engine's change stream (see `changes`), where
+every action arrives as one `ChangeBatch`. Each batch is stored as a
+`Delta`: the flat indices the action revealed (the whole flood fill,
+and the mines shown on a loss), flagged and unflagged as `array('q')`,
+the exploded mines, the mine layout if the action placed it (the first
+click), and the engine state and click count before and after. Undo
+applies a delta backwards, redo forwards, through the board's
+`reveal_cells`/`cover_cells`/`set_flags`/`remove_mines`. Both therefore
+cost O(cells the action changed) however large the board is, and no
+cell is ever copied.
+
+Every `HISTORY_CHECKPOINT_INTERVAL` actions a checkpoint stores the
+zlib-compressed `Board.player_state()`. `seek(n)` restores the checkpoint
+nearest to `n` when that is closer than the current position, so a long
+jump applies at most that many deltas. Deltas and checkpoints count
+against `HISTORY_MAX_BYTES`; past it the oldest are dropped first and
+undo stops there. Actions after an undo drop the redo steps, and a new or
+reloaded board (a batch with `reset`) clears the history.
+"""
+
+import sys
+import zlib
+from array import array
+from collections import deque
+
+from config import HISTORY_CHECKPOINT_INTERVAL, HISTORY_MAX_BYTES
+
+_EMPTY = array('q')
+# History._layout before it was read from the board
+_UNKNOWN = object()
+# rough cost of a Delta object and its references, on top of its arrays
+_DELTA_OVERHEAD = 160
+
+
+def _indices(cells) -> array:
+    """Return `cells` as an `array('q')`, sharing one empty array for no cells."""
+    # len(), not truth: NumPy arrays have no truth value
+    if len(cells) == 0:
+        return _EMPTY
+    return cells if isinstance(cells, array) else array('q', map(int, cells))
+
+
+class Delta:
+    """What one action changed; see the module docstring."""
+
+    __slots__ = ('revealed', 'flagged', 'unflagged', 'exploded', 'layout', 'before', 'after', 'size')
+
+    def __init__(self, batch, layout, before, after):
+        self.revealed = _indices(batch.revealed)
+        self.flagged = _indices(batch.flagged)
+        self.unflagged = _indices(batch.unflagged)
+        self.exploded = _indices(batch.exploded)
+        self.layout = layout
+        # (engine state, engine clicks) before and after the action
+        self.before = before
+        self.after = after
+        self.size = _DELTA_OVERHEAD + sum(sys.getsizeof(a) for a in (self.revealed, self.flagged, self.unflagged,
+                                                                     self.exploded) if a is not _EMPTY)
+        if layout is not None:
+            self.size += sys.getsizeof(layout)
+
+    def undo(self, board):
+        if self.flagged:
+            board.set_flags(self.flagged, False)
+        if self.unflagged:
+            board.set_flags(self.unflagged, True)
+        if self.revealed:
+            board.cover_cells(self.revealed)
+        if self.layout is not None:
+            board.remove_mines()
+
+    def redo(self, board):
+        if self.layout is not None:
+            board.set_mines(self.layout)
+        if self.revealed:
+            board.reveal_cells(self.revealed, self.exploded)
+        if self.unflagged:
+            board.set_flags(self.unflagged, False)
+        if self.flagged:
+            board.set_flags(self.flagged, True)
+
+
+class Checkpoint:
+    """A compressed snapshot of the board and engine at one history position."""
+
+    __slots__ = ('state', 'layout', 'engine_state', 'size')
+
+    def __init__(self, board, layout, engine_state):
+        self.state = zlib.compress(board.player_state(), 1)
+        self.layout = layout
+        self.engine_state = engine_state
+        self.size = sys.getsizeof(self.state) + _DELTA_OVERHEAD
+
+
+class History:
+    """Undo/redo of the actions applied to a `GameEngine` (with a `Board` or `PackedBoard`).
+
+    Positions count actions since the start of the game; `position` is
+    the current one and undo is possible back to `start` (later if old
+    deltas were dropped for memory).
+
+    Public methods:
+      - undo() / redo(): step one action back / forward; False if not possible
+      - seek(n): go to position `n`
+      - clear(): forget everything before the current position
+      - close(): stop listening to the engine
+    """
+
+    def __init__(self, engine, max_bytes: int = HISTORY_MAX_BYTES,
+                 checkpoint_interval: int = HISTORY_CHECKPOINT_INTERVAL):
+        """Record the actions of `engine` from now on; `checkpoint_interval` 0 disables checkpoints."""
+        self.engine = engine
+        self.max_bytes = max_bytes
+        self.checkpoint_interval = checkpoint_interval
+        self._deltas = deque()
+        # position -> Checkpoint
+        self._checkpoints = {}
+        self._applying = False
+        self.clear()
+        engine.subscribe(self._on_changes)
+
+    def clear(self):
+        """Forget all deltas and checkpoints; the current board becomes position 0."""
+        self._deltas.clear()
+        self._checkpoints.clear()
+        self.start = self.position = 0
+        self.bytes = 0
+        # layout at the current position (kept by checkpoints); read from the board
+        # only when first needed, since that decodes a whole `MappedBoard`
+        self._layout = _UNKNOWN
+        self._engine_state = (self.engine.state, self.engine.clicks)
+
+    def close(self):
+        """Stop recording."""
+        self.engine.unsubscribe(self._on_changes)
+
+    @property
+    def end(self) -> int:
+        """Position after the last recorded action (redo is possible up to here)."""
+        return self.start + len(self._deltas)
+
+    @property
+    def can_undo(self) -> bool:
+        return self.position > self.start
+
+    @property
+    def can_redo(self) -> bool:
+        return self.position < self.end
+
+    def undo(self) -> bool:
+        """Take back the last action; return False if there is none."""
+        if not self.can_undo:
+            return False
+        delta = self._deltas[self.position - self.start - 1]
+        self._apply(delta.undo)
+        if delta.layout is not None:
+            self._layout = None
+        self.position -= 1
+        self._set_engine(delta.before)
+        return True
+
+    def redo(self) -> bool:
+        """Apply the next undone action again; return False if there is none."""
+        if not self.can_redo:
+            return False
+        delta = self._deltas[self.position - self.start]
+        self._apply(delta.redo)
+        if delta.layout is not None:
+            self._layout = delta.layout
+        self.position += 1
+        self._set_engine(delta.after)
+        return True
+
+    def seek(self, n: int):
+        """Go to position `n`, through the nearest checkpoint when that is closer.
+
+        Raises `IndexError` unless ``start <= n <= end``.
+        """
+        if not self.start <= n <= self.end:
+            raise IndexError(f"position {n} outside the history ({self.start}-{self.end})")
+        if self._checkpoints:
+            nearest = min(self._checkpoints, key=lambda c: abs(n - c))
+            if abs(n - nearest) < abs(n - self.position):
+                self._restore(nearest)
+        while self.position < n:
+            self.redo()
+        while self.position > n:
+            self.undo()
+
+    def _apply(self, step):
+        """Run `step(board)` as one change batch, without recording it."""
+        board = self.engine.board
+        self._applying = True
+        try:
+            with board.batch():
+                step(board)
+        finally:
+            self._applying = False
+
+    def _set_engine(self, engine_state):
+        self.engine.state, self.engine.clicks = engine_state
+        self._engine_state = engine_state
+
+    def _restore(self, position: int):
+        """Load the checkpoint at `position`."""
+        checkpoint = self._checkpoints[position]
+
+        def load(board):
+            if checkpoint.layout is None:
+                if board.mines_placed:
+                    board.remove_mines()
+            elif not board.mines_placed:
+                board.set_mines(checkpoint.layout)
+            board.load_player_state(zlib.decompress(checkpoint.state))
+
+        self._apply(load)
+        self._layout = checkpoint.layout
+        self.position = position
+        self._set_engine(checkpoint.engine_state)
+
+    def _on_changes(self, batch):
+        """Record one action of the engine (listener of its change stream)."""
+        if self._applying:
+            return
+        if batch.reset:
+            self.clear()
+            return
+        engine = self.engine
+        if self.position < self.end:
+            # a new action after undo: the undone actions cannot be redone any more
+            while len(self._deltas) > self.position - self.start:
+                self.bytes -= self._deltas.pop().size
+            self._drop_checkpoints(lambda c: c > self.position)
+        layout = None
+        if batch.mines_placed:
+            layout = self._layout = _indices(engine.board.mine_indices)
+        after = (engine.state, engine.clicks)
+        delta = Delta(batch, layout, self._engine_state, after)
+        self._deltas.append(delta)
+        self.bytes += delta.size
+        self.position += 1
+        self._engine_state = after
+        if self.checkpoint_interval and self.position % self.checkpoint_interval == 0:
+            checkpoint = Checkpoint(engine.board, self._current_layout(), after)
+            self._checkpoints[self.position] = checkpoint
+            self.bytes += checkpoint.size
+        self._evict()
+
+    def _current_layout(self):
+        """Return the mine layout at the current position (None before the first click)."""
+        if self._layout is _UNKNOWN:
+            board = self.engine.board
+            self._layout = _indices(board.mine_indices) if board.mines_placed else None
+        return self._layout
+
+    def _evict(self):
+        """Drop the oldest deltas (and their checkpoints) while over `max_bytes`."""
+        while self.bytes > self.max_bytes and self.position > self.start:
+            self.bytes -= self._deltas.popleft().size
+            self.start += 1
+            self._drop_checkpoints(lambda c: c < self.start)
+
+    def _drop_checkpoints(self, condition):
+        for position in [c for c in self._checkpoints if condition(c)]:
+            self.bytes -= self._checkpoints.pop(position).size
@@ -0,0 +1,389 @@
+"""Lazily generated, chunked infinite board.
+
+`InfiniteBoard` has no edges: coordinates are unbounded (and may be
+negative). The world is split into ``CHUNK x CHUNK`` chunks addressed by
+``(x // CHUNK, y // CHUNK)``. A chunk's mines come from a `random.Random`
+seeded with (board seed, chunk coordinates): every cell is a mine with
+probability `density` (in steps of 1/256), so any chunk can be rebuilt
+from scratch at any time. Adjacent counts along a chunk's border are
+computed from the edges of its eight neighbors' mine masks when the chunk
+is built.
+
+Only player state (revealed, flagged, exploded) has to be kept. Chunks
+live in three tiers:
+
+- live:  decoded `bytearray`s in the `packed_board` bit layout, at most
+  `live_chunks` of them (least recently used first out)
+- cold:  player-state bytes compressed with zlib, at most `cold_chunks`
+- disk:  older cold chunks, one file each in `spill_dir`
+
+Chunks without any player state are simply dropped. Memory therefore
+stays bounded however far the player scrolls; only the spill directory
+grows with the explored area.
+
+`InfiniteEngine` applies the `GameEngine` rules to an infinite board.
+Since there are no flat indices, its actions report changed cells as
+``(x, y)`` tuples. There is no win: the game runs until a mine is hit.
+The mode is engine-only for now: the pygame front end (`main.Game`) and
+its viewport assume a finite board, so infinite games are played
+headlessly (see `benchmarks.infinite_board`).
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from changes import ChangeStream, batched
+from config import (INFINITE_CHUNK_SIZE, INFINITE_COLD_CHUNKS, INFINITE_LIVE_CHUNKS,
+                    INFINITE_MINE_DENSITY)
+from engine import LOST, GameEngine
+from mines import adjacency_counts
+from packed_board import ADJ_SHIFT, EXPLODED, FLAGGED, MINE, REVEALED, CellView
+
+# Below this density so many cells are zeros that an opening can be
+# unbounded (zeros need all 9 cells mine-free; site percolation on the
+# 8-neighbor lattice starts near 0.41, and 0.88**9 ~ 0.32)
+MIN_DENSITY = 0.12
+
+# Translation tables over the packed cell bytes
+_STATE_ONLY = bytes(b & (REVEALED | FLAGGED | EXPLODED) for b in range(256))
+_TO_ADJ_NIBBLE = bytes((b << ADJ_SHIFT) & 0xFF for b in range(256))
+
+Coord = Tuple[int, int]
+
+
+class InfiniteBoard(ChangeStream):
+    """Board without edges whose chunks are generated on first access.
+
+    The interface follows `board.Board` where it makes sense (`cell`,
+    `neighbors`, `reveal`, `toggle_flag`, `place_mines`, the counters and
+    the win/loss checks). `reveal` returns ``(x, y)`` tuples instead of
+    flat indices. `cell` and `neighbors` return short-lived `CellView`s
+    onto live chunks; don't keep them across other board calls. Change
+    batches (`changes.ChangeBatch`) list ``(x, y)`` tuples as well.
+    """
+
+    _new_keys = list
+
+    def __init__(self, density: float = INFINITE_MINE_DENSITY, seed: Optional[int] = None,
+                 chunk_size: int = INFINITE_CHUNK_SIZE, live_chunks: int = INFINITE_LIVE_CHUNKS,
+                 cold_chunks: int = INFINITE_COLD_CHUNKS, spill_dir: Optional[str] = None):
+        if not MIN_DENSITY <= density < 1:
+            raise ValueError(f"density must be in [{MIN_DENSITY}, 1), got {density}")
+        self.density = density
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.chunk_size = chunk_size
+        self.live_chunks = live_chunks
+        self.cold_chunks = cold_chunks
+        self.spill_dir = spill_dir
+        self._own_spill_dir = spill_dir is None
+        # a cell is a mine when its random byte is below this threshold
+        self._threshold = bytes(1 if v < round(density * 256) else 0 for v in range(256))
+        # chunk key -> decoded cells (live) / compressed player state (cold)
+        self._live: 'OrderedDict[Coord, bytearray]' = OrderedDict()
+        self._cold: 'OrderedDict[Coord, bytes]' = OrderedDict()
+        # recently generated mine masks; cheap to rebuild, so bounded tightly
+        self._masks: 'OrderedDict[Coord, bytes]' = OrderedDict()
+        # last chunk looked up, to skip the dict for runs inside one chunk
+        self._last_key: Optional[Coord] = None
+        self._last_cells: Optional[bytearray] = None
+        # first-click safe zone: cells forced mine-free
+        self._safe: Set[Coord] = set()
+        self.mines_placed = False
+        self.revealed_count = 0
+        self._flag_count = 0
+        self.exploded: Optional[Coord] = None
+
+    # -- chunk generation ---------------------------------------------------
+
+    def _mask(self, key: Coord) -> bytes:
+        """Return the 0/1 mine byte per cell of chunk `key`."""
+        mask = self._masks.get(key)
+        if mask is not None:
+            self._masks.move_to_end(key)
+            return mask
+        s = self.chunk_size
+        rng = random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+        buf = bytearray(rng.getrandbits(8 * s * s).to_bytes(s * s, 'little').translate(self._threshold))
+        ox, oy = key[0] * s, key[1] * s
+        for x, y in self._safe:
+            if ox <= x < ox + s and oy <= y < oy + s:
+                buf[(y - oy) * s + x - ox] = 0
+        mask = bytes(buf)
+        self._masks[key] = mask
+        # a chunk build needs its 3x3 neighborhood
+        if len(self._masks) > 18:
+            self._masks.popitem(last=False)
+        return mask
+
+    def _build(self, key: Coord) -> bytearray:
+        """Return the mine bits and adjacent counts of chunk `key`, without player state."""
+        s = self.chunk_size
+        p = s + 2
+        cx, cy = key
+        # this chunk's mask framed by the nearest row/column of its eight neighbors
+        padded = bytearray(p * p)
+        spans = {-1: (s - 1, s, 0), 0: (0, s, 1), 1: (0, 1, s + 1)}
+        for dy in (-1, 0, 1):
+            y0, y1, py = spans[dy]
+            for dx in (-1, 0, 1):
+                x0, x1, px = spans[dx]
+                mask = self._mask((cx + dx, cy + dy))
+                for row in range(y0, y1):
+                    at = (py + row - y0) * p + px
+                    padded[at:at + x1 - x0] = mask[row * s + x0:row * s + x1]
+        counts = adjacency_counts(p, p, padded)
+        inner = b''.join(counts[(r + 1) * p + 1:(r + 1) * p + 1 + s] for r in range(s))
+        mask = self._mask(key)
+        merged = int.from_bytes(mask, 'little') | int.from_bytes(inner.translate(_TO_ADJ_NIBBLE), 'little')
+        return bytearray(merged.to_bytes(s * s, 'little'))
+
+    # -- chunk tiers --------------------------------------------------------
+
+    def _chunk(self, key: Coord) -> bytearray:
+        """Return the live cells of chunk `key`, loading or building it as needed."""
+        if key == self._last_key:
+            return self._last_cells
+        cells = self._live.get(key)
+        if cells is not None:
+            self._live.move_to_end(key)
+        else:
+            cells = self._build(key)
+            state = self._cold.pop(key, None)
+            if state is None:
+                state = self._read_spilled(key)
+            if state is not None:
+                state = zlib.decompress(state)
+                merged = int.from_bytes(cells, 'little') | int.from_bytes(state, 'little')
+                cells[:] = merged.to_bytes(len(cells), 'little')
+            self._live[key] = cells
+        self._last_key = key
+        self._last_cells = cells
+        return cells
+
+    def _trim(self):
+        """Move least recently used chunks down a tier until every tier is within its limit.
+
+        Only called between public operations, so no caller still holds
+        the `bytearray` of an evicted chunk.
+        """
+        self._last_key = self._last_cells = None
+        while len(self._live) > self.live_chunks:
+            key, cells = self._live.popitem(last=False)
+            state = cells.translate(_STATE_ONLY)
+            if state.count(0) != len(state):
+                self._cold[key] = zlib.compress(state)
+        while len(self._cold) > self.cold_chunks:
+            key, state = self._cold.popitem(last=False)
+            self._spill(key, state)
+
+    def _spill_path(self, key: Coord) -> str:
+        return os.path.join(self.spill_dir, f"{key[0]}_{key[1]}.z")
+
+    def _spill(self, key: Coord, state: bytes):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='mswp-chunks-')
+        with open(self._spill_path(key), 'wb') as f:
+            f.write(state)
+
+    def _read_spilled(self, key: Coord) -> Optional[bytes]:
+        if self.spill_dir is None:
+            return None
+        path = self._spill_path(key)
+        try:
+            with open(path, 'rb') as f:
+                state = f.read()
+        except FileNotFoundError:
+            return None
+        os.remove(path)
+        return state
+
+    def close(self):
+        """Delete the spill directory if this board created it."""
+        if self._own_spill_dir and self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+
+    @property
+    def chunk_counts(self) -> Dict[str, int]:
+        """Return how many chunks each in-memory tier holds."""
+        return {'live': len(self._live), 'cold': len(self._cold)}
+
+    # -- Board interface ----------------------------------------------------
+
+    def _locate(self, x: int, y: int) -> Tuple[bytearray, int]:
+        s = self.chunk_size
+        return self._chunk((x // s, y // s)), (y % s) * s + x % s
+
+    def in_bounds(self, x, y):
+        """Every coordinate is on an infinite board."""
+        return True
+
+    def cell(self, x: int, y: int) -> CellView:
+        """Return a view of the cell at (x,y)."""
+        cells, i = self._locate(x, y)
+        # trim after the lookup so the chunk behind the view stays live
+        self._trim()
+        return CellView(cells, i, x, y)
+
+    def neighbors(self, x, y) -> Iterator[CellView]:
+        """Yield views of the 8 neighbors of (x,y)."""
+        self._trim()
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if dx or dy:
+                    cells, i = self._locate(x + dx, y + dy)
+                    yield CellView(cells, i, x + dx, y + dy)
+
+    def place_mines(self, safe_x: int, safe_y: int, rng: Optional[random.Random] = None):
+        """Keep the 3x3 area around the first click mine-free.
+
+        Mines are otherwise fixed by the board's seed (`rng` is not used),
+        so this only records the safe zone and rebuilds the chunks already in memory (keeping flags
+        set before the first click). Idempotent like `Board.place_mines`.
+        """
+        if self.mines_placed:
+            return
+        self._safe = {(safe_x + dx, safe_y + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)}
+        self._masks.clear()
+        for key, cells in self._live.items():
+            state = cells.translate(_STATE_ONLY)
+            merged = int.from_bytes(self._build(key), 'little') | int.from_bytes(state, 'little')
+            cells[:] = merged.to_bytes(len(cells), 'little')
+        self.mines_placed = True
+        self._record(mines_placed=True)
+
+    def toggle_flag(self, x: int, y: int) -> bool:
+        """Toggle the flag on the cell at (x,y); return True if the flag state changed."""
+        cells, i = self._locate(x, y)
+        b = cells[i]
+        if b & REVEALED:
+            changed = False
+        else:
+            cells[i] = b ^ FLAGGED
+            self._flag_count += -1 if b & FLAGGED else 1
+            changed = True
+            if self._listeners:
+                self._record(**{'unflagged' if b & FLAGGED else 'flagged': ((x, y),)})
+        self._trim()
+        return changed
+
+    @property
+    def flagged_count(self) -> int:
+        """Return the number of flags currently set on the board."""
+        return self._flag_count
+
+    def check_win(self) -> bool:
+        """An infinite board can never be cleared."""
+        return False
+
+    def check_loss(self) -> bool:
+        """Return True once a mine has been revealed."""
+        return self.exploded is not None
+
+    def reveal(self, x: int, y: int) -> List[Coord]:
+        """Reveal the cell at (x,y), flood-filling across empty cells and chunk borders.
+
+        Same rules as `Board.reveal`, but the result lists ``(x, y)``
+        tuples. Openings are finite since the density is at least
+        `MIN_DENSITY`.
+        """
+        revealed: List[Coord] = []
+        cells, i = self._locate(x, y)
+        b = cells[i]
+        if b & (REVEALED | FLAGGED):
+            return revealed
+        cells[i] = b | REVEALED
+        revealed.append((x, y))
+        exploded = b & MINE
+        if exploded:
+            cells[i] |= EXPLODED
+            self.exploded = (x, y)
+        elif b >> ADJ_SHIFT:
+            self.revealed_count += 1
+        else:
+            locate = self._locate
+            closed = REVEALED | FLAGGED
+            queue = deque(((x, y),))
+            while queue:
+                qx, qy = queue.popleft()
+                for ny in (qy - 1, qy, qy + 1):
+                    for nx in (qx - 1, qx, qx + 1):
+                        cells, i = locate(nx, ny)
+                        b = cells[i]
+                        if b & closed:
+                            continue
+                        cells[i] = b | REVEALED
+                        revealed.append((nx, ny))
+                        if not b >> ADJ_SHIFT:
+                            queue.append((nx, ny))
+            self.revealed_count += len(revealed)
+        self._trim()
+        if self._listeners:
+            self._record(revealed=revealed, exploded=revealed if exploded else ())
+        return revealed
+
+    def reveal_all_mines(self) -> List[Coord]:
+        """Reveal the mines of every live chunk (used when the player loses).
+
+        Returns their ``(x, y)`` coordinates. Mines in chunks that are not
+        in memory stay hidden; the player cannot see them anyway.
+        """
+        s = self.chunk_size
+        shown = []
+        for (cx, cy), cells in self._live.items():
+            for i, b in enumerate(cells):
+                if b & MINE and not b & REVEALED:
+                    cells[i] = b | REVEALED
+                    y, x = divmod(i, s)
+                    shown.append((cx * s + x, cy * s + y))
+        self._record(revealed=shown)
+        return shown
+
+
+class InfiniteEngine(GameEngine):
+    """`GameEngine` rules on an `InfiniteBoard`.
+
+    Actions return lists of ``(x, y)`` tuples instead of flat indices.
+    `mines_left` counts the flags placed, since there is no mine total.
+    """
+
+    def __init__(self, density: float = INFINITE_MINE_DENSITY, seed: Optional[int] = None, **board_options):
+        self.density = density
+        self.board_options = board_options
+        super().__init__(0, 0, 0, seed=seed)
+
+    def _new_board(self) -> InfiniteBoard:
+        if self.board is not None:
+            self.board.close()
+        return InfiniteBoard(self.density, self.seed, **self.board_options)
+
+    @property
+    def mines_left(self) -> int:
+        """Return the number of flags placed (an infinite board has no mine total)."""
+        return self.board.flagged_count
+
+    @batched
+    def flag(self, x: int, y: int) -> List[Coord]:
+        """Toggle the flag on the covered cell at (x,y)."""
+        if self.is_over or not self.board.toggle_flag(x, y):
+            return []
+        self.clicks += 1
+        return [(x, y)]
+
+    def _no_change(self) -> List[Coord]:
+        return []
+
+    def _after_reveal(self, changed: List[Coord]) -> List[Coord]:
+        """Apply the loss rule after a reveal that changed `changed`."""
+        if not changed:
+            return changed
+        self.clicks += 1
+        if self.board.check_loss():
+            changed.extend(self.board.reveal_all_mines())
+            self.state = LOST
+        return changed
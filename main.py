@@ -7,20 +7,91 @@ is a small wrapper around `Game.run()` for script entry.
 """
 
 import pygame
+import multiprocessing
 import os
-import sys
-from config import CELL_SIZE, HEADER_HEIGHT, FPS
-from config import DIFFICULTIES
-from board import Board
+import secrets
+from config import CELL_SIZE, HEADER_HEIGHT, FPS, LOOP_MODE, MARGIN
+from config import DIFFICULTIES, NO_GUESS, MAX_WINDOW_SIZE, MINIMAP_MAX_SIZE, SCROLL_STEP, RECORD_REPLAYS
+from config import AUTOSAVE, AUTOSAVE_INTERVAL, AUTOSAVE_PATH, PROFILE, PROFILE_DIR, HISTORY_CHECKPOINT_INTERVAL
+from config import STATS, STATS_PATH
+from engine import GameEngine, LOST, READY, WON
+from history import History
+from noguess import LayoutCache
+from replay import ReplayWriter
+from savegame import MappedBoard, SaveFile, load_game, resumable
+from stats import GameRecord, StatsStore
+from atlas import get_atlas, get_font, tile_for
+from assets import background, get_resource_path  # noqa: F401 (get_resource_path re-exported)
+from viewport import Camera, Minimap
+from profiler import FrameProfiler, PerfOverlay
+
+# Window events after which the whole window must be repainted
+REPAINT_EVENTS = tuple(
+    getattr(pygame, name) for name in ('VIDEOEXPOSE', 'WINDOWEXPOSED', 'WINDOWRESTORED', 'WINDOWSHOWN')
+    if hasattr(pygame, name)
+)
+
+# Keyboard scrolling (direction per key) and zooming (zoom steps per key)
+PAN_KEYS = {
+    pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0), pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1),
+    pygame.K_a: (-1, 0), pygame.K_d: (1, 0), pygame.K_w: (0, -1), pygame.K_s: (0, 1),
+}
+ZOOM_KEYS = {
+    pygame.K_PLUS: 1, pygame.K_EQUALS: 1, pygame.K_KP_PLUS: 1,
+    pygame.K_MINUS: -1, pygame.K_KP_MINUS: -1,
+}
+
+
+def init_pygame():
+    """Initialize the pygame modules the game uses: display (with events and timers) and fonts.
+
+    `pygame.init()` would also open the audio device and joysticks, which
+    can take longer than everything else at startup; the game has no sound.
+    Already initialized modules are left as they are.
+    """
+    pygame.display.init()
+    pygame.font.init()
 
 
-def get_resource_path(relative_path):
-    """Get path to resource, handling both development and PyInstaller bundled environments."""
-    try:
-        base_path = sys._MEIPASS
-    except AttributeError:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+def wait_events(timeout=0):
+    """Sleep until an event arrives or `timeout` ms pass, then return all pending events.
+
+    A `timeout` of 0 waits indefinitely. Returns an empty list on timeout.
+    """
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+class Session:
+    """The pygame modules and the single window shared by the menu and the games.
+
+    Scenes (`DifficultyMenu`, `Game`) get the display surface from
+    `window(size, caption)`; a scene of another size resizes the existing
+    window in place instead of opening a new one. Fonts, tile atlases and
+    cached assets stay loaded until `close()` quits pygame.
+
+    Public methods:
+      - window(size, caption): return the display surface at `size`
+      - close(): quit pygame
+    """
+
+    def __init__(self):
+        init_pygame()
+
+    def window(self, size, caption):
+        """Return the display surface, resized to `size` if needed, with the title `caption`."""
+        size = (int(size[0]), int(size[1]))
+        screen = pygame.display.get_surface()
+        if screen is None or screen.get_size() != size:
+            screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        return screen
+
+    def close(self):
+        """Quit pygame; this drops every cached font and surface."""
+        pygame.quit()
 
 
 class DifficultyMenu:
@@ -30,25 +101,21 @@ class DifficultyMenu:
       - run(): display the menu and return selected difficulty
     """
     
-    def __init__(self):
-        pygame.init()
+    def __init__(self, session=None):
+        """Create the menu in the window of `session`, or in a session of its own."""
+        self._owns_session = session is None
+        self.session = Session() if session is None else session
         # menu window size
         self.width = 400
         self.height = 400
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption('Duly\'s Minesweeper - Select Difficulty')
+        self.screen = self.session.window((self.width, self.height), 'Duly\'s Minesweeper - Select Difficulty')
         self.clock = pygame.time.Clock()
+        self.loop_mode = LOOP_MODE
         self.running = True
         self.selected_difficulty = None
         
-        # load background image
-        self.background = None
-        try:
-            bg_path = get_resource_path('images/background.png')
-            self.background = pygame.image.load(bg_path)
-            self.background = pygame.transform.scale(self.background, (self.width, self.height))
-        except Exception as e:
-            print(f"Warning: Could not load background image from {bg_path}: {e}")
+        # background image, pre-scaled and display-converted (see `assets`)
+        self.background = background((self.width, self.height))
         
         # button rectangles
         button_width = 150
@@ -59,10 +126,23 @@ class DifficultyMenu:
         self.beginner_btn = pygame.Rect(self.width//2 - button_width//2, button_y_start, button_width, button_height)
         self.intermediate_btn = pygame.Rect(self.width//2 - button_width//2, button_y_start + button_spacing, button_width, button_height)
         self.expert_btn = pygame.Rect(self.width//2 - button_width//2, button_y_start + button_spacing*2, button_width, button_height)
+
+        # fonts and static labels are rendered once, not every frame
+        self.title = get_font(32).render("Duly's Minesweeper", True, (0, 0, 0))
+        self.subtitle = get_font(18).render("Schwierigkeitsstufe wählen", True, (50, 50, 50))
+        font_btn = get_font(20)
+        self.buttons = [
+            (self.beginner_btn, font_btn.render('Beginner', True, (255, 255, 255)), (0, 150, 0)),
+            (self.intermediate_btn, font_btn.render('Intermediate', True, (255, 255, 255)), (200, 150, 0)),
+            (self.expert_btn, font_btn.render('Expert', True, (255, 255, 255)), (200, 0, 0))
+        ]
     
-    def handle_events(self):
-        """Handle menu events (mouse clicks, window close)."""
-        for event in pygame.event.get():
+    def handle_events(self, events=None):
+        """Handle menu events (mouse clicks, window close).
+
+        `events` defaults to polling `pygame.event.get()`.
+        """
+        for event in pygame.event.get() if events is None else events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -86,8 +166,7 @@ class DifficultyMenu:
             self.screen.fill((192, 192, 192))
         
         # title with background box
-        font_title = pygame.font.SysFont(None, 32, bold=False)
-        title = font_title.render("Duly's Minesweeper", True, (0, 0, 0))
+        title = self.title
         title_bg = pygame.Surface((title.get_width() + 20, title.get_height() + 10))
         title_bg.fill((255, 255, 255))
         title_bg.set_alpha(200)
@@ -97,8 +176,7 @@ class DifficultyMenu:
         self.screen.blit(title, (title_x + 10, title_y + 5))
         
         # subtitle with background box
-        font_subtitle = pygame.font.SysFont(None, 18)
-        subtitle = font_subtitle.render("Schwierigkeitsstufe wählen", True, (50, 50, 50))
+        subtitle = self.subtitle
         subtitle_bg = pygame.Surface((subtitle.get_width() + 20, subtitle.get_height() + 10))
         subtitle_bg.fill((255, 255, 255))
         subtitle_bg.set_alpha(200)
@@ -107,17 +185,8 @@ class DifficultyMenu:
         self.screen.blit(subtitle_bg, (subtitle_x, subtitle_y))
         self.screen.blit(subtitle, (subtitle_x + 10, subtitle_y + 5))
         
-        # button font
-        font_btn = pygame.font.SysFont(None, 20)
-        
         # draw buttons
-        buttons = [
-            (self.beginner_btn, 'Beginner', (0, 150, 0)),
-            (self.intermediate_btn, 'Intermediate', (200, 150, 0)),
-            (self.expert_btn, 'Expert', (200, 0, 0))
-        ]
-        
-        for btn_rect, label, color in buttons:
+        for btn_rect, text, color in self.buttons:
             # button background
             pygame.draw.rect(self.screen, color, btn_rect)
             # button border (3D effect)
@@ -126,48 +195,97 @@ class DifficultyMenu:
             pygame.draw.line(self.screen, (128, 128, 128), btn_rect.bottomleft, btn_rect.bottomright, 2)
             pygame.draw.line(self.screen, (128, 128, 128), btn_rect.topright, btn_rect.bottomright, 2)
             # button text
-            text = font_btn.render(label, True, (255, 255, 255))
             self.screen.blit(text, (btn_rect.x + btn_rect.width//2 - text.get_width()//2,
                                     btn_rect.y + btn_rect.height//2 - text.get_height()//2))
         
         pygame.display.flip()
     
     def run(self):
-        """Run the menu loop and return selected difficulty."""
+        """Run the menu loop and return selected difficulty, or None if the window was closed.
+
+        In the 'event' `LOOP_MODE` the menu is only redrawn after input.
+        """
+        if self.loop_mode == 'event':
+            pygame.event.set_blocked(pygame.MOUSEMOTION)
         while self.running:
-            self.handle_events()
             self.draw()
             self.clock.tick(FPS)
+            self.handle_events(wait_events() if self.loop_mode == 'event' else None)
         
-        pygame.quit()
-        return self.selected_difficulty if self.selected_difficulty else 'beginner'
+        if self._owns_session:
+            self.session.close()
+        return self.selected_difficulty
 
 
 class Game:
-    """Encapsulates Minesweeper game state and behavior.
+    """Pygame front end for a `GameEngine`: window, input, timer and rendering.
+
+    The game rules live in `engine.GameEngine`; this class maps mouse input
+    to engine actions and draws the engine's board. Boards larger than the
+    window are shown through a `viewport.Camera` (scroll with the wheel,
+    arrow keys or WASD, zoom with Ctrl+wheel or +/-) with a
+    `viewport.Minimap` overview in the corner (M toggles it, click or drag
+    it to jump). F3 turns on the frame profiler and toggles its overlay,
+    F4 exports the profile (see `profiler`). Ctrl+Z takes a move back and
+    Ctrl+Y (or Ctrl+Shift+Z) redoes it (see `history`). Esc ends the game
+    and returns to the menu.
 
     Public methods:
       - reset_game(): reinitialize the board and timer
+      - undo() / redo(): step back / forward one move
+      - save(): write the game to the autosave file
       - handle_events(): poll and handle pygame events
       - draw(): render header and grid
-      - run(): start the main loop
+      - run(): start the main loop; returns 'menu' after Esc
     """
 
-    def __init__(self, difficulty='beginner'):
-        pygame.init()
+    def __init__(self, difficulty='beginner', resume=None, session=None):
+        """Create the game window.
+
+        `difficulty` is a key of `config.DIFFICULTIES` or a custom
+        ``(cols, rows, mines)`` tuple. `resume` is the path of a save file
+        (see `savegame`) to continue instead; its board size wins. The game
+        resizes the window of `session` (see `Session`), or opens a session
+        of its own.
+        """
+        self._owns_session = session is None
+        self.session = Session() if session is None else session
         self.difficulty = difficulty
-        self.cols, self.rows, self.mines = DIFFICULTIES.get(difficulty, DIFFICULTIES['beginner'])
-        self.width = self.cols * CELL_SIZE
-        self.height = HEADER_HEIGHT + self.rows * CELL_SIZE
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption('Minesweeper (minimal)')
+        resumed = load_game(resume) if resume else None
+        if resumed:
+            self.cols, self.rows, self.mines = resumed[0].width, resumed[0].height, resumed[0].mines
+        elif isinstance(difficulty, tuple):
+            self.cols, self.rows, self.mines = difficulty
+        else:
+            self.cols, self.rows, self.mines = DIFFICULTIES.get(difficulty, DIFFICULTIES['beginner'])
+        max_w, max_h = self._max_window_size()
+        self.width = min(self.cols * CELL_SIZE, max_w)
+        self.height = HEADER_HEIGHT + min(self.rows * CELL_SIZE, max_h - HEADER_HEIGHT)
+        self.screen = self.session.window((self.width, self.height), 'Minesweeper (minimal)')
         self.clock = pygame.time.Clock()
-
-        # game state
-        self.board = None
+        self.loop_mode = LOOP_MODE
+        # scene to show after `run` returns (None: quit)
+        self.next_scene = None
+
+        # game state (rules and board live in the headless engine); in
+        # no-guess mode a process pool pre-generates the layouts
+        self.layouts = LayoutCache() if NO_GUESS else None
+        if resumed:
+            self.engine = resumed[0]
+            self.engine.layouts = self.layouts
+        else:
+            self.engine = GameEngine(self.cols, self.rows, self.mines, layouts=self.layouts)
         self.running = True
-        self.game_over = False
-        self.smiley_state = 'normal'  # normal, lost, won
+        # replay of the current game, opened on its first action (see RECORD_REPLAYS);
+        # a replay only holds forward play, so an undo ends it for the rest of the game
+        self.recorder = None
+        self._replay_stopped = False
+        # autosave target, and when the game was last saved (None: nothing unsaved)
+        self.savefile = SaveFile(AUTOSAVE_PATH) if AUTOSAVE else None
+        self._saved_at = None
+        # history of finished games (written on its own thread); a game is added once
+        self.stats = StatsStore(STATS_PATH) if STATS else None
+        self._recorded = False
 
         # timer
         self.timer_start = None
@@ -176,7 +294,54 @@ class Game:
         # smiley rect
         self.smiley_rect = pygame.Rect(self.width//2 - 16, 4, 32, HEADER_HEIGHT-8)
 
-        self.reset_game()
+        # grid area below the header, the camera looking into it and the
+        # minimap overview in its bottom-right corner
+        self.grid_rect = pygame.Rect(0, HEADER_HEIGHT, self.width, self.height - HEADER_HEIGHT)
+        self.camera = Camera(self.cols, self.rows, self.grid_rect.size)
+        self.minimap = Minimap(self.cols, self.rows, (min(MINIMAP_MAX_SIZE[0], self.grid_rect.width // 3),
+                                                      min(MINIMAP_MAX_SIZE[1], self.grid_rect.height // 3)))
+        self.minimap.rect.bottomright = (self.grid_rect.right - MARGIN, self.grid_rect.bottom - MARGIN)
+        self.show_minimap = True
+        self._dragging_minimap = False
+        # held arrow keys keep scrolling
+        pygame.key.set_repeat(250, 30)
+
+        # frame profiler and its overlay in the top-left corner of the grid
+        # (None until PROFILE or F3 switches it on)
+        self.profiler = None
+        self.perf_overlay = None
+        self.show_profile = False
+        if PROFILE:
+            self.toggle_profile()
+
+        # every cell state and smiley face, rendered once per zoom level
+        self.atlas = get_atlas(self.camera.cell_size, self.smiley_rect.size)
+
+        # retained-mode rendering: cells to repaint and the last header values drawn
+        self._dirty_cells = set()
+        self._full_redraw = True
+        self._last_header = (None, None, None)
+
+        # repaint and autosave exactly the cells each engine action changed
+        self.engine.subscribe(self._on_board_changes)
+        # undo/redo; checkpoints of a memory-mapped board would read all of it
+        self.history = History(self.engine, checkpoint_interval=0 if isinstance(self.board, MappedBoard)
+                               else HISTORY_CHECKPOINT_INTERVAL)
+
+        if resumed:
+            self._resume(resumed[1])
+        else:
+            self.reset_game()
+
+    def _resume(self, elapsed):
+        """Continue a loaded game: restart its timer at `elapsed` seconds and show its board."""
+        self.elapsed_seconds = elapsed
+        self.timer_start = pygame.time.get_ticks() - elapsed * 1000 if self.engine.state != READY else None
+        self._recorded = self.game_over
+        if not isinstance(self.board, MappedBoard):
+            # a mapped board would be read in full just for the overview
+            self.minimap.mark(range(self.cols * self.rows))
+        self.invalidate()
 
     def reset_game(self):
         """Reset the game state to a fresh board with the same difficulty.
@@ -184,65 +349,390 @@ class Game:
         This method re-initializes the board, clears the timer and resets
         the UI state so a new game can begin.
         """
-        self.board = Board(self.cols, self.rows, self.mines)
+        self._close_replay()
+        self._replay_stopped = False
+        self._recorded = False
+        self.engine.reset()
+        # a fresh seed per game, so the stats can tell how to get the same layout again
+        self.engine.seed = secrets.randbits(63)
+        self.minimap.reset()
+        if self.savefile is not None:
+            # overwrite the previous game's save on the next autosave
+            self.savefile.reset()
+            self._saved_at = self._saved_at or pygame.time.get_ticks()
+        if self.layouts is not None:
+            # top up the layout cache in the background
+            self.layouts.fill(self.cols, self.rows, self.mines)
         self.running = True
-        self.game_over = False
-        # use simple string states for smiley drawing: 'normal', 'lost', 'won'
-        self.smiley_state = 'normal'
         self.timer_start = None
         self.elapsed_seconds = 0
-
-    def handle_events(self):
-        """Process pending Pygame events (input/action handling)."""
-        for event in pygame.event.get():
+        self.invalidate()
+
+    @property
+    def board(self):
+        """The engine's current board."""
+        return self.engine.board
+
+    @property
+    def game_over(self):
+        """True once the game has been won or lost."""
+        return self.engine.is_over
+
+    @property
+    def smiley_state(self):
+        """Smiley to show for the engine state: 'normal', 'lost' or 'won'."""
+        return {LOST: 'lost', WON: 'won'}.get(self.engine.state, 'normal')
+
+    @staticmethod
+    def _max_window_size():
+        """Return the largest allowed window size: `MAX_WINDOW_SIZE`, shrunk to fit the desktop."""
+        max_w, max_h = MAX_WINDOW_SIZE
+        # the desktop, not `display.Info()`: that reports the open window once there is one
+        desktops = pygame.display.get_desktop_sizes()
+        if desktops and desktops[0][0] > 0 and desktops[0][1] > 0:
+            # leave room for the title bar and task bars
+            max_w = min(max_w, desktops[0][0] - 2 * HEADER_HEIGHT)
+            max_h = min(max_h, desktops[0][1] - 2 * HEADER_HEIGHT)
+        return max_w, max_h
+
+    @property
+    def minimap_visible(self):
+        """True if the minimap is switched on and the board does not fit the window."""
+        return self.show_minimap and self.camera.scrollable
+
+    def handle_events(self, events=None):
+        """Process pending Pygame events (input/action handling).
+
+        `events` defaults to polling `pygame.event.get()`.
+        """
+        for event in pygame.event.get() if events is None else events:
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type in REPAINT_EVENTS:
+                # the window contents may have been lost
+                self.invalidate()
+            elif event.type == pygame.KEYDOWN:
+                self._handle_key(event.key)
+            elif event.type == pygame.MOUSEWHEEL:
+                self._handle_wheel(event)
+            elif event.type == pygame.MOUSEMOTION:
+                if self._dragging_minimap:
+                    self._jump_to(event.pos)
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1 and self._dragging_minimap:
+                    self._dragging_minimap = False
+                    if self.loop_mode == 'event':
+                        pygame.event.set_blocked(pygame.MOUSEMOTION)
             elif event.type == pygame.MOUSEBUTTONDOWN:
+                if self.profiler is not None:
+                    self.profiler.input()
                 mx, my = event.pos
                 # smiley click restarts even if game over
                 if event.button == 1 and self.smiley_rect.collidepoint(mx, my):
                     self.reset_game()
                     return
+                # minimap click jumps there; dragging keeps following the mouse
+                if event.button == 1 and self.minimap_visible and self.minimap.rect.collidepoint(mx, my):
+                    self._dragging_minimap = True
+                    # motion events are blocked in 'event' mode; let them through while dragging
+                    pygame.event.set_allowed(pygame.MOUSEMOTION)
+                    self._jump_to(event.pos)
+                    continue
                 # ignore other clicks when game is over
                 if self.game_over:
                     return
-                # only respond to clicks on the grid area
-                if my >= HEADER_HEIGHT:
-                    gx = mx // CELL_SIZE
-                    gy = (my - HEADER_HEIGHT) // CELL_SIZE
+                # only respond to clicks on a cell of the grid area
+                cell = self.camera.cell_at(mx - self.grid_rect.x, my - self.grid_rect.y)
+                if cell is not None:
+                    gx, gy = cell
                     if event.button == 1:
-                        # left click: possibly place mines and reveal
-                        if not self.board.mines_placed:
-                            self.board.place_mines(gx, gy)
+                        # left click: the first one places mines and starts the timer
+                        first = self.engine.state == READY
+                        self._act('click', gx, gy)
+                        if first and self.engine.state != READY:
                             self.timer_start = pygame.time.get_ticks()
-                        cell = self.board.grid[gy][gx]
-                        self.board.reveal(gx, gy)
-                        if cell.mine:
-                            # loss
-                            cell.exploded = True
-                            self.board.reveal_all_mines()
-                            self.game_over = True
-                            # set state for lost (will affect drawn smiley)
-                            self.smiley_state = 'lost'
-                        else:
-                            # check for win after reveal
-                            if self.board.check_win():
-                                self.game_over = True
-                                # set state for won (will affect drawn smiley)
-                                self.smiley_state = 'won'
-                                # auto-flag remaining mines for clarity
-                                for yy in range(self.board.height):
-                                    for xx in range(self.board.width):
-                                        c = self.board.grid[yy][xx]
-                                        if c.mine:
-                                            c.flagged = True
+                    elif event.button == 2:
+                        # middle click: chord around a satisfied number
+                        self._act('chord', gx, gy)
                     elif event.button == 3:
                         # right click: toggle a flag
-                        cell = self.board.grid[gy][gx]
-                        cell.toggle_flag()
+                        self._act('flag', gx, gy)
+
+    def _act(self, action, gx, gy):
+        """Apply engine `action` ('click', 'chord' or 'flag') at (gx, gy) and record it in the replay.
+
+        Redrawing and autosaving follow from the engine's change stream
+        (see `_on_board_changes`).
+        """
+        prof = self.profiler
+        if prof is not None:
+            prof.lap('events')
+        changed = getattr(self.engine, action)(gx, gy)
+        if prof is not None:
+            prof.lap('logic')
+        if changed and self.game_over and not self._recorded:
+            self._record_result()
+        if changed and RECORD_REPLAYS and not self._replay_stopped:
+            if self.recorder is None:
+                self.recorder = ReplayWriter.create(self.engine)
+            self.recorder.record(action, gx, gy, self.engine)
+
+    def _record_result(self):
+        """Stop the timer at the end of the game and queue the game for the statistics store."""
+        self._recorded = True
+        duration = 0.0
+        if self.timer_start is not None:
+            duration = (pygame.time.get_ticks() - self.timer_start) / 1000
+            self.elapsed_seconds = int(duration)
+        if self.stats is not None:
+            # the 3BV is computed from the layout on the writer thread; a mapped board would be read in full
+            layout = None if isinstance(self.board, MappedBoard) else self.board.mine_indices
+            self.stats.add(GameRecord.for_engine(self.engine, duration), layout)
+
+    def undo(self):
+        """Take back the last move (Ctrl+Z)."""
+        if self.history.undo():
+            self._after_history()
+
+    def redo(self):
+        """Apply the last undone move again (Ctrl+Y)."""
+        if self.history.redo():
+            self._after_history()
+
+    def _after_history(self):
+        """Fix up the replay and timer after undo/redo changed the game; the board repaints itself."""
+        self._close_replay()
+        self._replay_stopped = True
+        if self.engine.state == READY:
+            # back before the first click
+            self.timer_start = None
+            self.elapsed_seconds = 0
+        elif self.timer_start is None:
+            self.timer_start = pygame.time.get_ticks() - self.elapsed_seconds * 1000
+
+    def _on_board_changes(self, batch):
+        """Queue the cells of a `changes.ChangeBatch` for repaint and the next autosave."""
+        if batch.reset:
+            self.invalidate()
+            return
+        if batch.mines_placed and self.savefile is not None:
+            self.savefile.layout_changed()
+        cells = batch.cells()
+        if not cells:
+            return
+        self.mark_dirty(cells)
+        if self.savefile is not None:
+            self.savefile.mark(cells)
+            if self._saved_at is None:
+                self._saved_at = pygame.time.get_ticks()
+
+    def save(self):
+        """Write the game to the autosave file (only the pages changed since the last save)."""
+        if self.savefile is not None:
+            self.savefile.save(self.engine, self.elapsed_seconds)
+            self._saved_at = None
+
+    def _autosave(self):
+        """Save if there are changes older than `AUTOSAVE_INTERVAL` seconds, or the game just ended."""
+        if self._saved_at is None:
+            return
+        if self.game_over or pygame.time.get_ticks() - self._saved_at >= AUTOSAVE_INTERVAL * 1000:
+            self.save()
+
+    def _close_replay(self):
+        """Finish the current game's replay file, if one is being written."""
+        if self.recorder is not None:
+            self.recorder.close(self.engine)
+            self.recorder = None
+
+    def toggle_profile(self):
+        """Show or hide the profiler overlay; the profiler starts on first use and keeps recording."""
+        if self.profiler is None:
+            self.profiler = FrameProfiler()
+            self.perf_overlay = PerfOverlay((self.grid_rect.x + MARGIN, self.grid_rect.y + MARGIN))
+        self.show_profile = not self.show_profile
+        self.invalidate()
+
+    def export_profile(self):
+        """Write the profiler buffer to `PROFILE_DIR`; return the written paths (None if not profiling)."""
+        if self.profiler is None:
+            return None
+        return self.profiler.export(PROFILE_DIR)
+
+    def _handle_key(self, key):
+        """Scroll, zoom, toggle the minimap, control the profiler, undo/redo or leave to the menu from a key press."""
+        ctrl = pygame.key.get_mods() & pygame.KMOD_CTRL
+        if key == pygame.K_ESCAPE:
+            self.next_scene = 'menu'
+            self.running = False
+        elif ctrl and key == pygame.K_z:
+            if pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                self.redo()
+            else:
+                self.undo()
+        elif ctrl and key == pygame.K_y:
+            self.redo()
+        elif key in PAN_KEYS:
+            dx, dy = PAN_KEYS[key]
+            self.pan(dx * SCROLL_STEP, dy * SCROLL_STEP)
+        elif key in ZOOM_KEYS:
+            self.zoom(ZOOM_KEYS[key])
+        elif key == pygame.K_m:
+            self.show_minimap = not self.show_minimap
+            self.invalidate()
+        elif key == pygame.K_F3:
+            self.toggle_profile()
+        elif key == pygame.K_F4:
+            paths = self.export_profile()
+            if paths:
+                # reported on the overlay, which is shown if it was hidden
+                self.perf_overlay.set_note('wrote ' + ', '.join(os.path.basename(path) for path in paths))
+                if not self.show_profile:
+                    self.toggle_profile()
+
+    def _handle_wheel(self, event):
+        """Scroll with the mouse wheel (Shift: sideways); Ctrl+wheel zooms at the mouse."""
+        mods = pygame.key.get_mods()
+        if mods & pygame.KMOD_CTRL:
+            mx, my = pygame.mouse.get_pos()
+            self.zoom(event.y, mx - self.grid_rect.x, my - self.grid_rect.y)
+        elif mods & pygame.KMOD_SHIFT:
+            self.pan(-event.y * SCROLL_STEP, 0)
+        else:
+            self.pan(event.x * SCROLL_STEP, -event.y * SCROLL_STEP)
+
+    def _jump_to(self, pos):
+        """Center the view on the board position under minimap pixel `pos`."""
+        if self.camera.center_on(*self.minimap.cell_at(*pos)):
+            self.invalidate()
+
+    def pan(self, dx, dy):
+        """Scroll the view by (dx, dy) pixels."""
+        if self.camera.pan(dx, dy):
+            self.invalidate()
+
+    def zoom(self, steps, px=None, py=None):
+        """Zoom in (positive `steps`) or out around grid-area pixel (px, py), by default the center."""
+        if self.camera.zoom(steps, px, py):
+            self.atlas = get_atlas(self.camera.cell_size, self.smiley_rect.size)
+            self.invalidate()
+
+    def invalidate(self):
+        """Force the next `draw()` to repaint the whole window.
+
+        Used after a reset, when the view scrolled or zoomed and when the
+        window contents may have been lost (expose/restore events).
+        """
+        self._full_redraw = True
+        self._dirty_cells.clear()
+
+    def mark_dirty(self, indices):
+        """Queue flat cell indices (``y * cols + x``) for repaint on the next frame."""
+        self.minimap.mark(indices)
+        if not self._full_redraw:
+            self._dirty_cells.update(indices)
+
+    def _display_state(self):
+        """Return the smiley state to show: 'normal', 'lost' or 'won'."""
+        # If mines aren't placed yet show 'normal'.
+        if not self.board.mines_placed:
+            return 'normal'
+        if self.board.check_loss():
+            return 'lost'
+        return self.smiley_state
 
     def draw(self):
-        """Render the header and the grid to the screen."""
+        """Render the parts of the header and grid that changed since the last frame.
+
+        The screen surface is kept between frames. A full repaint (followed by
+        `pygame.display.flip()`) only happens after `invalidate()`; otherwise
+        the changed cells, counter digits and smiley are repainted and pushed
+        with `pygame.display.update(rects)`. Frames where nothing changed cost
+        no drawing at all.
+
+        Only cells inside the camera view are drawn, so a full repaint costs
+        the same on any board size; changed cells outside the view are
+        skipped, and the minimap only recolors the blocks they fall in.
+
+        With the profiler on, each part of the frame is timed as its own
+        phase and the overlay is drawn last.
+        """
+        prof = self.profiler
+        # update timer
+        if self.timer_start is not None and not self.game_over:
+            self.elapsed_seconds = int((pygame.time.get_ticks() - self.timer_start) / 1000)
+
+        header = (self.engine.mines_left, self.elapsed_seconds, self.smiley_state)
+        full = self._full_redraw
+        if full:
+            self._draw_header_frame()
+            self._last_header = (None, None, None)
+        last = self._last_header
+        rects = []
+        if header[0] != last[0]:
+            rects.append(self._draw_mine_counter(header[0]))
+        if header[2] != last[2]:
+            rects.append(self._draw_smiley(header[2]))
+        if header[1] != last[1]:
+            rects.append(self._draw_timer(header[1]))
+        self._last_header = header
+        if prof is not None:
+            prof.lap('header')
+
+        # the overlay covers part of the grid: when its text changes, the
+        # cells under the old text are repainted before the new one is drawn
+        overlay = self.perf_overlay if self.show_profile else None
+        overlay_due = overlay is not None and (full or overlay.due(pygame.time.get_ticks()))
+        if overlay_due:
+            old = overlay.render(prof, pygame.time.get_ticks())
+            if not full:
+                self._mark_cells_under(old)
+            if prof is not None:
+                prof.lap('overlay')
+
+        # grid: cells outside the view are culled, partial edge cells clipped
+        x0, y0, x1, y1 = self.camera.visible_range()
+        self.screen.set_clip(self.grid_rect)
+        if full:
+            self._draw_cells(((x, y) for y in range(y0, y1) for x in range(x0, x1)), False)
+        elif self._dirty_cells:
+            cols = self.board.width
+            cells = ((int(i) % cols, int(i) // cols) for i in self._dirty_cells)
+            rects.extend(self._draw_cells(((x, y) for x, y in cells if x0 <= x < x1 and y0 <= y < y1), True))
+        self._dirty_cells.clear()
+
+        # the minimap is drawn over the grid, so repaint it when cells below it were
+        if self.minimap_visible:
+            changed = self.minimap.refresh(self.board)
+            frame = self.minimap.rect.inflate(2, 2)
+            if full or changed or frame.collidelist(rects) != -1:
+                rects.append(self.minimap.draw(self.screen, self.camera))
+        if prof is not None:
+            prof.lap('grid')
+
+        if overlay is not None and (overlay_due or overlay.rect.collidelist(rects) != -1):
+            rects.append(overlay.draw(self.screen))
+            if prof is not None:
+                prof.lap('overlay')
+        self.screen.set_clip(None)
+
+        if full:
+            self._full_redraw = False
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        if prof is not None:
+            prof.presented()
+
+    def _mark_cells_under(self, rect):
+        """Queue the cells under screen rect `rect` for repaint."""
+        view = pygame.Rect(rect).move(-self.grid_rect.x, -self.grid_rect.y)
+        x0, y0, x1, y1 = self.camera.cells_in(view)
+        cols = self.cols
+        self._dirty_cells.update(y * cols + x for y in range(y0, y1) for x in range(x0, x1))
+
+    def _draw_header_frame(self):
+        """Paint the window background and the beveled header box."""
         # clear background
         self.screen.fill((200,200,200))
         # header with 3D beveled effect
@@ -254,151 +744,113 @@ class Game:
         pygame.draw.line(self.screen, (128, 128, 128), (self.width-1, 0), (self.width-1, HEADER_HEIGHT), 2)
         pygame.draw.line(self.screen, (128, 128, 128), (0, HEADER_HEIGHT-1), (self.width, HEADER_HEIGHT-1), 2)
 
-        font = pygame.font.SysFont(None, 24)
-        remaining = max(0, self.board.mines - self.board.flagged_count)
-        
-        # Mines display with 3D inset effect
-        mines_display_rect = pygame.Rect(8, 8, 70, 24)
-        pygame.draw.rect(self.screen, (192, 192, 192), mines_display_rect)
-        pygame.draw.line(self.screen, (128, 128, 128), mines_display_rect.topleft, mines_display_rect.topright, 1)
-        pygame.draw.line(self.screen, (128, 128, 128), mines_display_rect.topleft, mines_display_rect.bottomleft, 1)
-        pygame.draw.line(self.screen, (255, 255, 255), mines_display_rect.bottomleft, mines_display_rect.bottomright, 1)
-        pygame.draw.line(self.screen, (255, 255, 255), mines_display_rect.topright, mines_display_rect.bottomright, 1)
-        mines_txt = font.render(f"{remaining:03d}", True, (255, 0, 0))
-        self.screen.blit(mines_txt, (mines_display_rect.x + 8, mines_display_rect.y + 4))
-
-        # update timer
-        if self.timer_start is not None and not self.game_over:
-            self.elapsed_seconds = int((pygame.time.get_ticks() - self.timer_start) / 1000)
-
-        # draw smiley manually inside self.smiley_rect
-        sx, sy, sw, sh = self.smiley_rect
-        cx = sx + sw // 2
-        cy = sy + sh // 2
-        # make the smiley smaller so it doesn't overlap header text
-        radius = int(min(sw, sh) * 0.28)
-
-        # determine which state to display. If mines aren't placed yet show 'normal'.
-        exploded_exists = any(
-            self.board.grid[yy][xx].exploded
-            for yy in range(self.board.height)
-            for xx in range(self.board.width)
-        )
-        if not self.board.mines_placed:
-            display_state = 'normal'
-        elif exploded_exists:
-            display_state = 'lost'
-        else:
-            display_state = self.smiley_state
-
-        # face (yellow circle)
-        pygame.draw.circle(self.screen, (255, 215, 0), (cx, cy), radius)
-
-        # eyes positions
-        eye_dx = max(1, radius // 2)
-        eye_dy = -max(1, radius // 6)
-        eye_r = max(2, radius // 6)
-        left_eye = (cx - eye_dx, cy + eye_dy)
-        right_eye = (cx + eye_dx, cy + eye_dy)
-
-        # draw eyes or sunglasses for 'won'
-        if display_state == 'won':
-            rect_w = max(4, eye_r * 2)
-            rect_h = max(2, eye_r)
-            pygame.draw.rect(self.screen, (0,0,0), (left_eye[0]-rect_w//2, left_eye[1]-rect_h//2, rect_w, rect_h))
-            pygame.draw.rect(self.screen, (0,0,0), (right_eye[0]-rect_w//2, right_eye[1]-rect_h//2, rect_w, rect_h))
-        else:
-            pygame.draw.circle(self.screen, (0,0,0), left_eye, eye_r)
-            pygame.draw.circle(self.screen, (0,0,0), right_eye, eye_r)
-
-        # mouth geometry
-        mouth_w = max(6, radius)
-        mouth_h = max(2, radius // 4)
-        mouth_y = cy + radius // 3
-
-        # Draw mouth: normal -> smile, lost -> frown, won -> straight line
-        if display_state == 'normal':
-            for i in range(-mouth_w//2, mouth_w//2):
-                x1 = cx + i
-                rel = (i / (mouth_w/2))
-                y_off = int((1 - rel*rel) * mouth_h)
-                pygame.draw.line(self.screen, (0,0,0), (x1, mouth_y + y_off), (x1, mouth_y + y_off))
-        elif display_state == 'lost':
-            for i in range(-mouth_w//2, mouth_w//2):
-                x1 = cx + i
-                rel = (i / (mouth_w/2))
-                y_off = int(- (1 - rel*rel) * mouth_h)
-                pygame.draw.line(self.screen, (0,0,0), (x1, mouth_y + y_off), (x1, mouth_y + y_off))
-        else:
-            pygame.draw.line(self.screen, (0,0,0), (cx - mouth_w//2, mouth_y), (cx + mouth_w//2, mouth_y), 2)
-
-        timer_txt = font.render(f"{self.elapsed_seconds:03d}", True, (255, 0, 0))
-        # Timer display with 3D inset effect
-        timer_display_rect = pygame.Rect(self.width - 78, 8, 70, 24)
-        pygame.draw.rect(self.screen, (192, 192, 192), timer_display_rect)
-        pygame.draw.line(self.screen, (128, 128, 128), timer_display_rect.topleft, timer_display_rect.topright, 1)
-        pygame.draw.line(self.screen, (128, 128, 128), timer_display_rect.topleft, timer_display_rect.bottomleft, 1)
-        pygame.draw.line(self.screen, (255, 255, 255), timer_display_rect.bottomleft, timer_display_rect.bottomright, 1)
-        pygame.draw.line(self.screen, (255, 255, 255), timer_display_rect.topright, timer_display_rect.bottomright, 1)
-        self.screen.blit(timer_txt, (timer_display_rect.x + 8, timer_display_rect.y + 4))
-
-        # grid
-        for y in range(self.board.height):
-            for x in range(self.board.width):
-                rect = pygame.Rect(x*CELL_SIZE, HEADER_HEIGHT + y*CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                cell = self.board.grid[y][x]
-                color = (180,180,180) if not cell.revealed else (220,220,220)
-                pygame.draw.rect(self.screen, color, rect)
-                pygame.draw.rect(self.screen, (0,0,0), rect, 1)
-                if cell.flagged and not cell.revealed:
-                    # draw a flag: vertical pole and triangular flag
-                    pole_x = rect.centerx - 2
-                    pole_y = rect.top + 4
-                    pole_h = rect.height - 8
-                    pygame.draw.line(self.screen, (0, 0, 0), (pole_x, pole_y), (pole_x, pole_y + pole_h), 2)
-                    # flag triangle (red)
-                    flag_w = 8
-                    flag_h = 6
-                    flag_points = [
-                        (pole_x + 2, pole_y),
-                        (pole_x + 2 + flag_w, pole_y + flag_h // 2),
-                        (pole_x + 2, pole_y + flag_h)
-                    ]
-                    pygame.draw.polygon(self.screen, (200, 0, 0), flag_points)
-                if cell.revealed and cell.mine:
-                    if cell.exploded:
-                        pygame.draw.rect(self.screen, (200,50,50), rect)
-                    cx = rect.x + rect.width//2
-                    cy = rect.y + rect.height//2
-                    radius = rect.width//2 - 4
-                    pygame.draw.circle(self.screen, (0,0,0), (cx, cy), radius)
-                if cell.revealed and cell.adjacent > 0:
-                    num_font = pygame.font.SysFont(None, 18)
-                    txt = num_font.render(str(cell.adjacent), True, (0,0,0))
-                    self.screen.blit(txt, (rect.x+4, rect.y+2))
-
-        pygame.display.flip()
+    def _draw_counter_box(self, rect, value):
+        """Draw a 3-digit red counter with a 3D inset effect; return its rect."""
+        font = get_font(24)
+        pygame.draw.rect(self.screen, (192, 192, 192), rect)
+        pygame.draw.line(self.screen, (128, 128, 128), rect.topleft, rect.topright, 1)
+        pygame.draw.line(self.screen, (128, 128, 128), rect.topleft, rect.bottomleft, 1)
+        pygame.draw.line(self.screen, (255, 255, 255), rect.bottomleft, rect.bottomright, 1)
+        pygame.draw.line(self.screen, (255, 255, 255), rect.topright, rect.bottomright, 1)
+        txt = font.render(f"{value:03d}", True, (255, 0, 0))
+        self.screen.blit(txt, (rect.x + 8, rect.y + 4))
+        # the bottom/right bevel lines sit one pixel outside the rect
+        return pygame.Rect(rect.x, rect.y, rect.width + 1, rect.height + 1)
+
+    def _draw_mine_counter(self, remaining):
+        """Draw the remaining-mines display (left side of the header)."""
+        return self._draw_counter_box(pygame.Rect(8, 8, 70, 24), remaining)
+
+    def _draw_timer(self, seconds):
+        """Draw the elapsed-time display (right side of the header)."""
+        return self._draw_counter_box(pygame.Rect(self.width - 78, 8, 70, 24), seconds)
+
+    def _draw_smiley(self, display_state):
+        """Blit the pre-rendered smiley for `display_state`; return its rect."""
+        self.screen.blit(self.atlas.smileys[display_state], self.smiley_rect)
+        return self.smiley_rect
+
+    def _draw_cells(self, positions, collect_rects):
+        """Blit the atlas tiles for the given (x, y) cells in one batch.
+
+        Returns the list of touched rects when `collect_rects` is True.
+        """
+        tiles = self.atlas.tiles
+        grid = self.board.grid
+        cs = self.camera.cell_size
+        ox = self.grid_rect.x - self.camera.x
+        oy = self.grid_rect.y - self.camera.y
+        seq = [(tiles[tile_for(grid[y][x])], (ox + x*cs, oy + y*cs)) for x, y in positions]
+        return self.screen.blits(seq, doreturn=collect_rects)
+
+    def idle_timeout(self):
+        """Return how long (ms) the event loop may sleep before the timer display changes.
+
+        0 means no timer is running, so the loop can wait for input indefinitely.
+        """
+        if self.timer_start is None or self.game_over:
+            return 0
+        return 1000 - (pygame.time.get_ticks() - self.timer_start) % 1000
 
     def run(self):
-        """Main loop: handle events, draw frame, and cap FPS."""
+        """Main loop: handle events, draw frame, and cap FPS.
+
+        In the 'event' `LOOP_MODE` the loop sleeps in `pygame.event.wait`
+        between frames and only wakes for input or the next timer second.
+        """
+        if self.loop_mode == 'event':
+            pygame.event.set_blocked(pygame.MOUSEMOTION)
         while self.running:
-            self.handle_events()
             self.draw()
             self.clock.tick(FPS)
-        pygame.quit()
+            events = wait_events(self.idle_timeout()) if self.loop_mode == 'event' else None
+            if self.profiler is not None:
+                self.profiler.lap('sleep')
+            self.handle_events(events)
+            if self.profiler is not None:
+                self.profiler.lap('events')
+            self._autosave()
+            if self.profiler is not None:
+                self.profiler.end_frame('save')
+        if self._saved_at is not None:
+            self.save()
+        self._close_replay()
+        if self.stats is not None:
+            self.stats.close()
+        if self.layouts is not None:
+            self.layouts.close()
+        if self._owns_session:
+            self.session.close()
+        return self.next_scene
 
 
 def run(difficulty='beginner'):
     """Run the game with an optional difficulty.
     
-    If difficulty is 'beginner' (default), show the difficulty menu first.
-    Otherwise, start the game directly with the specified difficulty.
+    If difficulty is 'beginner' (default), an autosaved game in progress is
+    resumed; without one the difficulty menu is shown first. Otherwise,
+    start the game directly with the specified difficulty.
+
+    Menu and games share one `Session`, so pygame is initialized once and
+    the window stays open between them: Esc in a game goes back to the
+    menu, closing the window quits.
     """
-    if difficulty == 'beginner':
-        menu = DifficultyMenu()
-        difficulty = menu.run()
-    Game(difficulty).run()
+    session = Session()
+    try:
+        if difficulty == 'beginner' and AUTOSAVE and resumable(AUTOSAVE_PATH):
+            scene = Game(resume=AUTOSAVE_PATH, session=session).run()
+        elif difficulty == 'beginner':
+            scene = 'menu'
+        else:
+            scene = Game(difficulty, session=session).run()
+        while scene == 'menu':
+            difficulty = DifficultyMenu(session).run()
+            scene = Game(difficulty, session=session).run() if difficulty else None
+    finally:
+        session.close()
 
 
 if __name__ == '__main__':
+    # the no-guess layout pool starts worker processes (needed in frozen builds)
+    multiprocessing.freeze_support()
     run()
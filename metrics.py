@@ -0,0 +1,164 @@
+"""Board difficulty metrics: 3BV, openings, islands and the number distribution.
+
+For a mine layout:
+
+- openings: connected regions (8-way) of safe cells with no adjacent mine;
+  one click clears an opening together with the numbers around it
+- isolated: numbered cells that touch no opening and need a click each
+- 3BV: the minimum number of left clicks that clear the board,
+  ``openings + isolated``
+- islands: connected regions (8-way) of isolated numbers
+- numbers: how many safe cells show each count 0-8
+
+Every cell is classified with whole-board byte operations
+(`mines.adjacency_counts`, `bytes.translate`, big-integer ANDs), with
+NumPy for large boards like the rest of `mines`. Regions are then counted
+in one pass over the rows: the runs of a row are found with a C-level
+regex scan (with NumPy: from the edges of all rows at once) and joined to the runs they touch in the row above with a
+union-find, so the Python work is per run, not per cell, and no flood
+fill runs at all.
+
+`score_layouts` scores many layouts, optionally across a process pool;
+`python -m benchmarks.metrics` compares it with a flood-fill count.
+"""
+
+import re
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+from mines import _np, adjacency_counts, mine_mask
+
+# cell code: adjacent count for safe cells, MINE_CODE + count for mines
+MINE_CODE = 0x10
+
+_IS_ZERO = bytes(1 if b == 0 else 0 for b in range(256))
+_IS_NUMBER = bytes(1 if 1 <= b <= 8 else 0 for b in range(256))
+_RUN = re.compile(b'\x01+')
+
+
+class BoardMetrics(NamedTuple):
+    """Difficulty metrics of one layout; see the module docstring."""
+    bbbv: int
+    openings: int
+    isolated: int
+    islands: int
+    # numbers[n]: safe cells with n adjacent mines
+    numbers: Tuple[int, ...]
+
+
+def _row_runs(mask: bytes, width: int, height: int) -> Iterator[List[Tuple[int, int]]]:
+    """Yield the runs of 1 bytes of every row of `mask` as (start, end) flat index spans, end exclusive."""
+    np = _np(width * height)
+    if np is not None:
+        grid = np.zeros((height, width + 2), dtype=np.int8)
+        grid[:, 1:-1] = np.frombuffer(mask, dtype=np.uint8).reshape(height, width)
+        edges = np.diff(grid, axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        ends = np.nonzero(edges == -1)[1]
+        bounds = np.searchsorted(rows, np.arange(height + 1)).tolist()
+        starts = (rows * width + starts).tolist()
+        ends = (rows * width + ends).tolist()
+        for y in range(height):
+            lo, hi = bounds[y], bounds[y + 1]
+            yield list(zip(starts[lo:hi], ends[lo:hi]))
+        return
+    finditer = _RUN.finditer
+    for offset in range(0, width * height, width):
+        yield [run.span() for run in finditer(mask, offset, offset + width)]
+
+
+def count_regions(mask: bytes, width: int, height: int) -> int:
+    """Return the number of 8-way connected regions of 1 bytes in a row-major 0/1 `mask`."""
+    parent = []
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    regions = 0
+    # runs of the previous row and their labels
+    above, above_labels = [], []
+    for runs in _row_runs(mask, width, height):
+        labels = []
+        j = 0
+        count = len(above)
+        for start, end in runs:
+            # the same columns one row up
+            start -= width
+            end -= width
+            # runs above that end before this one starts (diagonals included) cannot touch it or later runs
+            while j < count and above[j][1] < start:
+                j += 1
+            label = -1
+            k = j
+            while k < count and above[k][0] <= end:
+                root = find(above_labels[k])
+                if label < 0:
+                    label = root
+                elif root != label:
+                    # two regions meet: join them
+                    parent[root] = label
+                    regions -= 1
+                k += 1
+            if label < 0:
+                label = len(parent)
+                parent.append(label)
+                regions += 1
+            labels.append(label)
+        above, above_labels = runs, labels
+    return regions
+
+
+def layout_metrics(width: int, height: int, mines: Sequence[int]) -> BoardMetrics:
+    """Return the metrics of a `width` x `height` board with mines at the flat indices `mines`."""
+    n = width * height
+    mask = mine_mask(width, height, mines)
+    counts = adjacency_counts(width, height, mask)
+    # mine cells get MINE_CODE added, so safe cells keep their plain count
+    codes = (int.from_bytes(counts, 'little') | int.from_bytes(mask, 'little') * MINE_CODE).to_bytes(n, 'little')
+    zeros = codes.translate(_IS_ZERO)
+    # numbers that touch no zero cell are isolated
+    touches_zero = int.from_bytes(adjacency_counts(width, height, zeros), 'little')
+    isolated = int.from_bytes(codes.translate(_IS_NUMBER), 'little')
+    lanes = int.from_bytes(b'\x01' * n, 'little')
+    # a lane of `touches_zero` is 0-8; OR-ing its bits down to bit 0 flags "at least one"
+    t = touches_zero | (touches_zero >> 1)
+    t |= t >> 2
+    isolated &= ~t & lanes
+    isolated_mask = isolated.to_bytes(n, 'little')
+    isolated_count = isolated_mask.count(1)
+    openings = count_regions(zeros, width, height)
+    return BoardMetrics(
+        bbbv=openings + isolated_count,
+        openings=openings,
+        isolated=isolated_count,
+        islands=count_regions(isolated_mask, width, height),
+        numbers=tuple(codes.count(v) for v in range(9)),
+    )
+
+
+def board_metrics(board) -> BoardMetrics:
+    """Return the metrics of a board (`Board`, `PackedBoard`, ...) whose mines are placed."""
+    if not board.mines_placed:
+        raise ValueError('the mines of this board are not placed yet')
+    return layout_metrics(board.width, board.height, board.mine_indices)
+
+
+def _score(layout: Tuple[int, int, Sequence[int]]) -> BoardMetrics:
+    return layout_metrics(*layout)
+
+
+def score_layouts(layouts: Iterable[Tuple[int, int, Sequence[int]]], workers: int = 1,
+                  chunksize: int = 256) -> Iterator[BoardMetrics]:
+    """Yield the metrics of every ``(width, height, mines)`` layout, in order.
+
+    With `workers` > 1 the layouts are scored by a process pool in chunks
+    of `chunksize`; `workers=None` uses every CPU.
+    """
+    if workers == 1:
+        yield from map(_score, layouts)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(_score, layouts, chunksize)
@@ -0,0 +1,136 @@
+"""Mine placement helpers shared by the board backends.
+
+These helpers work on flat cell indices (``y * width + x``) and are used by
+`Board.place_mines` and `PackedBoard.place_mines`:
+
+- `sample_mines` picks mine positions by index, excluding the first-click
+  3x3 safe zone arithmetically instead of building a candidate list
+- `mine_mask` turns those indices into a 0/1 byte per cell
+- `adjacency_counts` computes every cell's adjacent-mine count in one pass:
+  a 3x3 shifted sum over the mine mask, with NumPy or with whole-board
+  integer arithmetic in pure Python
+- `neighbor_table` lists every cell's 8-way neighbors, for solvers and
+  policies that walk the board by index
+
+NumPy is optional and only used from `NUMPY_MIN_CELLS` cells up; below
+that its call overhead outweighs the work. The pure-Python paths give the
+same rules, though not the same layout for a given seed.
+"""
+
+import random
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+# NumPy module once looked up (None if not installed); False until first use.
+# The import is deferred so that importing the board/engine stays cheap.
+_numpy = False
+
+# Boards smaller than this use the pure-Python paths even when NumPy is present
+NUMPY_MIN_CELLS = 10_000
+
+
+def _np(cells: int):
+    """Return the NumPy module for a board of `cells` cells, or None to stay in pure Python."""
+    global _numpy
+    if cells < NUMPY_MIN_CELLS:
+        return None
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:  # NumPy is an optional speed-up
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def safe_zone(width: int, height: int, safe_x: int, safe_y: int) -> List[int]:
+    """Return the sorted flat indices of the in-bounds 3x3 area around (safe_x, safe_y)."""
+    return [y * width + x
+            for y in range(max(0, safe_y - 1), min(height, safe_y + 2))
+            for x in range(max(0, safe_x - 1), min(width, safe_x + 2))]
+
+
+def sample_mines(width: int, height: int, count: int, safe_x: int, safe_y: int,
+                 rng: Optional[random.Random] = None) -> array:
+    """Return up to `count` distinct mine indices, none inside the 3x3 safe zone, as an `array('q')`.
+
+    Positions are drawn uniformly from ``range(cells - len(safe))`` and then
+    shifted past the (at most nine) safe indices, so no per-cell candidate
+    list is ever built. Randomness comes from `rng`, or the `random` module
+    without one, so a seeded `random.Random` (or `random.seed`) makes
+    placement reproducible.
+    """
+    safe = safe_zone(width, height, safe_x, safe_y)
+    available = width * height - len(safe)
+    count = min(count, available)
+    # candidate c maps to c + (number of safe indices that end up at or before it);
+    # with safe[j] - j non-decreasing, that is bisect_right(shifted, c)
+    shifted = [s - j for j, s in enumerate(safe)]
+    rng = random if rng is None else rng
+    np = _np(width * height)
+    if np is not None:
+        picks = np.random.default_rng(rng.getrandbits(64)).choice(available, count, replace=False)
+        picks += np.searchsorted(np.array(shifted), picks, side='right')
+        return array('q', picks.astype(np.int64).tobytes())
+    return array('q', [c + bisect_right(shifted, c) for c in rng.sample(range(available), count)])
+
+
+def mine_mask(width: int, height: int, mines: Sequence[int]) -> bytearray:
+    """Return a bytearray with 1 at every mine index and 0 elsewhere."""
+    mask = bytearray(width * height)
+    np = _np(len(mask))
+    if np is not None:
+        np.frombuffer(mask, dtype=np.uint8)[np.asarray(mines, dtype=np.int64)] = 1
+    else:
+        for i in mines:
+            mask[i] = 1
+    return mask
+
+
+def adjacency_counts(width: int, height: int, mask: bytes) -> bytearray:
+    """Return a bytearray holding each cell's number of adjacent mines (0-8).
+
+    `mask` is a 0/1 byte per cell, as returned by `mine_mask`.
+    """
+    np = _np(width * height)
+    if np is not None:
+        padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = np.frombuffer(mask, dtype=np.uint8).reshape(height, width)
+        counts = np.zeros((height, width), dtype=np.uint8)
+        for dy in range(3):
+            for dx in range(3):
+                if dy != 1 or dx != 1:
+                    counts += padded[dy:dy + height, dx:dx + width]
+        return bytearray(counts.tobytes())
+
+    # Pure-Python shifted sum: treat the mask as one big little-endian integer
+    # with a byte lane per cell. Counts never exceed 9, so lanes never carry.
+    n = width * height
+    m = int.from_bytes(mask, 'little')
+    row = b'\x01' * width
+    not_first_col = int.from_bytes((b'\x00' + row[1:]) * height, 'little')
+    not_last_col = int.from_bytes((row[1:] + b'\x00') * height, 'little')
+    # left neighbor + self + right neighbor, without wrapping across rows
+    horizontal = m + ((m & not_last_col) << 8) + ((m & not_first_col) >> 8)
+    full = (1 << (8 * n)) - 1
+    shift = 8 * width
+    total = horizontal + ((horizontal << shift) & full) + (horizontal >> shift)
+    return bytearray((total - m).to_bytes(n, 'little'))
+
+
+@lru_cache(maxsize=8)
+def neighbor_table(width: int, height: int) -> List[Tuple[int, ...]]:
+    """Return the flat indices of the 8-way neighbors of every cell.
+
+    Tables are cached per board size; treat the result as read-only.
+    """
+    table = []
+    for y in range(height):
+        rows = range(max(0, y - 1), min(height, y + 2))
+        for x in range(width):
+            cols = range(max(0, x - 1), min(width, x + 2))
+            table.append(tuple(ny * width + nx for ny in rows for nx in cols
+                               if nx != x or ny != y))
+    return table
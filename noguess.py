@@ -0,0 +1,302 @@
+"""No-guess board generation and a cache of pre-generated layouts.
+
+A layout is "no-guess" for a first click when `solver.Solver` can clear
+the board from that click using certain moves only. `generate` samples
+candidate layouts (honoring the 3x3 first-click safe zone) and rejects
+them until one passes. On expert that takes many attempts, so
+`LayoutCache` runs the search in a process pool and keeps a bounded
+supply of finished layouts in memory and on disk. `GameEngine` then
+installs one on the first click without waiting.
+
+Cache keys are ``(cols, rows, mines, position class)``. The class says
+which part of the board the first click falls in (`position_class`).
+A layout can be reused for any click that lands on a zero cell of its
+opening, possibly mirrored: every such click reveals the same opening,
+so the layout is still solvable from it.
+"""
+
+import json
+import os
+import random
+import threading
+from collections import deque
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import NO_GUESS_ATTEMPTS, NO_GUESS_CACHE_PATH, NO_GUESS_CACHE_SIZE
+from mines import adjacency_counts, mine_mask, sample_mines
+from packed_board import make_board
+from solver import Solver
+
+# Position classes: whether the click lies in the outer third of each axis.
+# Mirroring the board maps every class onto itself.
+POSITION_CLASSES = {
+    (True, True): 'corner',
+    (True, False): 'left-right',
+    (False, True): 'top-bottom',
+    (False, False): 'center',
+}
+
+# The four mirror images of a layout: (flip x, flip y)
+FLIPS = ((False, False), (True, False), (False, True), (True, True))
+
+
+def _outer(v: int, size: int) -> bool:
+    """Return True if coordinate `v` lies in the first or last third of `size`."""
+    third = size // 3
+    return v < third or v >= size - third
+
+
+def position_class(width: int, height: int, x: int, y: int) -> str:
+    """Return the first-click position class of (x,y), see `POSITION_CLASSES`."""
+    return POSITION_CLASSES[_outer(x, width), _outer(y, height)]
+
+
+def position_classes(width: int, height: int) -> List[str]:
+    """Return the position classes that occur on a board of this size."""
+    outer_x = [True, False] if width // 3 else [False]
+    outer_y = [True, False] if height // 3 else [False]
+    return [POSITION_CLASSES[ox, oy] for ox in outer_x for oy in outer_y]
+
+
+def class_click(width: int, height: int, cls: str, rng: random.Random) -> Tuple[int, int]:
+    """Return a random click position of class `cls` in the top-left part of the board."""
+    outer_x, outer_y = next(k for k, v in POSITION_CLASSES.items() if v == cls)
+    third_x, third_y = width // 3, height // 3
+    x = rng.randrange(third_x) if outer_x else rng.randrange(third_x, width - third_x)
+    y = rng.randrange(third_y) if outer_y else rng.randrange(third_y, height - third_y)
+    return x, y
+
+
+def flip_index(i: int, width: int, height: int, flip: Tuple[bool, bool]) -> int:
+    """Return where flat index `i` lands on the board mirrored by `flip`."""
+    y, x = divmod(i, width)
+    if flip[0]:
+        x = width - 1 - x
+    if flip[1]:
+        y = height - 1 - y
+    return y * width + x
+
+
+def _first_click(width: int, height: int, mine_indices: Sequence[int], x: int, y: int):
+    """Return a board with the layout installed and (x,y) revealed, and its opening's zero cells."""
+    board = make_board(width, height, len(mine_indices))
+    board.set_mines(mine_indices)
+    opening = board.reveal(x, y)
+    counts = adjacency_counts(width, height, mine_mask(width, height, mine_indices))
+    return board, [int(i) for i in opening if counts[i] == 0]
+
+
+def solve_opening(width: int, height: int, mine_indices: Sequence[int], x: int, y: int) -> Optional[List[int]]:
+    """Play the layout from a first click at (x,y) using certain moves only.
+
+    Returns the zero cells of the first click's opening if the solver
+    clears the board without guessing, else None.
+    """
+    board, zeros = _first_click(width, height, mine_indices, x, y)
+    solver = Solver(board)
+    while not board.check_win():
+        hint = solver.hint()
+        if hint is None:
+            return None
+        action, hx, hy = hint
+        if action == 'flag':
+            board.toggle_flag(hx, hy)
+            solver.update((hy * width + hx,))
+        else:
+            solver.update(board.reveal(hx, hy))
+    return zeros
+
+
+def is_solvable(width: int, height: int, mine_indices: Sequence[int], x: int, y: int) -> bool:
+    """Return True if the layout can be cleared from (x,y) without guessing."""
+    return solve_opening(width, height, mine_indices, x, y) is not None
+
+
+def generate(width: int, height: int, mines: int, x: int, y: int,
+             attempts: int = NO_GUESS_ATTEMPTS) -> Optional[Tuple[List[int], List[int]]]:
+    """Search for a no-guess layout for a first click at (x,y).
+
+    Returns ``(mine indices, zero cells of the opening)``, or None when
+    `attempts` random layouts all needed a guess. Randomness comes from
+    the `random` module.
+    """
+    for _ in range(attempts):
+        layout = [int(i) for i in sample_mines(width, height, mines, x, y)]
+        zeros = solve_opening(width, height, layout, x, y)
+        if zeros is not None:
+            return layout, zeros
+    return None
+
+
+def _generate_job(task):
+    """Pool worker: search one layout for a position class."""
+    width, height, mines, cls, seed, attempts = task
+    # forked workers share the parent's random state, so every job seeds its own
+    random.seed(seed)
+    x, y = class_click(width, height, cls, random.Random(seed))
+    found = generate(width, height, mines, x, y, attempts)
+    if found is None:
+        return (width, height, mines, cls), None
+    return (width, height, mines, cls), (y * width + x, found[0], found[1])
+
+
+def _stored_entry(key: tuple, entry) -> Tuple[int, List[int], set]:
+    """Return the cache entry of one ``[click, mines]`` pair read from the cache file.
+
+    Raises `TypeError`, `ValueError` or `IndexError` if it does not fit
+    the board of `key`.
+    """
+    width, height, mines, _ = key
+    click, layout = entry
+    if not isinstance(click, int) or not all(isinstance(i, int) for i in layout):
+        raise TypeError(f"non-integer cells in {entry!r}")
+    cells = width * height
+    if not 0 <= click < cells or click in layout or len(set(layout)) != mines \
+            or not all(0 <= i < cells for i in layout):
+        raise ValueError(f"layout does not fit a {width}x{height} board with {mines} mines")
+    # the file only stores solvable layouts; just rebuild the opening
+    y, x = divmod(click, width)
+    _, zeros = _first_click(width, height, layout, x, y)
+    return click, layout, set(zeros)
+
+
+class LayoutCache:
+    """Bounded supply of no-guess layouts, refilled by a background process pool.
+
+    Public methods:
+      - fill(cols, rows, mines): queue jobs until every position class of
+        that size has `per_key` layouts (finished or in flight)
+      - take(cols, rows, mines, x, y): remove and return a layout that is
+        no-guess from (x,y), or None if none is ready
+      - save(): write the cache to `path`
+      - close(): save, then stop the workers
+
+    Entries are ``(click, mines, zeros)`` as returned by the pool. The pool
+    starts on the first `fill`; `take` never waits for it.
+    """
+
+    def __init__(self, path: Optional[str] = NO_GUESS_CACHE_PATH, per_key: int = NO_GUESS_CACHE_SIZE,
+                 workers: Optional[int] = None, attempts: int = NO_GUESS_ATTEMPTS):
+        self.path = path
+        self.per_key = per_key
+        self.workers = workers
+        self.attempts = attempts
+        self._entries: Dict[tuple, deque] = {}
+        self._pending: Dict[tuple, int] = {}
+        # pool callbacks run on a helper thread
+        self._lock = threading.Lock()
+        self._pool = None
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    def _bucket(self, key) -> deque:
+        bucket = self._entries.get(key)
+        if bucket is None:
+            bucket = self._entries[key] = deque(maxlen=self.per_key)
+        return bucket
+
+    def fill(self, width: int, height: int, mines: int):
+        """Queue background jobs so every position class of this size fills up."""
+        jobs = []
+        with self._lock:
+            for cls in position_classes(width, height):
+                key = (width, height, mines, cls)
+                missing = self.per_key - len(self._bucket(key)) - self._pending.get(key, 0)
+                for _ in range(missing):
+                    jobs.append((width, height, mines, cls, random.getrandbits(64), self.attempts))
+                if missing > 0:
+                    self._pending[key] = self._pending.get(key, 0) + missing
+        if not jobs:
+            return
+        if self._pool is None:
+            self._pool = Pool(self.workers)
+        for job in jobs:
+            self._pool.apply_async(_generate_job, (job,), callback=self._add, error_callback=self._failed(job))
+
+    def _add(self, result):
+        key, entry = result
+        with self._lock:
+            self._pending[key] -= 1
+            if entry is not None:
+                click, layout, zeros = entry
+                self._bucket(key).append((click, layout, set(zeros)))
+
+    def _failed(self, job):
+        key = job[:4]
+
+        def failed(_exc):
+            with self._lock:
+                self._pending[key] -= 1
+        return failed
+
+    def take(self, width: int, height: int, mines: int, x: int, y: int) -> Optional[List[int]]:
+        """Remove and return the mine indices of a layout that is no-guess from (x,y).
+
+        Layouts of the click's position class are tried in all four mirror
+        images; one fits if (x,y) lands on a zero cell of its opening.
+        Returns None when nothing fits, without blocking.
+        """
+        key = (width, height, mines, position_class(width, height, x, y))
+        target = y * width + x
+        with self._lock:
+            bucket = self._entries.get(key)
+            if not bucket:
+                return None
+            for entry in bucket:
+                _, layout, zeros = entry
+                for flip in FLIPS:
+                    # flips are their own inverse: map the click back onto the stored layout
+                    if flip_index(target, width, height, flip) in zeros:
+                        bucket.remove(entry)
+                        return [flip_index(i, width, height, flip) for i in layout]
+        return None
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        for name, entries in data.items():
+            try:
+                width, height, mines, cls = name.split(':')
+                key = (int(width), int(height), int(mines), cls)
+            except ValueError:
+                continue
+            if cls not in POSITION_CLASSES.values() or not isinstance(entries, list):
+                continue
+            bucket = self._bucket(key)
+            for entry in entries:
+                try:
+                    bucket.append(_stored_entry(key, entry))
+                except (TypeError, ValueError, IndexError):
+                    # a truncated or hand-edited entry; the pool makes new layouts instead
+                    continue
+
+    def save(self):
+        """Write the cached layouts to `path` (no-op without a path)."""
+        if not self.path:
+            return
+        with self._lock:
+            data = {':'.join(map(str, key)): [[click, list(layout)] for click, layout, _ in bucket]
+                    for key, bucket in self._entries.items() if bucket}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def close(self):
+        """Save the cache and stop the worker pool; unfinished jobs are dropped."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self.save()
@@ -0,0 +1,389 @@
+"""Compact array-backed board storage for very large custom boards.
+
+`PackedBoard` is a drop-in alternative to `board.Board`. Instead of one
+`Cell` dataclass per square it keeps the whole board in a single
+`bytearray`, one byte per cell:
+
+    bit 0   mine
+    bit 1   revealed
+    bit 2   flagged
+    bit 3   exploded
+    bits 4-7 adjacent mine count (0-8)
+
+`grid[y][x]` still works: it returns a lightweight `CellView` that reads and
+writes the packed byte, so `main.Game` and other callers written against
+`Cell` keep running unchanged.
+"""
+
+import random
+from array import array
+from typing import Iterator, Optional, Sequence
+
+from board import Board
+from config import PACKED_BOARD_MIN_CELLS
+from mines import adjacency_counts, mine_mask, sample_mines
+
+# Bit flags stored in the low nibble of every cell byte
+MINE = 0x01
+REVEALED = 0x02
+FLAGGED = 0x04
+EXPLODED = 0x08
+# The adjacent count lives in the high nibble
+ADJ_SHIFT = 4
+FLAG_MASK = 0x0F
+
+# Translation tables used to run whole-board scans at C speed via bytes.translate
+_CLEAR_MINES = bytes(b & (FLAG_MASK & ~MINE) for b in range(256))
+_TO_ADJ_NIBBLE = bytes((b << ADJ_SHIFT) & 0xFF for b in range(256))
+_REVEAL_MINES = bytes(b | REVEALED if b & MINE else b for b in range(256))
+_FLAG_MINES = bytes(b | FLAGGED if b & MINE else b for b in range(256))
+_IS_FLAGGED = bytes(1 if b & FLAGGED else 0 for b in range(256))
+_PLAYER_BITS = bytes(b & (REVEALED | FLAGGED | EXPLODED) for b in range(256))
+_LAYOUT_BITS = bytes(b & ~(REVEALED | FLAGGED | EXPLODED) for b in range(256))
+_IS_REVEALED_SAFE = bytes(1 if b & (REVEALED | MINE) == REVEALED else 0 for b in range(256))
+_IS_EXPLODED = bytes(1 if b & EXPLODED else 0 for b in range(256))
+
+
+class CellView:
+    """Lightweight `Cell`-compatible view onto one byte of a `PackedBoard`.
+
+    Views are created on demand and hold no state of their own; every
+    attribute read or write goes straight to the packed storage.
+    """
+
+    __slots__ = ('_cells', '_i', 'x', 'y')
+
+    def __init__(self, cells: bytearray, i: int, x: int, y: int):
+        self._cells = cells
+        self._i = i
+        self.x = x
+        self.y = y
+
+    def _get(self, bit: int) -> bool:
+        return bool(self._cells[self._i] & bit)
+
+    def _set(self, bit: int, value: bool):
+        if value:
+            self._cells[self._i] |= bit
+        else:
+            self._cells[self._i] &= ~bit & 0xFF
+
+    mine = property(lambda self: self._get(MINE), lambda self, v: self._set(MINE, v))
+    revealed = property(lambda self: self._get(REVEALED), lambda self, v: self._set(REVEALED, v))
+    flagged = property(lambda self: self._get(FLAGGED), lambda self, v: self._set(FLAGGED, v))
+    exploded = property(lambda self: self._get(EXPLODED), lambda self, v: self._set(EXPLODED, v))
+
+    @property
+    def adjacent(self) -> int:
+        return self._cells[self._i] >> ADJ_SHIFT
+
+    @adjacent.setter
+    def adjacent(self, value: int):
+        self._cells[self._i] = (self._cells[self._i] & FLAG_MASK) | (value << ADJ_SHIFT)
+
+    def reveal(self):
+        """Reveal this cell (mark it as visible)."""
+        self._cells[self._i] |= REVEALED
+
+    def toggle_flag(self):
+        """Toggle a flag on this cell. Revealed cells cannot be flagged."""
+        if not self._cells[self._i] & REVEALED:
+            self._cells[self._i] ^= FLAGGED
+
+    def __repr__(self):
+        return (f"CellView(x={self.x}, y={self.y}, mine={self.mine}, revealed={self.revealed}, "
+                f"flagged={self.flagged}, exploded={self.exploded}, adjacent={self.adjacent})")
+
+
+class _RowView:
+    """One row of a `PackedBoard`, indexable by column."""
+
+    __slots__ = ('_cells', '_y', '_offset', '_width')
+
+    def __init__(self, cells: bytearray, y: int, width: int):
+        self._cells = cells
+        self._y = y
+        self._offset = y * width
+        self._width = width
+
+    def __len__(self) -> int:
+        return self._width
+
+    def __getitem__(self, x: int) -> CellView:
+        if x < 0:
+            x += self._width
+        if not 0 <= x < self._width:
+            raise IndexError('column index out of range')
+        return CellView(self._cells, self._offset + x, x, self._y)
+
+    def __iter__(self) -> Iterator[CellView]:
+        for x in range(self._width):
+            yield CellView(self._cells, self._offset + x, x, self._y)
+
+
+class _GridView:
+    """`grid[y][x]` compatible view over the packed cell bytes."""
+
+    __slots__ = ('_cells', '_width', '_height')
+
+    def __init__(self, cells: bytearray, width: int, height: int):
+        self._cells = cells
+        self._width = width
+        self._height = height
+
+    def __len__(self) -> int:
+        return self._height
+
+    def __getitem__(self, y: int) -> _RowView:
+        if y < 0:
+            y += self._height
+        if not 0 <= y < self._height:
+            raise IndexError('row index out of range')
+        return _RowView(self._cells, y, self._width)
+
+    def __iter__(self) -> Iterator[_RowView]:
+        for y in range(self._height):
+            yield _RowView(self._cells, y, self._width)
+
+
+class PackedBoard(Board):
+    """`Board` backend that stores every cell in one byte of a `bytearray`.
+
+    The public API matches `Board`; the hot paths (mine placement, reveal,
+    whole-board scans) work on flat indices instead of `Cell` objects. As
+    with `Board`, the running counters only see changes made through the
+    board methods, not writes through `grid[y][x]` views.
+    """
+
+    def __init__(self, width: int, height: int, mines: int):
+        self.width = width
+        self.height = height
+        self.mines = mines
+        # flat y-major storage: index = y * width + x
+        self.cells = bytearray(width * height)
+        self.mines_placed = False
+        self._reset_counters()
+
+    def clear(self):
+        """Make this an empty board again, zeroing the cell bytes in place; see `Board.clear`."""
+        self.cells[:] = bytes(len(self.cells))
+        self.mines_placed = False
+        self._reset_counters()
+        self.notify_reset()
+
+    @property
+    def grid(self) -> _GridView:
+        """Return a `grid[y][x]` view over the packed storage."""
+        return _GridView(self.cells, self.width, self.height)
+
+    def place_mines(self, safe_x: int, safe_y: int, rng: Optional[random.Random] = None):
+        """Place mines after the first click, keeping the 3x3 around it clear.
+
+        Same contract as `Board.place_mines`. The mine bits and adjacent
+        nibbles are merged into the cell bytes with whole-board integer ORs,
+        so apart from sampling no Python code runs per cell.
+        """
+        if self.mines_placed:
+            return
+
+        self.set_mines(sample_mines(self.width, self.height, self.mines, safe_x, safe_y, rng))
+
+    def set_mines(self, mine_indices: Sequence[int]):
+        """Place mines at the given flat indices; same contract as `Board.set_mines`."""
+        w, h = self.width, self.height
+        mask = mine_mask(w, h, mine_indices)
+        counts = adjacency_counts(w, h, mask).translate(_TO_ADJ_NIBBLE)
+        # clear old mine bits and adjacent counts but keep player state (e.g. early flags)
+        merged = (int.from_bytes(self.cells.translate(_CLEAR_MINES), 'little')
+                  | int.from_bytes(mask, 'little')
+                  | int.from_bytes(counts, 'little'))
+        self.cells[:] = merged.to_bytes(w * h, 'little')
+
+        self.mine_indices = mine_indices
+        self.mines_placed = True
+        self._record(mines_placed=True)
+
+    def _mines_without(self, bit: int) -> array:
+        """Return the flat indices of the mines whose `bit` is not set (for the change stream)."""
+        cells = self.cells
+        return array('q', (i for i in map(int, self.mine_indices) if not cells[i] & bit))
+
+    def remove_mines(self):
+        """Take the mine layout off the board again; see `Board.remove_mines`."""
+        self.cells[:] = self.cells.translate(_PLAYER_BITS)
+        self.mine_indices = ()
+        self.mines_placed = False
+        self._record(mines_placed=True)
+
+    def reveal_cells(self, indices: Sequence[int], exploded: Sequence[int] = ()):
+        """Reveal exactly the covered cells at `indices`; see `Board.reveal_cells`."""
+        cells = self.cells
+        safe = 0
+        for i in indices:
+            b = cells[i]
+            cells[i] = b | REVEALED
+            safe += not b & MINE
+        self.revealed_count += safe
+        for i in exploded:
+            cells[i] |= EXPLODED
+            self.exploded = (i % self.width, i // self.width)
+        if self._listeners:
+            self._record(revealed=indices, exploded=exploded)
+
+    def cover_cells(self, indices: Sequence[int]):
+        """Cover the revealed cells at `indices` again; see `Board.cover_cells`."""
+        cells = self.cells
+        safe = 0
+        for i in indices:
+            b = cells[i]
+            cells[i] = b & ~(REVEALED | EXPLODED) & 0xFF
+            safe += not b & MINE
+            if b & EXPLODED:
+                self.exploded = None
+        self.revealed_count -= safe
+        if self._listeners:
+            self._record(covered=indices)
+
+    def set_flags(self, indices: Sequence[int], flagged: bool):
+        """Set (or clear) the flag of the cells at `indices`; see `Board.set_flags`."""
+        cells = self.cells
+        if flagged:
+            for i in indices:
+                cells[i] |= FLAGGED
+        else:
+            for i in indices:
+                cells[i] &= ~FLAGGED & 0xFF
+        self._flag_count += len(indices) if flagged else -len(indices)
+        if self._listeners:
+            self._record(**{'flagged' if flagged else 'unflagged': indices})
+
+    def reveal_all_mines(self):
+        """Reveal all mines on the board (used when the player loses)."""
+        if self._listeners:
+            self._record(revealed=self._mines_without(REVEALED))
+        self.cells[:] = self.cells.translate(_REVEAL_MINES)
+
+    def flag_all_mines(self):
+        """Flag every mine (used to auto-flag the remaining mines on a win)."""
+        if self._listeners:
+            self._record(flagged=self._mines_without(FLAGGED))
+        self.cells[:] = self.cells.translate(_FLAG_MINES)
+        self._flag_count = self.cells.translate(_IS_FLAGGED).count(1)
+
+    def player_state(self) -> bytes:
+        """Return the revealed/flagged/exploded bits of every cell; see `Board.player_state`."""
+        return bytes(self.cells.translate(_PLAYER_BITS))
+
+    def load_player_state(self, state: bytes):
+        """Overwrite the player state of every cell; see `Board.load_player_state`."""
+        n = self.width * self.height
+        merged = (int.from_bytes(self.cells.translate(_LAYOUT_BITS), 'little')
+                  | int.from_bytes(bytes(state).translate(_PLAYER_BITS), 'little'))
+        self.cells[:] = merged.to_bytes(n, 'little')
+        self.revealed_count = self.cells.translate(_IS_REVEALED_SAFE).count(1)
+        self._flag_count = self.cells.translate(_IS_FLAGGED).count(1)
+        i = self.cells.translate(_IS_EXPLODED).find(1)
+        self.exploded = None if i < 0 else (i % self.width, i // self.width)
+        self.notify_reset()
+
+    def toggle_flag(self, x: int, y: int) -> bool:
+        """Toggle the flag on the cell at (x,y); return True if the flag state changed."""
+        i = y * self.width + x
+        b = self.cells[i]
+        if b & REVEALED:
+            return False
+        self.cells[i] = b ^ FLAGGED
+        self._flag_count += -1 if b & FLAGGED else 1
+        if self._listeners:
+            self._record(**{'unflagged' if b & FLAGGED else 'flagged': (i,)})
+        return True
+
+    def reveal(self, x: int, y: int) -> array:
+        """Reveal the cell at (x,y) and flood-fill across empty cells.
+
+        Scanline fill: each empty seed is widened into a horizontal run of
+        empty cells, then the rows above and below the run are revealed in one
+        sweep and any new empty cells there become seeds. No recursion, and
+        one seed per run instead of one per cell.
+
+        Returns an `array('q')` of the flat indices revealed by this call,
+        like `Board.reveal`, and publishes them to the change stream.
+        """
+        cells = self.cells
+        w, h = self.width, self.height
+        start = y * w + x
+        revealed = array('q')
+        if cells[start] & (REVEALED | FLAGGED):
+            return revealed
+        cells[start] |= REVEALED
+        revealed.append(start)
+        if cells[start] & MINE:
+            cells[start] |= EXPLODED
+            self.exploded = (x, y)
+            if self._listeners:
+                self._record(revealed=revealed, exploded=revealed)
+            return revealed
+        if cells[start] >> ADJ_SHIFT:
+            self.revealed_count += 1
+            if self._listeners:
+                self._record(revealed=revealed)
+            return revealed
+
+        closed = REVEALED | FLAGGED
+        append = revealed.append
+        seeds = [start]
+        while seeds:
+            i = seeds.pop()
+            row = i - i % w
+            # widen the run of empty cells to the left, revealing its border number
+            a = i
+            while a > row:
+                b = cells[a - 1]
+                if b & closed:
+                    break
+                cells[a - 1] = b | REVEALED
+                append(a - 1)
+                if b >> ADJ_SHIFT:
+                    break
+                a -= 1
+            # ...and to the right
+            z = i
+            end = row + w - 1
+            while z < end:
+                b = cells[z + 1]
+                if b & closed:
+                    break
+                cells[z + 1] = b | REVEALED
+                append(z + 1)
+                if b >> ADJ_SHIFT:
+                    break
+                z += 1
+            # sweep the rows above and below the run (plus its diagonal corners)
+            lo = a - 1 if a > row else a
+            hi = z + 1 if z < end else z
+            for off in (-w, w):
+                if not 0 <= row + off < w * h:
+                    continue
+                for n in range(lo + off, hi + off + 1):
+                    b = cells[n]
+                    if b & closed:
+                        continue
+                    cells[n] = b | REVEALED
+                    append(n)
+                    if not b >> ADJ_SHIFT:
+                        seeds.append(n)
+        self.revealed_count += len(revealed)
+        if self._listeners:
+            self._record(revealed=revealed)
+        return revealed
+
+
+def make_board(width: int, height: int, mines: int) -> Board:
+    """Return a board for the given size, picking the packed backend for big boards.
+
+    Boards with at least `config.PACKED_BOARD_MIN_CELLS` cells use
+    `PackedBoard`; smaller ones keep the classic `Board`.
+    """
+    if width * height >= PACKED_BOARD_MIN_CELLS:
+        return PackedBoard(width, height, mines)
+    return Board(width, height, mines)
@@ -0,0 +1,288 @@
+"""Frame profiler and on-screen performance overlay for `main.Game`.
+
+`FrameProfiler` splits every frame of the main loop into phases (see
+`PHASES`) with `time.perf_counter` laps: the game calls `lap(phase)` at
+the end of each phase, which charges the time since the previous lap to
+that phase. Per-frame totals and the individual laps are kept in
+fixed-size ring buffers of `array('d')`, so profiling allocates nothing
+per frame and only remembers the last `capacity` frames.
+
+Input-to-photon latency is measured from the `MOUSEBUTTONDOWN` the loop
+receives to the end of the next `flip`/`update`. pygame events carry no
+timestamp, so in the 'fixed' `LOOP_MODE` the time an event waited in the
+queue before the frame polled it is not included.
+
+`summary()` returns percentiles of the buffered frames, `write_json()`
+dumps them with the per-frame data and `write_chrome_trace()` writes the
+laps in the Chrome trace event format (open it in chrome://tracing or
+https://ui.perfetto.dev). `PerfOverlay` draws the summary over the grid.
+"""
+
+import json
+import os
+import time
+from array import array
+
+import pygame
+
+from config import FPS, PROFILE_FRAMES, PROFILE_OVERLAY_INTERVAL
+from atlas import get_font
+
+# Frame phases in loop order; 'logic' is the engine work inside event handling
+PHASES = ('header', 'grid', 'overlay', 'flip', 'sleep', 'events', 'logic', 'save')
+# Laps kept per frame of capacity ('events' is split by every 'logic' lap)
+SPANS_PER_FRAME = 12
+
+# Overlay colors
+OVERLAY_BG = (0, 0, 0)
+OVERLAY_BORDER = (96, 96, 96)
+OVERLAY_TEXT = (230, 230, 230)
+OVERLAY_WARN = (255, 200, 0)
+
+
+def percentile(sorted_values, p):
+    """Return the nearest-rank `p`th percentile of an ascending sequence (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, -(-len(sorted_values) * p // 100) - 1))
+    return sorted_values[int(k)]
+
+
+def _stats_ms(values):
+    """Return p50/p95/p99/max/mean in milliseconds of `values` (seconds)."""
+    values = sorted(values)
+    result = {f"p{p}": percentile(values, p) * 1000 for p in (50, 95, 99)}
+    result['max'] = values[-1] * 1000 if values else 0.0
+    result['mean'] = sum(values) / len(values) * 1000 if values else 0.0
+    return result
+
+
+class FrameProfiler:
+    """Ring buffer of per-phase frame timings and input latencies.
+
+    Public methods:
+      - lap(phase): charge the time since the previous lap to `phase`
+      - end_frame(phase): final lap of a frame; commits it to the buffer
+      - input(): a mouse button went down (starts a latency measurement)
+      - presented(): the frame was pushed to the screen (ends it)
+      - frames_data(): the buffered frames, oldest first
+      - summary(): percentiles of the buffered frames and latencies
+      - write_json(path) / write_chrome_trace(path): export the buffer
+      - export(directory): both exports under a timestamped name
+    """
+
+    def __init__(self, capacity=PROFILE_FRAMES, clock=time.perf_counter):
+        self.capacity = capacity
+        self._clock = clock
+        self._phase_index = {name: i for i, name in enumerate(PHASES)}
+        n = len(PHASES)
+        # frame f lives in row f % capacity: its start, end and phase sums
+        self._starts = array('d', bytes(8 * capacity))
+        self._ends = array('d', bytes(8 * capacity))
+        self._sums = array('d', bytes(8 * capacity * n))
+        self._current = array('d', bytes(8 * n))
+        self.frames = 0
+        # individual laps (phase, start, duration) for the trace export
+        self._span_capacity = capacity * SPANS_PER_FRAME
+        self._span_phase = array('B', bytes(self._span_capacity))
+        self._span_start = array('d', bytes(8 * self._span_capacity))
+        self._span_dur = array('d', bytes(8 * self._span_capacity))
+        self.spans = 0
+        # input-to-photon latencies (start, duration)
+        self._lat_start = array('d', bytes(8 * capacity))
+        self._lat_dur = array('d', bytes(8 * capacity))
+        self.inputs = 0
+        self._pending_input = None
+        self._frame_start = self._last = clock()
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to `phase` (a name in `PHASES`)."""
+        now = self._clock()
+        i = self._phase_index[phase]
+        d = now - self._last
+        self._current[i] += d
+        j = self.spans % self._span_capacity
+        self._span_phase[j] = i
+        self._span_start[j] = self._last
+        self._span_dur[j] = d
+        self.spans += 1
+        self._last = now
+
+    def end_frame(self, phase):
+        """Take the last lap of the frame as `phase` and commit the frame to the buffer."""
+        self.lap(phase)
+        row = self.frames % self.capacity
+        n = len(PHASES)
+        self._starts[row] = self._frame_start
+        self._ends[row] = self._last
+        current = self._current
+        self._sums[row * n:row * n + n] = current
+        for i in range(n):
+            current[i] = 0.0
+        self.frames += 1
+        self._frame_start = self._last
+
+    def input(self):
+        """Note a mouse button press; the next `presented()` completes its latency."""
+        if self._pending_input is None:
+            self._pending_input = self._clock()
+
+    def presented(self):
+        """Take the 'flip' lap and finish the pending input latency, if any."""
+        self.lap('flip')
+        start = self._pending_input
+        if start is not None:
+            j = self.inputs % self.capacity
+            self._lat_start[j] = start
+            self._lat_dur[j] = self._last - start
+            self.inputs += 1
+            self._pending_input = None
+
+    def _rows(self, count, capacity):
+        """Ring indices of the buffered entries, oldest first."""
+        kept = min(count, capacity)
+        return [(count - kept + k) % capacity for k in range(kept)]
+
+    def frames_data(self):
+        """Return the buffered frames, oldest first, as (start, end, phase sums) in seconds."""
+        n = len(PHASES)
+        return [(self._starts[r], self._ends[r], self._sums[r * n:r * n + n])
+                for r in self._rows(self.frames, self.capacity)]
+
+    def latencies(self):
+        """Return the buffered input-to-photon latencies in seconds, oldest first."""
+        return [self._lat_dur[r] for r in self._rows(self.inputs, self.capacity)]
+
+    def summary(self):
+        """Return percentiles (ms) of the buffered frames, per-phase means and input latencies.
+
+        'frame' is the whole loop iteration, 'busy' the same without the
+        'sleep' phase (what the game spends, independent of `FPS`).
+        """
+        frames = self.frames_data()
+        sleep = self._phase_index['sleep']
+        totals = [end - start for start, end, _ in frames]
+        busy = [end - start - sums[sleep] for start, end, sums in frames]
+        span = frames[-1][1] - frames[0][0] if frames else 0.0
+        return {
+            'frames': len(frames),
+            'fps': len(frames) / span if span > 0 else 0.0,
+            'frame_ms': _stats_ms(totals),
+            'busy_ms': _stats_ms(busy),
+            'phase_ms': {name: (sum(sums[i] for _, _, sums in frames) / len(frames) * 1000 if frames else 0.0)
+                         for i, name in enumerate(PHASES)},
+            'latency_ms': dict(_stats_ms(self.latencies()), count=min(self.inputs, self.capacity)),
+        }
+
+    def write_json(self, path):
+        """Write the summary and every buffered frame (times in ms) to `path` as JSON."""
+        frames = self.frames_data()
+        origin = frames[0][0] if frames else 0.0
+        data = {
+            'phases': list(PHASES),
+            'summary': self.summary(),
+            'frames': [{'start_ms': (start - origin) * 1000, 'total_ms': (end - start) * 1000,
+                        'phases_ms': {name: sums[i] * 1000 for i, name in enumerate(PHASES)}}
+                       for start, end, sums in frames],
+            'latency_ms': [d * 1000 for d in self.latencies()],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+
+    def write_chrome_trace(self, path):
+        """Write the buffered laps, frames and input latencies as a Chrome trace to `path`."""
+        us = 1e6
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                  for tid, name in ((1, 'frames'), (2, 'phases'), (3, 'input latency'))]
+        for start, end, _ in self.frames_data():
+            events.append({'name': 'frame', 'ph': 'X', 'pid': pid, 'tid': 1,
+                           'ts': start * us, 'dur': (end - start) * us})
+        for r in self._rows(self.spans, self._span_capacity):
+            events.append({'name': PHASES[self._span_phase[r]], 'ph': 'X', 'pid': pid, 'tid': 2,
+                           'ts': self._span_start[r] * us, 'dur': self._span_dur[r] * us})
+        for r in self._rows(self.inputs, self.capacity):
+            events.append({'name': 'click to flip', 'ph': 'X', 'pid': pid, 'tid': 3,
+                           'ts': self._lat_start[r] * us, 'dur': self._lat_dur[r] * us})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def export(self, directory):
+        """Write `<timestamp>.json` and `<timestamp>.trace.json` to `directory`; return both paths."""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, time.strftime('frames-%Y%m%d-%H%M%S'))
+        self.write_json(base + '.json')
+        self.write_chrome_trace(base + '.trace.json')
+        return base + '.json', base + '.trace.json'
+
+
+class PerfOverlay:
+    """Text box with a `FrameProfiler` summary, re-rendered at most every `interval` ms.
+
+    Public methods:
+      - due(now): True if the text should be re-rendered
+      - render(profiler, now): re-render; returns the area it covered before
+      - draw(screen): blit the last rendering; returns its rect
+      - set_note(text): show `text` as an extra last line (None removes it)
+    """
+
+    def __init__(self, topleft, interval=PROFILE_OVERLAY_INTERVAL, font_size=16):
+        self.rect = pygame.Rect(topleft, (0, 0))
+        self.interval = interval
+        self.font_size = font_size
+        self.surface = None
+        self.note = None
+        self._rendered_at = None
+
+    def set_note(self, text):
+        """Show `text` below the summary from the next rendering on, which is due right away."""
+        self.note = text
+        self._rendered_at = None
+
+    def due(self, now):
+        """True if nothing was rendered yet or the last rendering is `interval` ms old."""
+        return self._rendered_at is None or now - self._rendered_at >= self.interval
+
+    @staticmethod
+    def lines(summary):
+        """Return the overlay text lines for a `FrameProfiler.summary()`."""
+        busy, frame, lat = summary['busy_ms'], summary['frame_ms'], summary['latency_ms']
+        phases = summary['phase_ms']
+        names = [name for name in PHASES if name != 'sleep']
+        rows = [' '.join(f"{name} {phases[name]:.2f}" for name in names[i:i + 3]) for i in range(0, len(names), 3)]
+        return [
+            f"busy ms p50 {busy['p50']:.1f} p95 {busy['p95']:.1f} p99 {busy['p99']:.1f}",
+            f"max {busy['max']:.1f}  frame p95 {frame['p95']:.1f}  {summary['fps']:.0f} fps",
+            *rows,
+            f"click->flip p95 {lat['p95']:.1f} max {lat['max']:.1f} ({lat['count']})",
+        ]
+
+    def render(self, profiler, now):
+        """Re-render the summary of `profiler`; return the rect the previous rendering covered."""
+        old = self.rect.copy()
+        font = get_font(self.font_size)
+        summary = profiler.summary()
+        # the first line turns yellow when frames miss the FPS budget
+        slow = summary['busy_ms']['p99'] > 1000 / FPS
+        lines = self.lines(summary) + ([self.note] if self.note else [])
+        texts = [font.render(line, True, OVERLAY_WARN if slow and k == 0 else OVERLAY_TEXT)
+                 for k, line in enumerate(lines)]
+        pad = 3
+        w = max(t.get_width() for t in texts) + 2 * pad
+        h = sum(t.get_height() for t in texts) + 2 * pad
+        self.surface = pygame.Surface((w, h))
+        self.surface.fill(OVERLAY_BG)
+        pygame.draw.rect(self.surface, OVERLAY_BORDER, self.surface.get_rect(), 1)
+        y = pad
+        for t in texts:
+            self.surface.blit(t, (pad, y))
+            y += t.get_height()
+        self.rect.size = (w, h)
+        self._rendered_at = now
+        return old
+
+    def draw(self, screen):
+        """Blit the last rendering at `rect`; return the rect."""
+        if self.surface is not None:
+            screen.blit(self.surface, self.rect)
+        return self.rect
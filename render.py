@@ -0,0 +1,221 @@
+"""Headless PNG thumbnails of boards, one at a time or in batches.
+
+A board is first reduced to one tile key per cell (the `atlas` keys:
+0-8, COVERED, FLAG, MINE, EXPLODED). For a `PackedBoard` that is a single
+`bytes.translate` of its cell bytes; other boards (`Board`,
+`savegame.MappedBoard`) are packed the same way from `player_state()`
+and the mine layout first. The keys are then drawn in one of two ways:
+
+- cells of at least `THUMBNAIL_TILE_MIN_SIZE` pixels: the tiles of the
+  game's `atlas.TileAtlas`, blitted in one `Surface.blits` batch, so a
+  thumbnail looks like a screenshot of the board
+- smaller cells: the keys are used directly as the pixels of an 8-bit
+  palette surface (one pixel per cell, colored like the minimap), scaled
+  up to the cell size with nearest-neighbour sampling
+
+A `max_size` in pixels shrinks the cell size to fit; a board with more
+cells than `max_size` has pixels is downsampled to an overview that
+shows every `step`-th cell of every `step`-th row. Nothing here opens a
+window or needs a display, so it runs under SDL's dummy video driver, in
+worker processes and on servers.
+
+`render_many` renders `RenderJob`s (tile keys, not boards, so they pickle
+cheaply) across a process pool. Run as a script it renders save and
+replay files:
+
+    python render.py [--out DIR] [--cell-size N] [--max-size W H] [--workers N] FILES...
+"""
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import pygame
+
+from atlas import COVERED, EXPLODED, FLAG, MINE, get_atlas
+from config import CELL_SIZE, THUMBNAIL_CHUNK_SIZE, THUMBNAIL_TILE_MIN_SIZE
+from mines import adjacency_counts, mine_mask
+from packed_board import ADJ_SHIFT, EXPLODED as EXPLODED_BIT, FLAGGED, MINE as MINE_BIT, REVEALED
+from viewport import MINIMAP_COVERED, MINIMAP_FLAG, MINIMAP_MINE, MINIMAP_REVEALED
+
+
+def _key(b: int) -> int:
+    """Return the tile key of one packed cell byte (same rules as `atlas.tile_for`)."""
+    if not b & REVEALED:
+        return FLAG if b & FLAGGED else COVERED
+    if b & MINE_BIT:
+        return EXPLODED if b & EXPLODED_BIT else MINE
+    return b >> ADJ_SHIFT
+
+
+# packed cell byte -> tile key
+_TILE_KEYS = bytes(_key(b) for b in range(256))
+# packed cell byte -> tile key with every cell revealed
+_SOLUTION_KEYS = bytes(_key(b | REVEALED) for b in range(256))
+
+# Pixel colors of the tile keys for cells too small for the tile artwork;
+# higher numbers are drawn a little darker so the number fields show
+PALETTE = [tuple(int(c * (1 - n * 0.06)) for c in MINIMAP_REVEALED) for n in range(9)]
+PALETTE += [MINIMAP_COVERED, MINIMAP_FLAG, MINIMAP_MINE, (200, 50, 50)]
+
+
+def tile_keys(board, solution: bool = False) -> bytes:
+    """Return the tile key of every cell of `board`, row-major.
+
+    With `solution` every cell is shown revealed (the mine layout and its
+    numbers), whatever the player has uncovered so far.
+    """
+    table = _SOLUTION_KEYS if solution else _TILE_KEYS
+    cells = getattr(board, 'cells', None)
+    if isinstance(cells, bytearray):
+        return bytes(cells).translate(table)
+    n = board.width * board.height
+    # the player_state() bits are the packed bits, so mines and counts can be OR-ed in
+    packed = int.from_bytes(board.player_state(), 'little')
+    if board.mines_placed:
+        mask = mine_mask(board.width, board.height, board.mine_indices)
+        counts = adjacency_counts(board.width, board.height, mask)
+        packed |= int.from_bytes(mask, 'little') | int.from_bytes(counts, 'little') << ADJ_SHIFT
+    return packed.to_bytes(n, 'little').translate(table)
+
+
+def fit(width: int, height: int, cell_size: int = CELL_SIZE,
+        max_size: Optional[Tuple[int, int]] = None) -> Tuple[int, int]:
+    """Return ``(cell size, step)`` to draw a board within `max_size` pixels.
+
+    The cell size is `cell_size` or smaller; a `step` above 1 means the
+    board has to be downsampled to every `step`-th cell at one pixel each.
+    """
+    if max_size is None:
+        return cell_size, 1
+    max_w, max_h = max_size
+    size = min(cell_size, max_w // width, max_h // height)
+    if size >= 1:
+        return size, 1
+    return 1, max(-(-width // max_w), -(-height // max_h))
+
+
+def downsample(keys: bytes, width: int, height: int, step: int) -> Tuple[bytes, int, int]:
+    """Return the keys of every `step`-th cell of every `step`-th row, with the new width and height."""
+    if step == 1:
+        return keys, width, height
+    rows = [keys[y * width:(y + 1) * width:step] for y in range(0, height, step)]
+    return b''.join(rows), len(rows[0]), len(rows)
+
+
+def render_keys(keys: bytes, width: int, height: int, cell_size: int = CELL_SIZE,
+                max_size: Optional[Tuple[int, int]] = None) -> pygame.Surface:
+    """Return a surface showing the tile `keys` of a `width` x `height` board; see the module docstring."""
+    cell_size, step = fit(width, height, cell_size, max_size)
+    keys, width, height = downsample(keys, width, height, step)
+    if cell_size >= THUMBNAIL_TILE_MIN_SIZE:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        tiles = get_atlas(cell_size, (cell_size, cell_size)).tiles
+        surface = pygame.Surface((width * cell_size, height * cell_size))
+        surface.blits([(tiles[keys[i]], ((i % width) * cell_size, (i // width) * cell_size))
+                       for i in range(width * height)], False)
+        return surface
+    surface = pygame.image.frombytes(keys, (width, height), 'P')
+    surface.set_palette(PALETTE)
+    if cell_size > 1:
+        surface = pygame.transform.scale(surface, (width * cell_size, height * cell_size))
+    return surface
+
+
+def render_board(board, cell_size: int = CELL_SIZE, max_size: Optional[Tuple[int, int]] = None,
+                 solution: bool = False) -> pygame.Surface:
+    """Return a surface showing `board` (`Board`, `PackedBoard`, ...); see `tile_keys` and `render_keys`."""
+    return render_keys(tile_keys(board, solution), board.width, board.height, cell_size, max_size)
+
+
+def save_png(board, path: str, cell_size: int = CELL_SIZE, max_size: Optional[Tuple[int, int]] = None,
+             solution: bool = False):
+    """Render `board` and write it to `path` as a PNG."""
+    pygame.image.save(render_board(board, cell_size, max_size, solution), path)
+
+
+class RenderJob(NamedTuple):
+    """One thumbnail for `render_many`: the board as tile keys, and where and how to draw it."""
+    path: str
+    width: int
+    height: int
+    keys: bytes
+    cell_size: int = CELL_SIZE
+
+    @classmethod
+    def for_board(cls, board, path: str, cell_size: int = CELL_SIZE,
+                  max_size: Optional[Tuple[int, int]] = None, solution: bool = False) -> 'RenderJob':
+        """Return the job that draws `board` like `render_board` would.
+
+        The keys are fitted to `max_size` here, so an overview of a huge
+        board sends only the sampled cells to the worker.
+        """
+        cell_size, step = fit(board.width, board.height, cell_size, max_size)
+        keys, width, height = downsample(tile_keys(board, solution), board.width, board.height, step)
+        return cls(path, width, height, keys, cell_size)
+
+
+def _render(job: RenderJob) -> str:
+    pygame.image.save(render_keys(job.keys, job.width, job.height, job.cell_size), job.path)
+    return job.path
+
+
+def render_many(jobs: Iterable[RenderJob], workers: Optional[int] = None,
+                chunksize: int = THUMBNAIL_CHUNK_SIZE) -> Iterator[str]:
+    """Write every job's PNG; yield the paths as they are finished.
+
+    With `workers` other than 1 the jobs are drawn by a process pool in
+    chunks of `chunksize`; `workers=None` uses every CPU.
+    """
+    if workers == 1:
+        yield from map(_render, jobs)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap_unordered(_render, jobs, chunksize)
+
+
+def load_board(path: str):
+    """Return the board of a save file, or the final position of a replay file."""
+    # imported here: both pull in the engine, which the renderer itself does not need
+    from replay import SUFFIX, ReplayPlayer
+    from savegame import load_game
+    if path.endswith(SUFFIX):
+        player = ReplayPlayer(path)
+        try:
+            return player.seek(len(player)).board
+        finally:
+            player.close()
+    return load_game(path)[0].board
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render save and replay files to PNG thumbnails.')
+    parser.add_argument('paths', nargs='+', help='save (.msws) or replay (.mswr) files')
+    parser.add_argument('--out', default='.', help='directory for the PNG files')
+    parser.add_argument('--cell-size', type=int, default=CELL_SIZE, help='largest cell size in pixels')
+    parser.add_argument('--max-size', type=int, nargs=2, metavar=('W', 'H'), help='largest image size in pixels')
+    parser.add_argument('--solution', action='store_true', help='show every cell revealed')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count, 1 = no pool)')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    start = time.perf_counter()
+    jobs = []
+    for path in args.paths:
+        name = os.path.splitext(os.path.basename(path))[0] + '.png'
+        jobs.append(RenderJob.for_board(load_board(path), os.path.join(args.out, name), args.cell_size,
+                                        args.max_size and tuple(args.max_size), args.solution))
+    count = 0
+    for path in render_many(jobs, args.workers):
+        count += 1
+        print(path)
+    print(f"{count} thumbnails in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
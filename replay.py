@@ -0,0 +1,443 @@
+"""Compact binary game replays with keyframes for fast seeking.
+
+A replay file is written incrementally while a game is played
+(`ReplayWriter`) and can be opened at any point of the game
+(`ReplayPlayer.seek`) without re-playing it from the first move. Run from
+the repository root to check many recorded games at once:
+
+    python replay.py verify ~/.mswp/replays --workers 8
+
+File layout. All integers are unsigned LEB128 varints:
+
+    header   b'MSWR', version byte, width, height, mines
+    record   tick delta (ms since the previous record), kind, payload
+
+    kind 0-2 CLICK / FLAG / CHORD   payload: x, y
+    kind 3   LAYOUT                 payload: mine count, then the sorted
+                                    mine indices as gaps from the previous one
+    kind 4   KEYFRAME               payload: actions so far, engine state,
+                                    engine clicks, length, zlib-compressed
+                                    `Board.player_state()`
+
+Only actions that changed the board are recorded. The LAYOUT record is
+written once, right before the first click that placed the mines, so
+replays do not depend on how the layout was chosen (random, seeded or
+no-guess). A KEYFRAME follows every `REPLAY_KEYFRAME_INTERVAL` actions and
+closes the file, so seeking restores the nearest snapshot and applies at
+most that many actions. A file cut off mid-record (e.g. after a crash)
+still replays up to its last complete record.
+"""
+
+import argparse
+import bisect
+import mmap
+import os
+import sys
+import time
+import zlib
+from array import array
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Iterable, List, Optional, Tuple
+
+from config import REPLAY_DIR, REPLAY_KEYFRAME_INTERVAL
+from engine import GameEngine, LOST, PLAYING, READY, WON
+
+MAGIC = b'MSWR'
+VERSION = 1
+SUFFIX = '.mswr'
+
+# Record kinds; the action kinds are also indices into ACTIONS
+CLICK = 0
+FLAG = 1
+CHORD = 2
+LAYOUT = 3
+KEYFRAME = 4
+ACTIONS = ('click', 'flag', 'chord')
+
+# Engine states as stored in keyframes
+STATES = (READY, PLAYING, WON, LOST)
+
+
+class ReplayError(ValueError):
+    """Raised for files that are not replays or whose contents are inconsistent."""
+
+
+def write_varint(out: bytearray, value: int):
+    """Append `value` (>= 0) to `out` as an unsigned LEB128 varint."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos: int) -> Tuple[int, int]:
+    """Decode the varint at `data[pos]`; return ``(value, position after it)``.
+
+    Raises IndexError when the data ends inside the varint.
+    """
+    value = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayWriter:
+    """Append-only recorder for one game.
+
+    Public methods:
+      - record(action, x, y, engine): log an action that changed the board
+      - close(engine): write a final keyframe and close the file
+
+    Records are buffered and flushed with every keyframe, so a crash loses
+    at most the actions since the last one.
+    """
+
+    def __init__(self, path: str, engine: GameEngine, keyframe_interval: int = REPLAY_KEYFRAME_INTERVAL,
+                 clock=time.monotonic):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.actions = 0
+        self._clock = clock
+        self._start = clock()
+        self._last_tick = 0
+        self._layout_written = False
+        self._last_keyframe = 0
+        self._file = open(path, 'wb')
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        for value in (engine.width, engine.height, engine.mines):
+            write_varint(header, value)
+        self._file.write(header)
+
+    @classmethod
+    def create(cls, engine: GameEngine, directory: str = REPLAY_DIR, **kwargs) -> 'ReplayWriter':
+        """Start a replay file named after the current time and board size in `directory`."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        name = f"{stamp}-{engine.width}x{engine.height}x{engine.mines}{SUFFIX}"
+        return cls(os.path.join(directory, name), engine, **kwargs)
+
+    def _tick(self) -> int:
+        """Return milliseconds since the previous record (never negative)."""
+        tick = max(self._last_tick, int((self._clock() - self._start) * 1000))
+        delta = tick - self._last_tick
+        self._last_tick = tick
+        return delta
+
+    def record(self, action: str, x: int, y: int, engine: GameEngine):
+        """Log `action` ('click', 'flag' or 'chord') at (x,y) after `engine` applied it.
+
+        Only call this for actions that changed the board.
+        """
+        out = bytearray()
+        board = engine.board
+        if not self._layout_written and board.mines_placed:
+            write_varint(out, self._tick())
+            write_varint(out, LAYOUT)
+            layout = sorted(int(i) for i in board.mine_indices)
+            write_varint(out, len(layout))
+            prev = 0
+            for i in layout:
+                write_varint(out, i - prev)
+                prev = i
+            self._layout_written = True
+        write_varint(out, self._tick())
+        write_varint(out, ACTIONS.index(action))
+        write_varint(out, x)
+        write_varint(out, y)
+        self._file.write(out)
+        self.actions += 1
+        if self.actions - self._last_keyframe >= self.keyframe_interval:
+            self.keyframe(engine)
+
+    def keyframe(self, engine: GameEngine):
+        """Write a snapshot of `engine` after the actions recorded so far, then flush."""
+        payload = zlib.compress(engine.board.player_state(), 1)
+        out = bytearray()
+        write_varint(out, self._tick())
+        write_varint(out, KEYFRAME)
+        for value in (self.actions, STATES.index(engine.state), engine.clicks, len(payload)):
+            write_varint(out, value)
+        self._file.write(out)
+        self._file.write(payload)
+        self._file.flush()
+        self._last_keyframe = self.actions
+
+    def close(self, engine: Optional[GameEngine] = None):
+        """Finish the file, snapshotting `engine` first if actions followed the last keyframe."""
+        if self._file.closed:
+            return
+        if engine is not None and self.actions > self._last_keyframe:
+            self.keyframe(engine)
+        self._file.close()
+
+
+class _ReplayEngine(GameEngine):
+    """`GameEngine` whose first click installs the recorded layout."""
+
+    def __init__(self, width: int, height: int, mines: int, layout: List[int]):
+        self._layout = layout
+        super().__init__(width, height, mines)
+
+    def _place_mines(self, x: int, y: int):
+        self.board.set_mines(self._layout)
+
+
+class ReplayPlayer:
+    """Random access to the positions of a recorded game.
+
+    Opening a file maps it into memory and indexes its records once;
+    keyframe snapshots stay in the file until a seek needs them.
+
+    Public methods:
+      - seek(n): engine state after the first n actions
+      - seek_tick(ms): engine state at `ms` milliseconds into the game
+      - action(n): the n-th recorded action as ``(tick, name, x, y)``
+      - close(): release the file
+
+    `seek` returns the player's own engine, positioned at the requested
+    action; it is reused by the next seek, so do not play on it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ReplayError(f"{path}: empty file")
+        data = self._data
+        if data[:len(MAGIC)] != MAGIC:
+            self._data.close()
+            raise ReplayError(f"{path}: not a replay file")
+        try:
+            if data[len(MAGIC)] != VERSION:
+                raise ReplayError(f"{path}: unsupported replay version {data[len(MAGIC)]}")
+            pos = len(MAGIC) + 1
+            self.width, pos = read_varint(data, pos)
+            self.height, pos = read_varint(data, pos)
+            self.mines, pos = read_varint(data, pos)
+        except (IndexError, ReplayError) as exc:
+            self._data.close()
+            raise exc if isinstance(exc, ReplayError) else ReplayError(f"{path}: truncated header")
+        self.layout: Optional[List[int]] = None
+        # one entry per action
+        self.ticks = array('q')
+        self.kinds = array('b')
+        self.xs = array('l')
+        self.ys = array('l')
+        # (actions before it, tick, engine state, clicks, payload offset, payload length)
+        self.keyframes: List[Tuple[int, int, str, int, int, int]] = []
+        self._keyframe_actions: List[int] = []
+        try:
+            self._index(pos)
+        except ReplayError:
+            self._data.close()
+            raise
+        self._engine: Optional[GameEngine] = None
+        self._position = 0
+
+    def _index(self, pos: int):
+        """Scan the records once, stopping quietly at a truncated tail."""
+        data = self._data
+        end = len(data)
+        tick = 0
+        while pos < end:
+            try:
+                delta, p = read_varint(data, pos)
+                kind, p = read_varint(data, p)
+                if kind in (CLICK, FLAG, CHORD):
+                    x, p = read_varint(data, p)
+                    y, p = read_varint(data, p)
+                elif kind == LAYOUT:
+                    count, p = read_varint(data, p)
+                    layout, prev = [], 0
+                    for _ in range(count):
+                        gap, p = read_varint(data, p)
+                        prev += gap
+                        layout.append(prev)
+                elif kind == KEYFRAME:
+                    actions, p = read_varint(data, p)
+                    state, p = read_varint(data, p)
+                    clicks, p = read_varint(data, p)
+                    length, p = read_varint(data, p)
+                    if p + length > end:
+                        break
+                else:
+                    raise ReplayError(f"{self.path}: unknown record kind {kind} at byte {pos}")
+            except IndexError:
+                break
+            tick += delta
+            if kind == LAYOUT:
+                self.layout = layout
+            elif kind == KEYFRAME:
+                if actions != len(self.ticks) or state >= len(STATES):
+                    raise ReplayError(f"{self.path}: inconsistent keyframe at byte {pos}")
+                self.keyframes.append((actions, tick, STATES[state], clicks, p, length))
+                self._keyframe_actions.append(actions)
+                p += length
+            else:
+                self.ticks.append(tick)
+                self.kinds.append(kind)
+                self.xs.append(x)
+                self.ys.append(y)
+            pos = p
+
+    def __len__(self) -> int:
+        """Return the number of recorded actions."""
+        return len(self.ticks)
+
+    @property
+    def duration(self) -> int:
+        """Return the tick (ms) of the last action."""
+        return self.ticks[-1] if self.ticks else 0
+
+    def action(self, n: int) -> Tuple[int, str, int, int]:
+        """Return the n-th action (0-based) as ``(tick, name, x, y)``."""
+        return self.ticks[n], ACTIONS[self.kinds[n]], self.xs[n], self.ys[n]
+
+    def new_engine(self) -> GameEngine:
+        """Return a fresh engine that replays this file's layout."""
+        if self.layout is None:
+            return GameEngine(self.width, self.height, self.mines)
+        return _ReplayEngine(self.width, self.height, self.mines, self.layout)
+
+    def snapshot(self, keyframe: Tuple[int, int, str, int, int, int]) -> bytes:
+        """Return the decompressed `Board.player_state()` stored by a keyframe."""
+        offset, length = keyframe[4], keyframe[5]
+        return zlib.decompress(self._data[offset:offset + length])
+
+    def _restore(self, keyframe) -> GameEngine:
+        """Return an engine positioned at `keyframe`."""
+        engine = self.new_engine()
+        actions, _, state, clicks, _, _ = keyframe
+        if state != READY:
+            engine.board.set_mines(self.layout)
+        engine.board.load_player_state(self.snapshot(keyframe))
+        engine.state = state
+        engine.clicks = clicks
+        return engine
+
+    def apply(self, engine: GameEngine, n: int):
+        """Apply action `n` to `engine`; return the changed cells."""
+        return getattr(engine, ACTIONS[self.kinds[n]])(self.xs[n], self.ys[n])
+
+    def seek(self, n: int) -> GameEngine:
+        """Return the engine as it was after the first `n` actions.
+
+        Starts from the last keyframe at or before `n`, or continues from
+        the previous seek when that is closer.
+        """
+        n = max(0, min(n, len(self)))
+        k = bisect.bisect_right(self._keyframe_actions, n) - 1
+        start = self.keyframes[k][0] if k >= 0 else 0
+        if self._engine is None or not start <= self._position <= n:
+            if k >= 0:
+                self._engine = self._restore(self.keyframes[k])
+            else:
+                self._engine = self.new_engine()
+            self._position = start
+        for i in range(self._position, n):
+            self.apply(self._engine, i)
+        self._position = n
+        return self._engine
+
+    def seek_tick(self, tick: int) -> GameEngine:
+        """Return the engine after every action recorded up to `tick` ms."""
+        return self.seek(bisect.bisect_right(self.ticks, tick))
+
+    def close(self):
+        """Release the memory map."""
+        self._engine = None
+        self._data.close()
+
+
+def verify(path: str) -> Tuple[str, Optional[str], int]:
+    """Replay a whole file from the first move and check it against its keyframes.
+
+    Every action must change the board, and the board, engine state and
+    click count must match each keyframe. Returns ``(path, error or None,
+    number of actions)``.
+    """
+    try:
+        player = ReplayPlayer(path)
+    except (OSError, ReplayError) as exc:
+        return path, str(exc), 0
+    try:
+        if player.layout is not None and len(player.layout) != player.mines:
+            return path, f"layout has {len(player.layout)} mines, header says {player.mines}", len(player)
+        engine = player.new_engine()
+        done = 0
+        for keyframe in player.keyframes + [(len(player), None, None, None, None, None)]:
+            for i in range(done, keyframe[0]):
+                if engine.is_over:
+                    return path, f"action {i} comes after the game ended", len(player)
+                if not player.apply(engine, i):
+                    return path, f"action {i} {player.action(i)} changed nothing", len(player)
+            done = keyframe[0]
+            if keyframe[1] is None:
+                break
+            if (engine.state, engine.clicks) != keyframe[2:4]:
+                return path, f"engine after action {done} is {engine.state}/{engine.clicks}, " \
+                             f"keyframe says {keyframe[2]}/{keyframe[3]}", len(player)
+            if engine.board.player_state() != player.snapshot(keyframe):
+                return path, f"board after action {done} differs from its keyframe", len(player)
+        return path, None, len(player)
+    except (ReplayError, IndexError, ValueError, zlib.error) as exc:
+        return path, str(exc), len(player)
+    finally:
+        player.close()
+
+
+def replay_files(paths: Iterable[str]) -> List[str]:
+    """Expand directories in `paths` to the replay files they contain."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(SUFFIX)))
+        else:
+            files.append(path)
+    return files
+
+
+def verify_many(paths: Iterable[str], workers: Optional[int] = None):
+    """Verify replay files in a process pool; yield `verify` results as they finish."""
+    files = replay_files(paths)
+    if workers == 1:
+        yield from map(verify, files)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap_unordered(verify, files, chunksize=8)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect and verify Minesweeper replay files.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    check = sub.add_parser('verify', help='re-play files and check them against their keyframes')
+    check.add_argument('paths', nargs='*', default=[REPLAY_DIR], help='replay files or directories')
+    check.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count, 1 = no pool)')
+    check.add_argument('--quiet', action='store_true', help='only print failures')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    files = failed = actions = 0
+    for path, error, count in verify_many(args.paths, args.workers):
+        files += 1
+        actions += count
+        if error is not None:
+            failed += 1
+            print(f"FAIL {path}: {error}")
+        elif not args.quiet:
+            print(f"ok   {path} ({count} actions)")
+    print(f"{files} files, {actions} actions, {failed} failed in {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,543 @@
+"""Bit-packed save files for resuming games, including boards too big for RAM.
+
+A save file is a sequence of page-aligned sections:
+
+    header      one page: `HEADER` fields (size, engine state, counters,
+                last exploded cell, elapsed seconds), zero padded
+    mines       one bit per cell (cell i is bit i % 8 of byte i // 8)
+    revealed    one bit per cell
+    flagged     one bit per cell
+    exploded    one bit per cell (a chord can blow up several mines)
+    adjacency   one nibble per cell (even cells in the low nibble)
+
+Because every section is page aligned, a page of the revealed, flagged
+or exploded plane covers a fixed range of cells. `SaveFile` uses that to autosave
+incrementally: only the pages holding cells changed since the last save
+are rewritten (plus the header), so a save costs what changed, not what
+the board holds.
+
+`load_game` rebuilds an in-memory board for ordinary sizes. From
+`SAVE_MAPPED_MIN_CELLS` cells on it returns a `MappedBoard` instead,
+which works directly on a copy-on-write memory map of the file: opening
+is instant, only the pages the game touches are read, and the changed
+pages are what the next save writes back.
+"""
+
+import mmap
+import os
+import re
+import struct
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from config import AUTOSAVE_PATH, SAVE_MAPPED_MIN_CELLS
+from engine import GameEngine, LOST, PLAYING, READY, WON
+from packed_board import ADJ_SHIFT, EXPLODED, FLAGGED, MINE, REVEALED, PackedBoard, make_board
+
+MAGIC = b'MSWS'
+VERSION = 2
+PAGE_SIZE = 4096
+# Cells covered by one page of a bit plane
+CELLS_PER_PAGE = PAGE_SIZE * 8
+
+# magic, version, flags, width, height, mines, clicks, revealed count,
+# flagged count, last exploded cell (-1 for none), elapsed seconds, engine state
+HEADER = struct.Struct('<4sHHqqqqqqqqB')
+FLAG_MINES_PLACED = 0x01
+
+STATES = (READY, PLAYING, WON, LOST)
+
+# '0'/'1' digit per cell for one bit of the packed cell byte, and back
+_BITS = (MINE, REVEALED, FLAGGED, EXPLODED)
+_BIT_DIGITS = {bit: bytes(0x31 if b & bit else 0x30 for b in range(256)) for bit in _BITS}
+_DIGIT_VALUES = {bit: bytes(bit if c == 0x31 else 0 for c in range(256)) for bit in _BITS}
+# adjacency nibble <-> high nibble of the packed cell byte
+_HIGH_TO_LOW = bytes(b >> ADJ_SHIFT for b in range(256))
+_KEEP_HIGH = bytes(b & 0xF0 for b in range(256))
+_LOW_TO_HIGH = bytes((b << ADJ_SHIFT) & 0xFF for b in range(256))
+
+
+class SaveError(ValueError):
+    """Raised for files that are not saves of this format."""
+
+
+class SaveInfo(NamedTuple):
+    """Decoded save file header."""
+    width: int
+    height: int
+    mines: int
+    mines_placed: bool
+    state: str
+    clicks: int
+    revealed_count: int
+    flagged_count: int
+    exploded: int
+    elapsed: int
+
+
+class Layout(NamedTuple):
+    """Byte offsets of the sections of a save file for `cells` cells."""
+    cells: int
+    mines: int
+    revealed: int
+    flagged: int
+    exploded: int
+    adjacency: int
+    size: int
+
+    @classmethod
+    def for_cells(cls, n: int) -> 'Layout':
+        plane = _pages((n + 7) // 8)
+        mines = PAGE_SIZE
+        return cls(n, mines, mines + plane, mines + 2 * plane, mines + 3 * plane, mines + 4 * plane,
+                   mines + 4 * plane + _pages((n + 1) // 2))
+
+    def player_planes(self) -> Tuple[Tuple[int, int], ...]:
+        """Return ``(offset, cell bit)`` of the planes that hold player state."""
+        return (self.revealed, REVEALED), (self.flagged, FLAGGED), (self.exploded, EXPLODED)
+
+
+def _pages(nbytes: int) -> int:
+    """Round `nbytes` up to whole pages."""
+    return -(-nbytes // PAGE_SIZE) * PAGE_SIZE
+
+
+def pack_bits(cells: bytes, bit: int) -> bytes:
+    """Return one bit per packed cell byte: set where the cell has `bit`."""
+    if not cells:
+        return b''
+    # one digit per cell, last cell first, parsed as a binary number
+    digits = bytes(cells).translate(_BIT_DIGITS[bit])[::-1]
+    return int(digits, 2).to_bytes((len(cells) + 7) // 8, 'little')
+
+
+def unpack_bits(plane: bytes, n: int, bit: int) -> bytes:
+    """Inverse of `pack_bits`: return `n` bytes holding `bit` where the plane bit is set, else 0."""
+    if not n:
+        return b''
+    digits = format(int.from_bytes(plane, 'little'), 'b').encode()
+    digits = digits.rjust(len(plane) * 8, b'0')[::-1][:n]
+    return digits.translate(_DIGIT_VALUES[bit])
+
+
+def pack_nibbles(cells: bytes) -> bytes:
+    """Return the adjacency counts of packed cell bytes, two cells per byte."""
+    even = bytes(cells[0::2]).translate(_HIGH_TO_LOW)
+    odd = bytes(cells[1::2]).translate(_KEEP_HIGH).ljust(len(even), b'\0')
+    merged = int.from_bytes(even, 'little') | int.from_bytes(odd, 'little')
+    return merged.to_bytes(len(even), 'little')
+
+
+def unpack_nibbles(plane: bytes, n: int) -> bytes:
+    """Inverse of `pack_nibbles`: packed cell bytes with only the adjacency set."""
+    out = bytearray(2 * len(plane))
+    out[0::2] = bytes(plane).translate(_LOW_TO_HIGH)
+    out[1::2] = bytes(plane).translate(_KEEP_HIGH)
+    return bytes(out[:n])
+
+
+def _cell_bytes(board, start: int, stop: int) -> bytes:
+    """Return cells [start, stop) of an in-memory board as packed cell bytes."""
+    if isinstance(board, PackedBoard):
+        return bytes(board.cells[start:stop])
+    grid, w = board.grid, board.width
+    out = bytearray(stop - start)
+    for i in range(start, stop):
+        c = grid[i // w][i % w]
+        out[i - start] = ((MINE if c.mine else 0) | (REVEALED if c.revealed else 0) | (FLAGGED if c.flagged else 0)
+                          | (EXPLODED if c.exploded else 0) | (c.adjacent << ADJ_SHIFT))
+    return bytes(out)
+
+
+def _player_state(data, layout: Layout) -> bytes:
+    """Return the `Board.player_state()` bytes held by the revealed, flagged and exploded planes of `data`."""
+    n = layout.cells
+    nbytes = (n + 7) // 8
+    state = 0
+    for offset, bit in layout.player_planes():
+        state |= int.from_bytes(unpack_bits(data[offset:offset + nbytes], n, bit), 'little')
+    return state.to_bytes(n, 'little')
+
+
+def _header(engine: GameEngine, elapsed: int) -> bytes:
+    board = engine.board
+    exploded = -1 if board.exploded is None else board.exploded[1] * board.width + board.exploded[0]
+    return HEADER.pack(MAGIC, VERSION, FLAG_MINES_PLACED if board.mines_placed else 0,
+                       board.width, board.height, board.mines, engine.clicks, board.revealed_count,
+                       board.flagged_count, exploded, int(elapsed), STATES.index(engine.state))
+
+
+def read_header(path: str) -> SaveInfo:
+    """Read and check the header of the save file at `path`."""
+    with open(path, 'rb') as f:
+        data = f.read(HEADER.size)
+    return _parse_header(path, data)
+
+
+def _parse_header(path: str, data: bytes) -> SaveInfo:
+    if len(data) < HEADER.size or data[:4] != MAGIC:
+        raise SaveError(f"{path}: not a save file")
+    (_, version, flags, width, height, mines, clicks, revealed, flagged,
+     exploded, elapsed, state) = HEADER.unpack_from(data)
+    if version != VERSION or state >= len(STATES):
+        raise SaveError(f"{path}: unsupported save version {version}")
+    return SaveInfo(width, height, mines, bool(flags & FLAG_MINES_PLACED), STATES[state],
+                    clicks, revealed, flagged, exploded, elapsed)
+
+
+def resumable(path: str) -> bool:
+    """Return True if `path` holds a save of a game still in progress."""
+    try:
+        return read_header(path).state == PLAYING
+    except (OSError, SaveError):
+        return False
+
+
+class _PlaneCells:
+    """`bytearray`-like packed cell bytes (see `packed_board`) stored in the planes of a mapped save.
+
+    Reads assemble the byte from the mine, revealed, flagged and exploded
+    bits and the adjacency nibble; writes split it up again. Every written
+    page is recorded in `dirty_pages` (as a page number of the file).
+    """
+
+    __slots__ = ('_data', '_layout', 'dirty_pages')
+
+    def __init__(self, data: mmap.mmap, layout: Layout):
+        self._data = data
+        self._layout = layout
+        self.dirty_pages = set()
+
+    def __len__(self) -> int:
+        return self._layout.cells
+
+    def __getitem__(self, i: int) -> int:
+        data, layout = self._data, self._layout
+        byte = i >> 3
+        bit = 1 << (i & 7)
+        b = (data[layout.adjacency + (i >> 1)] << (0 if i & 1 else ADJ_SHIFT)) & 0xF0
+        if data[layout.mines + byte] & bit:
+            b |= MINE
+        if data[layout.revealed + byte] & bit:
+            b |= REVEALED
+        if data[layout.flagged + byte] & bit:
+            b |= FLAGGED
+        if data[layout.exploded + byte] & bit:
+            b |= EXPLODED
+        return b
+
+    def _set_bit(self, offset: int, bit: int, value: bool):
+        old = self._data[offset]
+        new = old | bit if value else old & ~bit
+        if new != old:
+            self._data[offset] = new
+            self.dirty_pages.add(offset // PAGE_SIZE)
+
+    def __setitem__(self, i: int, value: int):
+        layout = self._layout
+        byte = i >> 3
+        bit = 1 << (i & 7)
+        self._set_bit(layout.mines + byte, bit, value & MINE)
+        self._set_bit(layout.revealed + byte, bit, value & REVEALED)
+        self._set_bit(layout.flagged + byte, bit, value & FLAGGED)
+        self._set_bit(layout.exploded + byte, bit, value & EXPLODED)
+        offset = layout.adjacency + (i >> 1)
+        old = self._data[offset]
+        adj = value >> ADJ_SHIFT
+        new = (old & 0x0F) | (adj << 4) if i & 1 else (old & 0xF0) | adj
+        if new != old:
+            self._data[offset] = new
+            self.dirty_pages.add(offset // PAGE_SIZE)
+
+    def zero(self):
+        """Clear every cell, page by page; only pages that held something become dirty."""
+        data, layout = self._data, self._layout
+        zero = bytes(PAGE_SIZE)
+        for page in range(layout.mines // PAGE_SIZE, layout.size // PAGE_SIZE):
+            start = page * PAGE_SIZE
+            if data[start:start + PAGE_SIZE] != zero:
+                data[start:start + PAGE_SIZE] = zero
+                self.dirty_pages.add(page)
+
+    def last_exploded(self) -> int:
+        """Return the highest cell index with the exploded bit, or -1."""
+        start = self._layout.exploded
+        plane = self._data[start:start + (self._layout.cells + 7) // 8].rstrip(b'\0')
+        return -1 if not plane else (len(plane) - 1) * 8 + plane[-1].bit_length() - 1
+
+
+class MappedBoard(PackedBoard):
+    """`PackedBoard` whose cells live in a copy-on-write memory map of a save file.
+
+    Opening maps the file without reading it; cells are decoded on access
+    through `_PlaneCells`, so the flood fill and cell views of
+    `PackedBoard` work unchanged and only touched pages are read. Changes
+    stay private to the process until `save()` writes the dirty pages and
+    the header back. Whole-board operations (mine placement, the loss and
+    win sweeps) work cell by cell and are slow on huge boards; the
+    running counters come from the header.
+    """
+
+    # a new game must not clear the mapped save in place
+    reusable = False
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        info = _parse_header(path, self._map[:HEADER.size])
+        self.width = info.width
+        self.height = info.height
+        self.mines = info.mines
+        self.layout = Layout.for_cells(info.width * info.height)
+        if len(self._map) < self.layout.size:
+            self._map.close()
+            raise SaveError(f"{path}: truncated save file")
+        self.cells = _PlaneCells(self._map, self.layout)
+        self.mines_placed = info.mines_placed
+        self.revealed_count = info.revealed_count
+        self._flag_count = info.flagged_count
+        self.exploded = None if info.exploded < 0 else (info.exploded % self.width, info.exploded // self.width)
+        self._mine_indices = None
+
+    @property
+    def mine_indices(self):
+        """Flat indices of the mines, decoded from the mine plane on first use."""
+        if self._mine_indices is None:
+            plane = self._map[self.layout.mines:self.layout.mines + (self.layout.cells + 7) // 8]
+            self._mine_indices = [i * 8 + k for i, b in enumerate(plane) if b for k in range(8) if b >> k & 1]
+        return self._mine_indices
+
+    @mine_indices.setter
+    def mine_indices(self, value):
+        self._mine_indices = list(value)
+
+    @property
+    def safe_left(self) -> int:
+        """Return the number of non-mine cells that are still covered."""
+        return self.width * self.height - self.mines - self.revealed_count
+
+    def set_mines(self, mine_indices):
+        """Place mines at the given flat indices, cell by cell; see `Board.set_mines`."""
+        cells = self.cells
+        old = set(self.mine_indices) if self.mines_placed else set()
+        new = set(int(i) for i in mine_indices)
+        w, h = self.width, self.height
+        touched = set()
+        for i in old ^ new:
+            y, x = divmod(i, w)
+            for ny in range(max(0, y - 1), min(h, y + 2)):
+                touched.update(range(ny * w + max(0, x - 1), ny * w + min(w, x + 2)))
+        for i in touched:
+            y, x = divmod(i, w)
+            adj = sum(1 for ny in range(max(0, y - 1), min(h, y + 2))
+                      for nx in range(max(0, x - 1), min(w, x + 2))
+                      if (ny * w + nx) in new and (nx, ny) != (x, y))
+            cells[i] = (cells[i] & (REVEALED | FLAGGED | EXPLODED)) | (MINE if i in new else 0) | (adj << ADJ_SHIFT)
+        self.mine_indices = mine_indices
+        self.mines_placed = True
+        self._record(mines_placed=True)
+
+    def remove_mines(self):
+        """Take the mine layout off the board again, cell by cell; see `Board.remove_mines`."""
+        cells = self.cells
+        w, h = self.width, self.height
+        touched = set()
+        for i in self.mine_indices:
+            y, x = divmod(int(i), w)
+            for ny in range(max(0, y - 1), min(h, y + 2)):
+                touched.update(range(ny * w + max(0, x - 1), ny * w + min(w, x + 2)))
+        for i in touched:
+            cells[i] &= REVEALED | FLAGGED | EXPLODED
+        self.mine_indices = ()
+        self.mines_placed = False
+        self._record(mines_placed=True)
+
+    def clear(self):
+        """Make this an empty board again, zeroing the mapped planes; see `Board.clear`.
+
+        Like any other change this stays private until `save()`; the engine
+        still starts a new game on a new board (see `reusable`).
+        """
+        self.cells.zero()
+        self.mines_placed = False
+        self._reset_counters()
+        self.notify_reset()
+
+    def reveal_all_mines(self):
+        """Reveal all mines on the board (used when the player loses)."""
+        if self._listeners:
+            self._record(revealed=self._mines_without(REVEALED))
+        cells = self.cells
+        for i in self.mine_indices:
+            cells[i] |= REVEALED
+
+    def flag_all_mines(self):
+        """Flag every mine (used to auto-flag the remaining mines on a win)."""
+        if self._listeners:
+            self._record(flagged=self._mines_without(FLAGGED))
+        cells = self.cells
+        for i in self.mine_indices:
+            if not cells[i] & FLAGGED:
+                cells[i] |= FLAGGED
+                self._flag_count += 1
+
+    def player_state(self) -> bytes:
+        """Return the revealed/flagged/exploded bits of every cell; see `Board.player_state`."""
+        return _player_state(self._map, self.layout)
+
+    def load_player_state(self, state: bytes):
+        """Overwrite the player state of every cell; see `Board.load_player_state`."""
+        for i, b in enumerate(state):
+            self.cells[i] = (self.cells[i] & ~(REVEALED | FLAGGED | EXPLODED)) | b
+        self.revealed_count = sum(1 for i, b in enumerate(state) if b & REVEALED and not self.cells[i] & MINE)
+        self._flag_count = sum(1 for b in state if b & FLAGGED)
+        e = self.cells.last_exploded()
+        self.exploded = None if e < 0 else (e % self.width, e // self.width)
+        self.notify_reset()
+
+    def save(self, engine: GameEngine, elapsed: int, path: Optional[str] = None):
+        """Write the pages changed since the last save and the header to `path` (default: own file)."""
+        with open(path or self.path, 'r+b') as f:
+            for page in sorted(self.cells.dirty_pages):
+                f.seek(page * PAGE_SIZE)
+                f.write(self._map[page * PAGE_SIZE:(page + 1) * PAGE_SIZE])
+            f.seek(0)
+            f.write(_header(engine, elapsed))
+        self.cells.dirty_pages.clear()
+
+    def close(self):
+        """Release the memory map; unsaved changes are dropped."""
+        self._map.close()
+
+
+class SaveFile:
+    """Autosave target for one game at a time.
+
+    Public methods:
+      - reset(): the engine started a new game; the next save rewrites the file
+      - mark(indices): flat cell indices changed since the last save
+      - layout_changed(): the mines were placed or removed (a batch with
+        `mines_placed`); the next save rewrites the file
+      - save(engine, elapsed): write the game
+
+    The first save of a game, and the first after the mine layout
+    changed, write the whole file (to a temporary name, then renamed). Later saves
+    only rewrite the revealed and flagged pages that hold marked cells,
+    plus the header.
+    """
+
+    def __init__(self, path: str = AUTOSAVE_PATH):
+        self.path = path
+        self._pages = set()
+        self._full = True
+        self._layout_saved = False
+
+    def reset(self):
+        """Start over with a new game: the next save writes the whole file."""
+        self._pages.clear()
+        self._full = True
+        self._layout_saved = False
+
+    def layout_changed(self):
+        """Record a new (or no) mine layout, so the next save writes the mine and count planes too.
+
+        Undoing the first click removes the mines, and the next click
+        places different ones; a page write would keep the old layout.
+        """
+        self._full = True
+
+    def mark(self, indices: Iterable[int]):
+        """Record changed cells so the next save rewrites their pages."""
+        self._pages.update(int(i) // CELLS_PER_PAGE for i in indices)
+
+    def save(self, engine: GameEngine, elapsed: int = 0):
+        """Write `engine`'s game, incrementally when possible."""
+        board = engine.board
+        if isinstance(board, MappedBoard) and os.path.abspath(board.path) == os.path.abspath(self.path):
+            board.save(engine, elapsed)
+        elif self._full or (board.mines_placed and not self._layout_saved) or not os.path.exists(self.path):
+            self._write_full(engine, elapsed)
+        else:
+            self._write_pages(engine, elapsed)
+        self._pages.clear()
+        self._full = False
+        self._layout_saved = board.mines_placed
+
+    def _write_full(self, engine: GameEngine, elapsed: int):
+        board = engine.board
+        n = board.width * board.height
+        layout = Layout.for_cells(n)
+        cells = _cell_bytes(board, 0, n)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.truncate(layout.size)
+            f.write(_header(engine, elapsed))
+            for offset, data in ((layout.mines, pack_bits(cells, MINE)),
+                                 (layout.revealed, pack_bits(cells, REVEALED)),
+                                 (layout.flagged, pack_bits(cells, FLAGGED)),
+                                 (layout.exploded, pack_bits(cells, EXPLODED)),
+                                 (layout.adjacency, pack_nibbles(cells))):
+                f.seek(offset)
+                f.write(data)
+        os.replace(tmp, self.path)
+
+    def _write_pages(self, engine: GameEngine, elapsed: int):
+        board = engine.board
+        n = board.width * board.height
+        layout = Layout.for_cells(n)
+        with open(self.path, 'r+b') as f:
+            for page in sorted(self._pages):
+                start = page * CELLS_PER_PAGE
+                cells = _cell_bytes(board, start, min(n, start + CELLS_PER_PAGE))
+                for offset, bit in layout.player_planes():
+                    f.seek(offset + page * PAGE_SIZE)
+                    f.write(pack_bits(cells, bit))
+            f.seek(0)
+            f.write(_header(engine, elapsed))
+
+
+class _ResumedEngine(GameEngine):
+    """`GameEngine` whose first board is a loaded one; later resets start fresh boards."""
+
+    def __init__(self, board):
+        self._resumed = board
+        super().__init__(board.width, board.height, board.mines)
+
+    def _new_board(self):
+        board, self._resumed = self._resumed, None
+        return board if board is not None else super()._new_board()
+
+
+def load_game(path: str = AUTOSAVE_PATH, mapped: Optional[bool] = None) -> Tuple[GameEngine, int]:
+    """Load a save file; return ``(engine, elapsed seconds)``.
+
+    `mapped` chooses a `MappedBoard` over the file; by default it is used
+    from `SAVE_MAPPED_MIN_CELLS` cells on. Otherwise the planes are decoded
+    into a board from `packed_board.make_board`.
+    """
+    info = read_header(path)
+    n = info.width * info.height
+    if mapped is None:
+        mapped = n >= SAVE_MAPPED_MIN_CELLS
+    if mapped:
+        board = MappedBoard(path)
+    else:
+        layout = Layout.for_cells(n)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < layout.size:
+            raise SaveError(f"{path}: truncated save file")
+        nbytes = (n + 7) // 8
+        board = make_board(info.width, info.height, info.mines)
+        if info.mines_placed:
+            mines = unpack_bits(data[layout.mines:layout.mines + nbytes], n, MINE)
+            board.set_mines([m.start() for m in re.finditer(b'\x01', mines)])
+        board.load_player_state(_player_state(data, layout))
+        # the header knows which explosion came last
+        if info.exploded >= 0:
+            board.exploded = (info.exploded % info.width, info.exploded // info.width)
+    engine = _ResumedEngine(board)
+    engine.state = info.state
+    engine.clicks = info.clicks
+    return engine, info.elapsed
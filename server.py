@@ -0,0 +1,356 @@
+"""Asyncio game server hosting many concurrent games in one process.
+
+Clients talk line-delimited JSON over TCP: every request is one JSON
+object on one line, and the server answers each with one line, in order.
+A connection may drive any number of sessions, and a session outlives its
+connection until it is closed or evicted, so a client can reconnect and
+carry on. Run from the repository root:
+
+    python server.py [--host HOST] [--port PORT]
+
+Requests (`op` selects the action; an `id` member is echoed in the reply):
+
+    {"op": "new", "size": "expert"}         size: preset or [cols, rows, mines]
+    {"op": "click", "session": S, "x": 3, "y": 4}     also "flag", "chord"
+    {"op": "reset", "session": S}           new board of the same size
+    {"op": "view", "session": S}            full board, for (re)connecting clients
+    {"op": "close", "session": S}
+    {"op": "stats"}                         live sessions and server memory
+
+Actions only send the cells they changed: ``"cells"`` lists flat indices
+(``y * width + x``) and ``"values"`` holds one character per listed cell:
+``.`` covered, ``F`` flagged, ``0``-``8`` revealed number, ``*`` revealed
+mine, ``X`` the exploded mine. ``view`` returns the whole board as such a
+string (row by row). Every game reply also carries ``state`` and
+``mines_left``; failures are ``{"error": message}``.
+
+To keep a session small every game uses a `packed_board.PackedBoard` (one
+byte per cell) that `reset` clears in place, and changes are encoded
+straight from the cell bytes. Sessions are kept in least-recently-used
+order, so evicting the ones idle for `SERVER_IDLE_TIMEOUT` seconds only
+looks at the oldest. `python -m benchmarks.server_load` reports action
+latency and sessions per GB of RAM.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import sys
+import time
+from collections import OrderedDict
+
+from config import DIFFICULTIES, SERVER_HOST, SERVER_PORT, SERVER_IDLE_TIMEOUT, SERVER_MAX_SESSIONS
+from config import SERVER_MAX_CELLS
+from engine import GameEngine
+from packed_board import ADJ_SHIFT, EXPLODED, FLAGGED, MINE, REVEALED, PackedBoard
+
+# How often (seconds) idle sessions are looked for
+EVICT_INTERVAL = 10
+
+
+def _visible(b: int) -> int:
+    """Return the character code a player sees for packed cell byte `b`."""
+    if b & EXPLODED:
+        return ord('X')
+    if b & REVEALED:
+        return ord('*') if b & MINE else ord('0') + (b >> ADJ_SHIFT)
+    return ord('F') if b & FLAGGED else ord('.')
+
+
+# packed cell byte -> visible character, for bytes.translate
+VISIBLE = bytes(_visible(b) for b in range(256))
+
+
+class ProtocolError(ValueError):
+    """A request the server cannot carry out; its message is sent to the client."""
+
+
+class _SessionEngine(GameEngine):
+    """`GameEngine` that always plays on a `PackedBoard`, whatever the board size."""
+
+    def _new_board(self):
+        if self.board is None:
+            return PackedBoard(self.width, self.height, self.mines)
+        return super()._new_board()
+
+
+class Session:
+    """One game hosted by the server."""
+
+    __slots__ = ('id', 'engine', 'last_active')
+
+    def __init__(self, session_id: str, engine: GameEngine, now: float):
+        self.id = session_id
+        self.engine = engine
+        self.last_active = now
+
+
+def board_size(size):
+    """Return (cols, rows, mines) for a preset name or a ``[cols, rows, mines]`` list.
+
+    Raises `ProtocolError` for unknown presets and invalid or too large boards.
+    """
+    if isinstance(size, str):
+        if size not in DIFFICULTIES:
+            raise ProtocolError(f"unknown size {size!r}; use one of {sorted(DIFFICULTIES)} or [cols, rows, mines]")
+        return DIFFICULTIES[size]
+    try:
+        cols, rows, mines = (int(v) for v in size)
+    except (TypeError, ValueError, OverflowError):
+        raise ProtocolError("size must be a preset name or [cols, rows, mines]") from None
+    if cols < 1 or rows < 1 or not 0 <= mines <= cols * rows - 9:
+        raise ProtocolError(f"invalid board {cols}x{rows} with {mines} mines")
+    if cols * rows > SERVER_MAX_CELLS:
+        raise ProtocolError(f"board too large: {cols * rows} cells (at most {SERVER_MAX_CELLS})")
+    return cols, rows, mines
+
+
+def _name(request: dict, field: str):
+    """Return ``request[field]`` (None if missing), which names an op or a session.
+
+    Raises `ProtocolError` unless it is a string or integer: anything else
+    (a list, an object) could not even be looked up.
+    """
+    value = request.get(field)
+    if value is not None and not isinstance(value, (str, int)):
+        raise ProtocolError(f"{field} must be a string")
+    return value
+
+
+def rss_bytes():
+    """Return the resident memory of this process in bytes, or None if it cannot be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # peak, not current, usage; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class GameServer:
+    """Hosts the sessions and answers protocol requests.
+
+    `handle(request)` carries out one decoded request and returns the reply
+    object; it does not touch the network, so it can also be driven
+    directly. `serve()` exposes it over TCP.
+
+    Public methods:
+      - handle(request): answer one request
+      - evict_idle(now): drop sessions idle for longer than `idle_timeout`
+      - serve(host, port): start listening; returns the `asyncio.Server`
+    """
+
+    def __init__(self, idle_timeout=SERVER_IDLE_TIMEOUT, max_sessions=SERVER_MAX_SESSIONS, clock=time.monotonic):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.clock = clock
+        # session id -> Session, least recently used first
+        self.sessions = OrderedDict()
+        self.evicted = 0
+        self._evictor = None
+        self._ops = {
+            'new': self._new,
+            'click': self._action,
+            'flag': self._action,
+            'chord': self._action,
+            'reset': self._reset,
+            'view': self._view,
+            'close': self._close,
+            'stats': self._stats,
+        }
+
+    def handle(self, request) -> dict:
+        """Carry out one request and return its reply (an error reply if it fails)."""
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                raise ProtocolError('request must be a JSON object')
+            op = self._ops.get(_name(request, 'op'))
+            if op is None:
+                raise ProtocolError(f"unknown op {request.get('op')!r}; use one of {sorted(self._ops)}")
+            reply = op(request)
+        except ProtocolError as e:
+            reply = {'error': str(e)}
+        if request_id is not None:
+            reply['id'] = request_id
+        return reply
+
+    def evict_idle(self, now=None) -> int:
+        """Drop the sessions without a request for `idle_timeout` seconds; return how many."""
+        deadline = (self.clock() if now is None else now) - self.idle_timeout
+        sessions = self.sessions
+        count = 0
+        while sessions:
+            session = next(iter(sessions.values()))
+            if session.last_active > deadline:
+                break
+            del sessions[session.id]
+            count += 1
+        self.evicted += count
+        return count
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT):
+        """Start accepting clients on (host, port) and evicting idle sessions; return the server."""
+        server = await asyncio.start_server(self._client, host, port)
+        self._evictor = asyncio.ensure_future(self._evict_periodically())
+        return server
+
+    async def _evict_periodically(self):
+        while True:
+            await asyncio.sleep(EVICT_INTERVAL)
+            self.evict_idle()
+
+    async def _client(self, reader, writer):
+        """Answer the requests of one connection until it closes."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # a request line longer than the stream limit
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    reply = {'error': 'invalid JSON'}
+                else:
+                    reply = self.handle(request)
+                writer.write(json.dumps(reply, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _session(self, request) -> Session:
+        """Return the session named in `request` and mark it as just used."""
+        session = self.sessions.get(_name(request, 'session'))
+        if session is None:
+            raise ProtocolError('unknown session (closed or evicted)')
+        session.last_active = self.clock()
+        self.sessions.move_to_end(session.id)
+        return session
+
+    @staticmethod
+    def _game_state(engine) -> dict:
+        return {'state': engine.state, 'mines_left': engine.mines_left}
+
+    def _new(self, request):
+        cols, rows, mines = board_size(request.get('size', 'beginner'))
+        if len(self.sessions) >= self.max_sessions:
+            self.evict_idle()
+            if len(self.sessions) >= self.max_sessions:
+                raise ProtocolError('server full, try again later')
+        session_id = secrets.token_urlsafe(9)
+        engine = _SessionEngine(cols, rows, mines)
+        self.sessions[session_id] = Session(session_id, engine, self.clock())
+        reply = {'session': session_id, 'width': cols, 'height': rows, 'mines': mines}
+        reply.update(self._game_state(engine))
+        return reply
+
+    def _action(self, request):
+        engine = self._session(request).engine
+        try:
+            x, y = int(request['x']), int(request['y'])
+        except (KeyError, TypeError, ValueError, OverflowError):
+            raise ProtocolError('x and y must be integers') from None
+        changed = getattr(engine, request['op'])(x, y)
+        # a loss or win lists the mines after the cells that were revealed; send each cell once
+        cells = list(dict.fromkeys(changed)) if changed else []
+        board = engine.board.cells
+        reply = self._game_state(engine)
+        reply['cells'] = cells
+        reply['values'] = bytes(VISIBLE[board[i]] for i in cells).decode('ascii')
+        return reply
+
+    def _reset(self, request):
+        engine = self._session(request).engine
+        engine.reset()
+        reply = self._game_state(engine)
+        reply['reset'] = True
+        return reply
+
+    def _view(self, request):
+        engine = self._session(request).engine
+        reply = {'width': engine.width, 'height': engine.height, 'mines': engine.mines}
+        reply.update(self._game_state(engine))
+        reply['board'] = engine.board.cells.translate(VISIBLE).decode('ascii')
+        return reply
+
+    def _close(self, request):
+        session = self._session(request)
+        del self.sessions[session.id]
+        return {'closed': True}
+
+    def _stats(self, request):
+        return {'sessions': len(self.sessions), 'evicted': self.evicted, 'rss_bytes': rss_bytes()}
+
+
+class GameClient:
+    """Minimal asyncio client for `GameServer`, one request at a time.
+
+    Public methods:
+      - connect(host, port): open a connection (classmethod, awaitable)
+      - request(op, **fields): send one request and return the decoded reply
+      - close()
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host=SERVER_HOST, port=SERVER_PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op, **fields) -> dict:
+        fields['op'] = op
+        self.writer.write(json.dumps(fields, separators=(',', ':')).encode() + b'\n')
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError('server closed the connection')
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _serve_forever(args):
+    game_server = GameServer(idle_timeout=args.idle_timeout, max_sessions=args.max_sessions)
+    server = await game_server.serve(args.host, args.port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"listening on {host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Host Minesweeper games for network clients (line-delimited JSON).')
+    parser.add_argument('--host', default=SERVER_HOST, help=f"interface to listen on (default: {SERVER_HOST})")
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help=f"TCP port, 0 picks a free one (default: {SERVER_PORT})")
+    parser.add_argument('--idle-timeout', type=float, default=SERVER_IDLE_TIMEOUT,
+                        help='seconds without a request before a session is evicted')
+    parser.add_argument('--max-sessions', type=int, default=SERVER_MAX_SESSIONS, help='live session limit')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+"""Parallel batch simulation runner for win-rate and timing studies.
+
+Plays many headless games per difficulty with a pluggable policy, spread
+across a process pool, and streams aggregated results instead of keeping
+every game in memory. Run from the repository root:
+
+    python simulate.py --games 100000 --policy simple expert intermediate
+    python simulate.py --games 10000 --size 50x50x400 --workers 8 --json
+
+Reproducibility: games are played in chunks and every chunk seeds the
+`random` module from (seed, board size, chunk index), so the totals do not
+depend on the number of workers or on which worker ran which chunk.
+
+Policies are objects with two methods:
+
+    start(engine, rng)  called once per game before the first move
+    move(changed)       return ('click' | 'flag' | 'chord', x, y); `changed`
+                        holds the cell indices changed by the previous move
+
+Built-in policies are listed in `POLICIES`; any other policy can be given
+as ``module:attribute`` naming a zero-argument policy factory.
+"""
+
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Iterator, List, Tuple
+
+from config import DIFFICULTIES
+from engine import GameEngine, WON
+from mines import neighbor_table
+from solver import Solver
+
+# reveal-size histogram buckets: bucket k counts reveals of 2**k .. 2**(k+1)-1 cells
+HISTOGRAM_BUCKETS = 24
+
+
+class RandomPolicy:
+    """Clicks a uniformly random covered, unflagged cell every move."""
+
+    def start(self, engine, rng):
+        self.engine = engine
+        self.rng = rng
+        self.width = engine.width
+        # flat list of the board's cells, indexed like the engine's change lists
+        self.cells = [cell for row in engine.board.grid for cell in row]
+        self.covered = list(range(len(self.cells)))
+
+    def move(self, changed):
+        return self._guess()
+
+    def _guess(self):
+        cells = self.cells
+        covered = self.covered
+        while True:
+            # lazily drop cells that have been revealed since they were listed
+            k = self.rng.randrange(len(covered))
+            i = covered[k]
+            if not cells[i].revealed and not cells[i].flagged:
+                y, x = divmod(i, self.width)
+                return 'click', x, y
+            covered[k] = covered[-1]
+            covered.pop()
+
+
+class SimpleSolverPolicy(RandomPolicy):
+    """Deterministic single-cell rules, guessing at random only when stuck.
+
+    For every revealed number next to a changed cell:
+    - flags == number            -> every other covered neighbor is safe
+    - flags + covered == number  -> every covered neighbor is a mine
+    Only visible state (revealed numbers and flags) is used.
+    """
+
+    def start(self, engine, rng):
+        super().start(engine, rng)
+        self.neighbors = neighbor_table(engine.width, engine.height)
+        self.safe = []
+        self.mines = []
+
+    def move(self, changed):
+        if not self.engine.board.mines_placed:
+            # open in the middle, where the safe zone is largest
+            return 'click', self.width // 2, self.engine.height // 2
+        self._deduce(changed)
+        cells = self.cells
+        while self.mines:
+            i = self.mines.pop()
+            if not cells[i].flagged:
+                y, x = divmod(i, self.width)
+                return 'flag', x, y
+        while self.safe:
+            i = self.safe.pop()
+            if not cells[i].revealed and not cells[i].flagged:
+                y, x = divmod(i, self.width)
+                return 'click', x, y
+        return self._guess()
+
+    def _deduce(self, changed):
+        cells = self.cells
+        neighbors = self.neighbors
+        # numbers whose neighborhood changed: the changed cells and their neighbors
+        todo = set(changed)
+        for i in changed:
+            todo.update(neighbors[i])
+        for i in todo:
+            cell = cells[i]
+            if not cell.revealed or cell.mine or cell.adjacent == 0:
+                continue
+            covered, flags = [], 0
+            for n in neighbors[i]:
+                other = cells[n]
+                if other.flagged:
+                    flags += 1
+                elif not other.revealed:
+                    covered.append(n)
+            if not covered:
+                continue
+            if flags == cell.adjacent:
+                self.safe.extend(covered)
+            elif flags + len(covered) == cell.adjacent:
+                self.mines.extend(covered)
+
+
+class ProbabilitySolverPolicy:
+    """Plays with `solver.Solver`: certain moves first, then the safest guess.
+
+    Deduced safe cells are clicked and mines are never flagged (flags cost
+    a move and the solver does not need them). When nothing is certain the
+    cell with the lowest exact mine probability is clicked.
+    """
+
+    def start(self, engine, rng):
+        self.engine = engine
+        self.solver = None
+
+    def move(self, changed):
+        engine = self.engine
+        if not engine.board.mines_placed:
+            return 'click', engine.width // 2, engine.height // 2
+        if self.solver is None:
+            self.solver = Solver(engine.board)
+        else:
+            self.solver.update(changed)
+        hint = self.solver.hint()
+        if hint is not None and hint[0] == 'click':
+            return hint
+        x, y = self.solver.best_guess()
+        return 'click', x, y
+
+
+POLICIES = {
+    'random': RandomPolicy,
+    'simple': SimpleSolverPolicy,
+    'solver': ProbabilitySolverPolicy,
+}
+
+
+def load_policy(name):
+    """Return a policy factory for a built-in name or a ``module:attribute`` path."""
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, attr = name.partition(':')
+    if not attr:
+        raise ValueError(f"unknown policy {name!r}; use one of {sorted(POLICIES)} or module:attribute")
+    return getattr(importlib.import_module(module), attr)
+
+
+@dataclass
+class SimStats:
+    """Aggregated results for a batch of games; chunks are combined with `merge`."""
+    games: int = 0
+    wins: int = 0
+    clicks: int = 0
+    seconds: float = 0.0
+    # reveal-size histogram, see HISTOGRAM_BUCKETS
+    reveal_sizes: List[int] = field(default_factory=lambda: [0] * HISTOGRAM_BUCKETS)
+
+    def merge(self, other: 'SimStats'):
+        self.games += other.games
+        self.wins += other.wins
+        self.clicks += other.clicks
+        self.seconds += other.seconds
+        for k, n in enumerate(other.reveal_sizes):
+            self.reveal_sizes[k] += n
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def clicks_per_game(self) -> float:
+        return self.clicks / self.games if self.games else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'games': self.games,
+            'wins': self.wins,
+            'win_rate': self.win_rate,
+            'clicks_per_game': self.clicks_per_game,
+            'cpu_seconds': self.seconds,
+            'reveal_size_histogram': {f"{1 << k}-{(2 << k) - 1}": n
+                                      for k, n in enumerate(self.reveal_sizes) if n},
+        }
+
+
+def play_game(engine: GameEngine, policy, rng: random.Random, stats: SimStats):
+    """Play one game to the end on a freshly reset `engine`, adding it to `stats`."""
+    policy.start(engine, rng)
+    changed = ()
+    while not engine.is_over:
+        action, x, y = policy.move(changed)
+        if action == 'flag':
+            changed = engine.flag(x, y)
+            continue
+        changed = engine.click(x, y) if action == 'click' else engine.chord(x, y)
+        if changed:
+            stats.reveal_sizes[min(len(changed).bit_length() - 1, HISTOGRAM_BUCKETS - 1)] += 1
+    stats.games += 1
+    stats.clicks += engine.clicks
+    if engine.state == WON:
+        stats.wins += 1
+
+
+def run_chunk(task: Tuple[str, int, int, int, int, int, int]) -> SimStats:
+    """Play one chunk of games; the unit of work handed to pool workers."""
+    policy_name, width, height, mines, seed, chunk, games = task
+    # seed per chunk so results do not depend on worker count or scheduling
+    random.seed(f"{seed}:{width}x{height}x{mines}:{chunk}")
+    rng = random.Random(f"policy:{seed}:{width}x{height}x{mines}:{chunk}")
+    policy = load_policy(policy_name)()
+    stats = SimStats()
+    start = time.process_time()
+    for _ in range(games):
+        engine = GameEngine(width, height, mines)
+        play_game(engine, policy, rng, stats)
+    stats.seconds = time.process_time() - start
+    return stats
+
+
+def chunk_tasks(policy, size, games, chunk_size, seed) -> Iterator[tuple]:
+    """Yield the `run_chunk` tasks for `games` games of one board size."""
+    width, height, mines = size
+    for chunk, first in enumerate(range(0, games, chunk_size)):
+        yield policy, width, height, mines, seed, chunk, min(chunk_size, games - first)
+
+
+def parse_size(text):
+    """Parse a preset name or a custom ``COLSxROWSxMINES`` size."""
+    if text in DIFFICULTIES:
+        return text, DIFFICULTIES[text]
+    try:
+        cols, rows, mines = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a preset {sorted(DIFFICULTIES)} or COLSxROWSxMINES")
+    return text, (cols, rows, mines)
+
+
+def simulate(label, size, args, pool, out):
+    """Run all games for one size, streaming progress lines to `out`; return the totals."""
+    total = SimStats()
+    wall = time.perf_counter()
+    next_report = wall + args.report_every
+    tasks = chunk_tasks(args.policy, size, args.games, args.chunk, args.seed)
+    results = pool.imap_unordered(run_chunk, tasks) if pool else map(run_chunk, tasks)
+    for stats in results:
+        total.merge(stats)
+        now = time.perf_counter()
+        if not args.json and now >= next_report:
+            next_report = now + args.report_every
+            print(f"  {label}: {total.games}/{args.games} games, win rate {total.win_rate:.2%}, "
+                  f"{total.games / (now - wall):,.0f} games/s", file=out, flush=True)
+    result = total.to_dict()
+    result['games_per_second'] = total.games / (time.perf_counter() - wall)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play many headless Minesweeper games and report aggregate stats.')
+    parser.add_argument('sizes', nargs='*', type=parse_size,
+                        help='presets from config.DIFFICULTIES or COLSxROWSxMINES (default: all presets)')
+    parser.add_argument('--size', dest='extra_sizes', action='append', type=parse_size, default=[],
+                        help='custom COLSxROWSxMINES size (repeatable)')
+    parser.add_argument('--games', type=int, default=10000, help='games per size')
+    parser.add_argument('--policy', default='simple', help=f"one of {sorted(POLICIES)} or module:attribute")
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count, 1 = no pool)')
+    parser.add_argument('--chunk', type=int, default=1000, help='games per task handed to a worker')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report-every', type=float, default=2.0, help='seconds between progress lines')
+    parser.add_argument('--json', action='store_true', help='print one JSON document instead of text')
+    args = parser.parse_args(argv)
+    try:
+        load_policy(args.policy)  # fail fast on a bad policy name
+    except (ValueError, ImportError, AttributeError) as exc:
+        parser.error(str(exc))
+
+    sizes = args.sizes + args.extra_sizes
+    if not sizes:
+        sizes = [parse_size(name) for name in DIFFICULTIES]
+    pool = Pool(args.workers) if args.workers != 1 else None
+    report = {}
+    try:
+        for label, size in sizes:
+            result = simulate(label, size, args, pool, sys.stderr)
+            report[label] = result
+            if not args.json:
+                print(f"{label} {size[0]}x{size[1]}/{size[2]}: {result['games']} games, "
+                      f"win rate {result['win_rate']:.2%}, {result['clicks_per_game']:.1f} clicks/game, "
+                      f"{result['games_per_second']:,.1f} games/s")
+                print("  reveal sizes: " + ", ".join(f"{k}: {n}" for k, n in result['reveal_size_histogram'].items()))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
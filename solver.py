@@ -0,0 +1,633 @@
+"""Constraint-propagation solver and mine-probability engine.
+
+`Solver` looks only at a board's visible state: revealed numbers, flags
+and revealed mines. Every revealed number with covered neighbors is a
+constraint: "these covered cells hold exactly N mines", where N is the
+number minus the flags around it. Constraints that share cells form
+frontier components. Each component is solved in three stages:
+
+1. single-cell rules: N == 0 -> all safe, N == covered -> all mines
+2. pair rules between overlapping constraints (including subsets)
+3. exact enumeration of the cells still undetermined, with solutions
+   counted per mine count
+
+The per-component mine-count distributions are then combined with the
+global mine count (`board.mines`). Each frontier configuration is
+weighted by the number of ways to place the remaining mines in the
+interior, i.e. the covered cells next to no number. This gives the exact
+mine probability of every covered cell.
+
+The solver is incremental. `update(changed)` takes the flat indices
+returned by `GameEngine` actions and re-solves only the components whose
+constraints changed. The global combination is cheap; it is redone
+lazily the first time probabilities are read after an update.
+
+Flags are trusted as mines. A wrong flag can make the visible state
+impossible. A component with no solution reports no deductions; its
+cells get a density estimate. If no combination fits the global mine
+count, that count is ignored.
+"""
+
+from math import comb
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from mines import neighbor_table
+from packed_board import ADJ_SHIFT, FLAGGED, MINE, REVEALED, PackedBoard
+
+# Visible state codes returned by `visible_reader`; revealed numbers are 0-8
+COVERED = -1
+KNOWN_MINE = -2  # flagged, or a revealed mine
+
+# Groups with more undetermined cells than this are not enumerated; their
+# cells get a density estimate from their constraints instead
+MAX_EXACT_CELLS = 48
+
+
+def visible_reader(board):
+    """Return a function mapping a flat index to its visible state code.
+
+    The code is `COVERED`, `KNOWN_MINE` or the revealed number (0-8). A
+    cell's `mine` bit is read only once the cell is revealed, so the
+    solver never sees hidden state.
+    """
+    if isinstance(board, PackedBoard):
+        cells = board.cells
+
+        def read(i):
+            b = cells[i]
+            if b & FLAGGED:
+                return KNOWN_MINE
+            if not b & REVEALED:
+                return COVERED
+            return KNOWN_MINE if b & MINE else b >> ADJ_SHIFT
+        return read
+
+    flat = [cell for row in board.grid for cell in row]
+
+    def read(i):
+        cell = flat[i]
+        if cell.flagged:
+            return KNOWN_MINE
+        if not cell.revealed:
+            return COVERED
+        return KNOWN_MINE if cell.mine else cell.adjacent
+    return read
+
+
+class _Component:
+    """A connected set of constraints and its solved state.
+
+    `groups` holds ``(cells, dist)`` for every enumerated group of
+    undetermined cells, where ``dist[k] = (ways, per_cell)`` counts the
+    solutions with k mines and, per cell, how many of them put a mine
+    there. `estimates` maps the cells of groups too large to enumerate
+    to a density estimate.
+    """
+
+    __slots__ = ('numbers', 'safe', 'mines', 'groups', 'estimates', 'consistent')
+
+    def __init__(self, numbers: List[int]):
+        self.numbers = numbers
+        self.safe: Set[int] = set()
+        self.mines: Set[int] = set()
+        self.groups: List[Tuple[List[int], Dict[int, Tuple[int, List[int]]]]] = []
+        self.estimates: Dict[int, float] = {}
+        self.consistent = True
+
+
+def enumerate_group(cells: List[int], constraints: List[Tuple[int, Iterable[int]]]):
+    """Count the mine layouts of `cells` that satisfy every constraint.
+
+    `constraints` are ``(need, cells)`` pairs over `cells`. Returns
+    ``{k: (ways, per_cell)}`` where `ways` is the number of layouts with
+    k mines and ``per_cell[p]`` how many of those put a mine on
+    ``cells[p]``. An empty result means the constraints cannot be met.
+
+    Cells are assigned in order. What is left to count after cell p
+    depends only on the remaining needs of the constraints that straddle
+    p, so results are memoized on those needs. The frontier is a thin
+    band, so this stays far below the 2**n of plain backtracking as long
+    as `cells` is ordered along it.
+    """
+    n = len(cells)
+    pos = {c: p for p, c in enumerate(cells)}
+    need = [nd for nd, _ in constraints]
+    # unassigned cells per constraint
+    left = [len(cs) for _, cs in constraints]
+    of: List[List[int]] = [[] for _ in range(n)]
+    span = []
+    for j, (_, cs) in enumerate(constraints):
+        ps = [pos[c] for c in cs]
+        for p in ps:
+            of[p].append(j)
+        span.append((min(ps), max(ps)))
+    # constraints partly assigned when cell p is reached: their needs are the state
+    open_at = [tuple(j for j, (lo, hi) in enumerate(span) if lo < p <= hi) for p in range(n)]
+    memo: Dict[tuple, Dict[int, Tuple[int, List[int]]]] = {}
+
+    def count(p):
+        if p == n:
+            return {0: (1, [])}
+        key = (p, tuple([need[j] for j in open_at[p]]))
+        hit = memo.get(key)
+        if hit is not None:
+            return hit
+        out: Dict[int, Tuple[int, List[int]]] = {}
+        js = of[p]
+        # safe: every constraint must still fit its mines in the other cells
+        if all(left[j] > need[j] for j in js):
+            for j in js:
+                left[j] -= 1
+            for k, (ways, per) in count(p + 1).items():
+                out[k] = (ways, [0] + per)
+            for j in js:
+                left[j] += 1
+        # mine: every constraint must still be short of mines
+        if all(need[j] > 0 for j in js):
+            for j in js:
+                left[j] -= 1
+                need[j] -= 1
+            for k, (ways, per) in count(p + 1).items():
+                entry = out.get(k + 1)
+                if entry is None:
+                    out[k + 1] = (ways, [ways] + per)
+                else:
+                    out[k + 1] = (entry[0] + ways,
+                                  [ways + entry[1][0]] + [a + b for a, b in zip(entry[1][1:], per)])
+            for j in js:
+                left[j] += 1
+                need[j] += 1
+        memo[key] = out
+        return out
+
+    return count(0)
+
+
+def _convolve(a: Dict[int, int], b: Dict[int, int]) -> Dict[int, int]:
+    """Return the distribution of the summed mine count of two independent groups."""
+    out: Dict[int, int] = {}
+    for ka, wa in a.items():
+        for kb, wb in b.items():
+            out[ka + kb] = out.get(ka + kb, 0) + wa * wb
+    return out
+
+
+class Solver:
+    """Deductions and mine probabilities for the visible state of one board.
+
+    Public methods:
+      - update(changed=None): re-solve after the cells in `changed` changed
+        (all cells when omitted)
+      - probability(x, y): chance that (x,y) holds a mine
+      - hint(): a certain move, ``('click' | 'flag', x, y)``, or None
+      - best_guess(): the covered cell least likely to hold a mine
+
+    Results: `safe` and `mines` (flat indices of covered, unflagged cells
+    that are certainly safe or certainly mines), `probabilities` (per
+    frontier cell), `interior_probability` and `consistent`.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.width = board.width
+        self.height = board.height
+        self._read = visible_reader(board)
+        self._neighbors = neighbor_table(board.width, board.height)
+        # number index -> (mines still to place, undetermined covered neighbors)
+        self._constraints: Dict[int, Tuple[int, Tuple[int, ...]]] = {}
+        # frontier cell -> numbers that constrain it
+        self._watch: Dict[int, Set[int]] = {}
+        # number index -> its component
+        self._component: Dict[int, _Component] = {}
+        self._components: Set[_Component] = set()
+        # covered, unflagged cells settled by the rules; kept out of the
+        # constraints so that components stay small
+        self._known_safe: Set[int] = set()
+        self._known_mines: Set[int] = set()
+        # combined results, rebuilt lazily after each update
+        self._probabilities: Optional[Dict[int, float]] = None
+        self._safe: Set[int] = set()
+        self._mines: Set[int] = set()
+        self._interior = 0.0
+        self._global_ok = True
+        self.update()
+
+    # -- incremental constraint tracking ------------------------------------
+
+    def _constraint(self, i: int) -> Optional[Tuple[int, Tuple[int, ...]]]:
+        """Return the constraint of cell `i`, or None if it is satisfied or not a number."""
+        read = self._read
+        value = read(i)
+        if value < 0:
+            return None
+        known_safe = self._known_safe
+        known_mines = self._known_mines
+        cells = []
+        for n in self._neighbors[i]:
+            v = read(n)
+            if v == KNOWN_MINE or n in known_mines:
+                value -= 1
+            elif v == COVERED and n not in known_safe:
+                cells.append(n)
+        if not cells and value == 0:
+            return None
+        # a number left with mines to place but no cells is kept: it marks a contradiction
+        return value, tuple(cells)
+
+    def _refresh(self, i: int) -> bool:
+        """Rebuild the constraint of cell `i`; return True if it changed."""
+        constraints = self._constraints
+        watch = self._watch
+        old = constraints.get(i)
+        new = self._constraint(i)
+        if new == old:
+            return False
+        if old is not None:
+            del constraints[i]
+            for c in old[1]:
+                numbers = watch[c]
+                numbers.discard(i)
+                if not numbers:
+                    del watch[c]
+        if new is not None:
+            constraints[i] = new
+            for c in new[1]:
+                watch.setdefault(c, set()).add(i)
+        return True
+
+    def update(self, changed: Optional[Iterable[int]] = None):
+        """Re-solve after the cells in `changed` changed their visible state.
+
+        `changed` holds flat indices, e.g. the array returned by a
+        `GameEngine` action. Only the constraints around those cells are
+        rebuilt, and only the components containing them are solved again.
+        Without `changed` the whole board is rescanned.
+
+        Rule deductions are only as good as the flags they used, so a flag
+        the solver did not deduce (or a removed flag) forces a full rescan.
+        """
+        read = self._read
+        if changed is not None:
+            changed = set(changed)
+            for i in changed:
+                v = read(i)
+                if v == COVERED or (v == KNOWN_MINE and i not in self._known_mines and self._is_flag(i)):
+                    changed = None
+                    break
+                self._known_safe.discard(i)
+                self._known_mines.discard(i)
+        if changed is None:
+            touched: Iterable[int] = range(self.width * self.height)
+            for store in (self._constraints, self._watch, self._component, self._components,
+                          self._known_safe, self._known_mines):
+                store.clear()
+        else:
+            touched = set(changed)
+            for i in changed:
+                touched.update(self._neighbors[i])
+
+        pending = list(touched)
+        while pending:
+            seeds = set()
+            for i in pending:
+                if not self._refresh(i):
+                    continue
+                seeds.add(i)
+                stale = self._component.pop(i, None)
+                if stale is not None and stale in self._components:
+                    # its other constraints are regrouped below
+                    self._components.discard(stale)
+                    seeds.update(stale.numbers)
+            pending, consistent = self._regroup(seeds)
+            if not consistent and changed is not None:
+                # earlier deductions may rest on the wrong flag: start over
+                self.update()
+                return
+        self._probabilities = None
+
+    def _regroup(self, seeds: Set[int]) -> Tuple[List[int], bool]:
+        """Solve the components reachable from `seeds`.
+
+        Returns the numbers to refresh and whether every component was
+        consistent. Numbers next to cells the rules just settled are
+        returned so the caller can drop those cells from their constraints
+        and split the component.
+        """
+        constraints = self._constraints
+        watch = self._watch
+        refresh = []
+        consistent = True
+        done = set()
+        for seed in seeds:
+            if seed in done or seed not in constraints:
+                continue
+            numbers = [seed]
+            done.add(seed)
+            for n in numbers:
+                for c in constraints[n][1]:
+                    for m in watch[c]:
+                        if m not in done:
+                            done.add(m)
+                            numbers.append(m)
+            for n in numbers:
+                merged = self._component.get(n)
+                if merged is not None:
+                    self._components.discard(merged)
+            component = self._solve(numbers)
+            self._components.add(component)
+            for n in numbers:
+                self._component[n] = component
+            consistent = consistent and component.consistent
+            if component.safe or component.mines:
+                self._known_safe |= component.safe
+                self._known_mines |= component.mines
+                refresh.extend(numbers)
+        return refresh, consistent
+
+    def _is_flag(self, i: int) -> bool:
+        """Return True if cell `i` is flagged (not a revealed mine)."""
+        y, x = divmod(i, self.width)
+        return self.board.grid[y][x].flagged
+
+    # -- per-component solving ----------------------------------------------
+
+    def _solve(self, numbers: List[int]) -> _Component:
+        """Apply the deduction rules to one component, then enumerate what is left."""
+        component = _Component(numbers)
+        cons = {}
+        cell_cons: Dict[int, Set[int]] = {}
+        for n in numbers:
+            need, cells = self._constraints[n]
+            cons[n] = [need, set(cells)]
+            for c in cells:
+                cell_cons.setdefault(c, set()).add(n)
+
+        pending = set(numbers)
+
+        def resolve(cells, mine):
+            for c in list(cells):
+                (component.mines if mine else component.safe).add(c)
+                for m in cell_cons.pop(c):
+                    entry = cons[m]
+                    entry[1].discard(c)
+                    if mine:
+                        entry[0] -= 1
+                    pending.add(m)
+
+        while pending:
+            n = pending.pop()
+            need, cells = cons[n]
+            if need < 0 or need > len(cells):
+                component.consistent = False
+                break
+            if not cells:
+                continue
+            if need == 0:
+                resolve(cells, False)
+                continue
+            if need == len(cells):
+                resolve(cells, True)
+                continue
+            # pair rules: with x = mines outside the overlap,
+            # need_n - need_m == len(only_n) forces only_n full and only_m empty
+            others = set()
+            for c in cells:
+                others.update(cell_cons[c])
+            others.discard(n)
+            for m in others:
+                m_need, m_cells = cons[m]
+                only_n = cells - m_cells
+                only_m = m_cells - cells
+                if need - m_need == len(only_n):
+                    mines, safe = only_n, only_m
+                elif m_need - need == len(only_m):
+                    mines, safe = only_m, only_n
+                else:
+                    continue
+                if not mines and not safe:
+                    continue
+                resolve(mines, True)
+                resolve(safe, False)
+                pending.add(n)
+                break
+
+        if not component.consistent:
+            component.safe.clear()
+            component.mines.clear()
+            self._estimate(component, numbers)
+            return component
+
+        # split the undetermined cells into independent groups and enumerate each
+        seen = set()
+        for start in cell_cons:
+            if start in seen:
+                continue
+            group = [start]
+            seen.add(start)
+            group_cons = []
+            visited = set()
+            for c in group:
+                for m in cell_cons[c]:
+                    if m in visited:
+                        continue
+                    visited.add(m)
+                    group_cons.append(m)
+                    for other in cons[m][1]:
+                        if other not in seen:
+                            seen.add(other)
+                            group.append(other)
+            if len(group) > MAX_EXACT_CELLS:
+                self._estimate(component, group_cons, cons)
+                continue
+            dist = enumerate_group(group, [(cons[m][0], cons[m][1]) for m in group_cons])
+            if not dist:
+                component.consistent = False
+                component.safe.clear()
+                component.mines.clear()
+                component.groups.clear()
+                component.estimates.clear()
+                self._estimate(component, numbers)
+                return component
+            component.groups.append((group, dist))
+        return component
+
+    def _estimate(self, component: _Component, numbers: Iterable[int], cons=None):
+        """Give every cell of `numbers` the mean mine density of its constraints."""
+        sums: Dict[int, List[float]] = {}
+        for n in numbers:
+            need, cells = cons[n] if cons is not None else self._constraints[n]
+            if not cells:
+                continue
+            density = min(1.0, max(0.0, need / len(cells)))
+            for c in cells:
+                entry = sums.setdefault(c, [0.0, 0])
+                entry[0] += density
+                entry[1] += 1
+        for c, (total, count) in sums.items():
+            component.estimates[c] = total / count
+
+    # -- global combination -------------------------------------------------
+
+    def _combine(self):
+        """Combine all components with the global mine count into probabilities."""
+        board = self.board
+        probabilities: Dict[int, float] = dict.fromkeys(self._known_safe, 0.0)
+        probabilities.update(dict.fromkeys(self._known_mines, 1.0))
+        safe = set(self._known_safe)
+        mines = set(self._known_mines)
+        groups = []
+        fixed = float(len(mines))
+        for component in self._components:
+            for c, p in component.estimates.items():
+                probabilities[c] = p
+                fixed += p
+            groups.extend(component.groups)
+
+        covered = self.width * self.height - board.revealed_count - board.flagged_count
+        interior = max(0, covered - len(self._watch) - len(safe) - len(mines))
+        left = board.mines - board.flagged_count - round(fixed)
+
+        polys = [{k: ways for k, (ways, _) in dist.items()} for _, dist in groups]
+        prefix = [{0: 1}]
+        for poly in polys:
+            prefix.append(_convolve(prefix[-1], poly))
+        suffix = [{0: 1}]
+        for poly in reversed(polys):
+            suffix.append(_convolve(suffix[-1], poly))
+        suffix.reverse()
+
+        def weight(k):
+            rest = left - k
+            return comb(interior, rest) if 0 <= rest <= interior else 0
+
+        total = sum(ways * weight(k) for k, ways in prefix[-1].items())
+        self._global_ok = total > 0
+        if not total:
+            # no layout fits the mine count (wrong flags): weigh all layouts equally
+            def weight(k):
+                return 1
+            total = sum(prefix[-1].values())
+
+        for g, (cells, dist) in enumerate(groups):
+            others = _convolve(prefix[g], suffix[g + 1])
+            sums = [0] * len(cells)
+            for k, (_, per) in dist.items():
+                rest = sum(ways * weight(k + ko) for ko, ways in others.items())
+                if rest:
+                    for p, count in enumerate(per):
+                        sums[p] += count * rest
+            for p, c in enumerate(cells):
+                probabilities[c] = sums[p] / total
+                # compare the exact integers: a float ratio can round to 0 or 1
+                if sums[p] == 0:
+                    safe.add(c)
+                elif sums[p] == total:
+                    mines.add(c)
+
+        if interior and self._global_ok:
+            expected = sum(ways * weight(k) * (left - k) for k, ways in prefix[-1].items())
+            self._interior = expected / (total * interior)
+        elif interior:
+            frontier = sum(probabilities.values())
+            self._interior = min(1.0, max(0.0, (board.mines - board.flagged_count - frontier) / interior))
+        else:
+            self._interior = 0.0
+
+        self._probabilities = probabilities
+        self._safe = safe
+        self._mines = mines
+
+    def _results(self) -> Dict[int, float]:
+        if self._probabilities is None:
+            self._combine()
+        return self._probabilities
+
+    # -- queries ------------------------------------------------------------
+
+    @property
+    def consistent(self) -> bool:
+        """Return False if the flags and numbers cannot all be right."""
+        self._results()
+        return self._global_ok and all(c.consistent for c in self._components)
+
+    @property
+    def probabilities(self) -> Dict[int, float]:
+        """Return the mine probability of every frontier cell, by flat index."""
+        return self._results()
+
+    @property
+    def interior_probability(self) -> float:
+        """Return the mine probability of a covered cell next to no number."""
+        self._results()
+        return self._interior
+
+    @property
+    def safe(self) -> Set[int]:
+        """Return the covered, unflagged frontier cells that cannot hold a mine."""
+        self._results()
+        return self._safe
+
+    @property
+    def mines(self) -> Set[int]:
+        """Return the covered, unflagged frontier cells that must hold a mine."""
+        self._results()
+        return self._mines
+
+    def probability(self, x: int, y: int) -> float:
+        """Return the chance that (x,y) holds a mine given what the player can see."""
+        i = y * self.width + x
+        value = self._read(i)
+        if value == KNOWN_MINE:
+            return 1.0
+        if value != COVERED:
+            return 0.0
+        return self._results().get(i, self._interior)
+
+    def hint(self) -> Optional[Tuple[str, int, int]]:
+        """Return a move that is certainly right, or None if every move is a guess.
+
+        Rule-based deductions are returned first since they need no
+        probability pass. A safe click is preferred over a flag.
+        """
+        cell = min(self._known_safe, default=None)
+        if cell is None:
+            cell = min(self.safe, default=None)
+        if cell is not None:
+            y, x = divmod(cell, self.width)
+            return 'click', x, y
+        if self.interior_probability == 0.0:
+            cell = next(self._interior_cells(), None)
+            if cell is not None:
+                y, x = divmod(cell, self.width)
+                return 'click', x, y
+        cell = min(self.mines, default=None)
+        if cell is not None:
+            y, x = divmod(cell, self.width)
+            return 'flag', x, y
+        return None
+
+    def best_guess(self) -> Optional[Tuple[int, int]]:
+        """Return the (x, y) of the covered, unflagged cell least likely to hold a mine.
+
+        Frontier cells win ties against the interior. Returns None when no
+        covered, unflagged cell is left.
+        """
+        probabilities = self._results()
+        cell = min(probabilities, key=lambda c: (probabilities[c], c), default=None)
+        if cell is None or self._interior < probabilities[cell]:
+            interior = next(self._interior_cells(), None)
+            if interior is not None:
+                cell = interior
+        if cell is None:
+            return None
+        y, x = divmod(cell, self.width)
+        return x, y
+
+    def _interior_cells(self):
+        """Yield the covered, unflagged cells next to no revealed number."""
+        read = self._read
+        watch = self._watch
+        known = self._known_safe | self._known_mines
+        for i in range(self.width * self.height):
+            if i not in watch and i not in known and read(i) == COVERED:
+                yield i
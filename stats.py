@@ -0,0 +1,282 @@
+"""Local history of finished games and the statistics drawn from it.
+
+Every finished game becomes one row of a SQLite database (`STATS_PATH`):
+difficulty, board size, seed and first click (which reproduce a random
+layout, see `GameEngine.seed`), duration, clicks, outcome and 3BV.
+
+`StatsStore.add` only puts the game on a queue. A background thread
+takes everything queued, computes the missing 3BV values
+(`metrics.layout_metrics`) and inserts the batch in one transaction, so
+the frame loop never waits for the disk or for the metrics.
+
+Queries are answered from indexes, so they stay fast with hundreds of
+thousands of games:
+
+- games and wins per difficulty come from a `totals` table that a
+  trigger keeps up to date on every insert (no scan at all)
+- personal bests and percentiles walk the (difficulty, outcome,
+  duration) index in order
+
+The database uses write-ahead logging, so queries do not wait for the
+writer either. Run as a script it prints the statistics:
+
+    python stats.py [--path FILE]
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from config import DIFFICULTIES, STATS_PATH
+from metrics import layout_metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished REAL NOT NULL,
+    difficulty TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    mines INTEGER NOT NULL,
+    seed INTEGER,
+    first_click INTEGER,
+    duration REAL NOT NULL,
+    clicks INTEGER NOT NULL,
+    outcome TEXT NOT NULL,
+    bbbv INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_by_time ON games (difficulty, outcome, duration);
+CREATE TABLE IF NOT EXISTS totals (
+    difficulty TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    PRIMARY KEY (difficulty, outcome)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS count_game AFTER INSERT ON games BEGIN
+    INSERT INTO totals VALUES (NEW.difficulty, NEW.outcome, 1)
+    ON CONFLICT (difficulty, outcome) DO UPDATE SET games = games + 1;
+END;
+"""
+
+_COLUMNS = ('finished', 'difficulty', 'width', 'height', 'mines', 'seed', 'first_click',
+            'duration', 'clicks', 'outcome', 'bbbv')
+_INSERT = f"INSERT INTO games ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+# most queued games written in one transaction
+_BATCH = 1024
+
+
+def difficulty_name(width: int, height: int, mines: int) -> str:
+    """Return the `DIFFICULTIES` preset of this board size, or 'custom'."""
+    for name, size in DIFFICULTIES.items():
+        if size == (width, height, mines):
+            return name
+    return 'custom'
+
+
+class GameRecord(NamedTuple):
+    """One finished game, as stored."""
+    finished: float
+    difficulty: str
+    width: int
+    height: int
+    mines: int
+    seed: Optional[int]
+    first_click: Optional[int]
+    # seconds from the first click to the end of the game
+    duration: float
+    clicks: int
+    # engine state: 'won' or 'lost'
+    outcome: str
+    bbbv: Optional[int] = None
+
+    @classmethod
+    def for_engine(cls, engine, duration: float) -> 'GameRecord':
+        """Return the record of the finished game of `engine` (3BV still missing)."""
+        return cls(time.time(), difficulty_name(engine.width, engine.height, engine.mines),
+                   engine.width, engine.height, engine.mines,
+                   None if engine.no_guess else engine.seed, engine.first_click,
+                   duration, engine.clicks, engine.state)
+
+
+class Summary(NamedTuple):
+    """Totals of one difficulty."""
+    games: int
+    wins: int
+    # fastest win in seconds (None without wins)
+    best: Optional[float]
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """Open the database at `path`, creating it and its tables if needed."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    db = sqlite3.connect(path, timeout=30)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(_SCHEMA)
+    return db
+
+
+class StatsStore:
+    """Game history in a SQLite file, written by a background thread.
+
+    Public methods:
+      - add(record, layout): queue a finished game
+      - flush(): wait until everything queued is written
+      - close(): flush and stop the writer thread
+      - summary(), best(), percentile_rank(), percentile(): queries
+
+    Queries use their own connection in the calling thread and see the
+    games written so far (`flush` first to include the queued ones).
+    """
+
+    def __init__(self, path: str = STATS_PATH):
+        self.path = path
+        self._queue = queue.Queue()
+        self._writer = None
+        self._db = None
+        # the first error of the writer thread, raised again by flush()/close()
+        self._error = None
+
+    def add(self, record: GameRecord, layout: Optional[Sequence[int]] = None):
+        """Queue `record` for writing; its 3BV is computed from the mine `layout` if it has none."""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name='stats-writer', daemon=True)
+            self._writer.start()
+        self._queue.put((record, layout))
+
+    def flush(self):
+        """Block until every queued game is in the database."""
+        if self._writer is not None:
+            self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """Write the queued games and stop the writer thread."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._error is not None:
+            raise self._error
+
+    def _write_loop(self):
+        try:
+            db = _connect(self.path)
+        except (sqlite3.Error, OSError) as e:
+            # keep draining the queue so flush() and close() do not wait forever
+            self._error = e
+            db = None
+        while True:
+            items = [self._queue.get()]
+            # take whatever else is already waiting, to write it in the same transaction
+            while len(items) < _BATCH:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if db is not None:
+                    self._write(db, [item for item in items if item is not None])
+            except (sqlite3.Error, OSError) as e:
+                self._error = self._error or e
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if None in items:
+                break
+        if db is not None:
+            db.close()
+
+    @staticmethod
+    def _write(db: sqlite3.Connection, items):
+        rows = []
+        for record, layout in items:
+            if record.bbbv is None and layout is not None:
+                record = record._replace(bbbv=layout_metrics(record.width, record.height, layout).bbbv)
+            rows.append(record)
+        with db:
+            db.executemany(_INSERT, rows)
+
+    def _reader(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = _connect(self.path)
+        return self._db
+
+    def summary(self) -> Dict[str, Summary]:
+        """Return the games, wins and best time of every difficulty played."""
+        db = self._reader()
+        counts = {}
+        for difficulty, outcome, games in db.execute('SELECT difficulty, outcome, games FROM totals'):
+            counts.setdefault(difficulty, {})[outcome] = games
+        result = {}
+        for difficulty, outcomes in counts.items():
+            best = db.execute("SELECT MIN(duration) FROM games WHERE difficulty = ? AND outcome = 'won'",
+                              (difficulty,)).fetchone()[0]
+            result[difficulty] = Summary(sum(outcomes.values()), outcomes.get('won', 0), best)
+        return result
+
+    def best(self, difficulty: str, limit: int = 10) -> List[GameRecord]:
+        """Return the `limit` fastest wins at `difficulty`, fastest first."""
+        rows = self._reader().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM games WHERE difficulty = ? AND outcome = 'won' "
+            "ORDER BY duration LIMIT ?", (difficulty, limit))
+        return [GameRecord(*row) for row in rows]
+
+    def percentile_rank(self, difficulty: str, duration: float) -> Optional[float]:
+        """Return the share (0-1) of wins at `difficulty` slower than `duration`; None without wins."""
+        db = self._reader()
+        row = db.execute("SELECT games FROM totals WHERE difficulty = ? AND outcome = 'won'",
+                         (difficulty,)).fetchone()
+        if not row:
+            return None
+        slower = db.execute("SELECT COUNT(*) FROM games WHERE difficulty = ? AND outcome = 'won' AND duration > ?",
+                            (difficulty, duration)).fetchone()[0]
+        return slower / row[0]
+
+    def percentile(self, difficulty: str, p: float) -> Optional[float]:
+        """Return the win time at percentile `p` (0-100, nearest rank) at `difficulty`; None without wins."""
+        db = self._reader()
+        row = db.execute("SELECT games FROM totals WHERE difficulty = ? AND outcome = 'won'",
+                         (difficulty,)).fetchone()
+        if not row:
+            return None
+        rank = min(row[0] - 1, max(0, -(-row[0] * p // 100) - 1))
+        return db.execute("SELECT duration FROM games WHERE difficulty = ? AND outcome = 'won' "
+                          "ORDER BY duration LIMIT 1 OFFSET ?", (difficulty, int(rank))).fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Show the statistics of the recorded games.')
+    parser.add_argument('--path', default=STATS_PATH, help='statistics database')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"no games recorded in {args.path}", file=sys.stderr)
+        return 1
+    store = StatsStore(args.path)
+    print(f"{'difficulty':<14}{'games':>8}{'wins':>8}{'win rate':>10}{'best':>9}{'median':>9}")
+    for difficulty, s in sorted(store.summary().items()):
+        best = f"{s.best:>8.1f}s" if s.best is not None else f"{'-':>9}"
+        median = store.percentile(difficulty, 50)
+        median = f"{median:>8.1f}s" if median is not None else f"{'-':>9}"
+        print(f"{difficulty:<14}{s.games:>8}{s.wins:>8}{s.win_rate:>10.1%}{best}{median}")
+    store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
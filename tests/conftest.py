@@ -0,0 +1,21 @@
+"""Make the modules at the repository root importable from the tests, and shared fixtures."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mines  # noqa: E402 (needs the path above)
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def numpy_path(request, monkeypatch):
+    """Run the test once on the pure-Python paths of `mines` and once with NumPy (skipped without it)."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+        monkeypatch.setattr(mines, '_numpy', False)
+    else:
+        monkeypatch.setattr(mines, '_numpy', None)
+    return request.param
@@ -0,0 +1,113 @@
+"""Change stream: what the boards publish, and when."""
+
+import pytest
+
+from board import Board
+from engine import GameEngine
+from packed_board import PackedBoard
+
+
+@pytest.fixture(params=[Board, PackedBoard])
+def board(request):
+    board = request.param(9, 9, 10)
+    board.set_mines([0, 1, 2, 9, 18, 27, 36, 45, 54, 63])
+    return board
+
+
+def _listen(board):
+    batches = []
+    board.subscribe(batches.append)
+    return batches
+
+
+def test_every_change_is_its_own_batch_outside_a_block(board):
+    batches = _listen(board)
+    board.toggle_flag(8, 8)
+    board.toggle_flag(8, 8)
+    assert [(list(b.flagged), list(b.unflagged)) for b in batches] == [([80], []), ([], [80])]
+
+
+def test_one_batch_per_block(board):
+    batches = _listen(board)
+    with board.batch():
+        board.toggle_flag(8, 8)
+        board.toggle_flag(7, 8)
+        revealed = board.reveal(8, 0)
+        assert batches == []
+    assert len(batches) == 1
+    batch = batches[0]
+    assert list(batch.flagged) == [80, 79] and list(batch.revealed) == list(revealed)
+    assert batch.cells() == batch.revealed + batch.flagged
+    assert not batch.reset and not batch.mines_placed
+
+
+def test_nested_blocks_merge_into_the_outer_one(board):
+    batches = _listen(board)
+    with board.batch():
+        board.toggle_flag(8, 8)
+        with board.batch():
+            board.toggle_flag(7, 8)
+            board.reveal(0, 8)
+        assert batches == []
+        board.toggle_flag(8, 8)
+    assert len(batches) == 1
+    assert list(batches[0].flagged) == [80, 79] and list(batches[0].unflagged) == [80]
+    assert list(batches[0].revealed) == [72]
+
+
+def test_a_block_without_changes_publishes_nothing(board):
+    batches = _listen(board)
+    with board.batch():
+        board.toggle_flag(0, 8)
+        board.toggle_flag(0, 8)
+        # no-ops: already revealed, and revealing a revealed cell
+        board.reveal(0, 8)
+        board.reveal(0, 8)
+    assert len(batches) == 1
+    with board.batch():
+        board.reveal(0, 8)
+    assert len(batches) == 1
+
+
+def test_clear_publishes_a_reset(board):
+    board.reveal(8, 8)
+    batches = _listen(board)
+    board.clear()
+    assert len(batches) == 1 and batches[0].reset and not board.mines_placed
+
+
+def test_set_and_remove_mines_report_the_layout(board):
+    batches = _listen(board)
+    board.remove_mines()
+    board.set_mines([40])
+    assert [b.mines_placed for b in batches] == [True, True]
+    assert all(not b.cells() for b in batches)
+
+
+def test_unsubscribe(board):
+    batches = _listen(board)
+    others = _listen(board)
+    board.unsubscribe(batches.append)
+    board.toggle_flag(8, 8)
+    assert batches == [] and len(others) == 1
+    # unknown listeners are ignored
+    board.unsubscribe(print)
+    board.unsubscribe(others.append)
+    board.toggle_flag(8, 8)
+    assert len(others) == 1
+
+
+def test_engine_actions_are_one_batch_each():
+    engine = GameEngine(9, 9, 10)
+    batches = []
+    engine.subscribe(batches.append)
+    engine.click(4, 4)
+    assert len(batches) == 1 and batches[0].mines_placed and len(batches[0].revealed) > 0
+    engine.reset()
+    assert batches[-1].reset
+    # listeners stay subscribed across reset
+    engine.flag(0, 0)
+    assert list(batches[-1].flagged) == [0]
+    engine.unsubscribe(batches.append)
+    engine.flag(0, 0)
+    assert len(batches) == 3
@@ -0,0 +1,41 @@
+"""GameEngine seeds: a seed and first click reproduce a layout without touching the global `random`."""
+
+import random
+
+import pytest
+
+from engine import GameEngine
+from infinite_board import InfiniteEngine
+
+
+def _layout(engine, x, y):
+    engine.click(x, y)
+    return sorted(map(int, engine.board.mine_indices))
+
+
+@pytest.mark.parametrize('size', [(9, 9, 10), (30, 16, 99), (200, 200, 8000)])
+def test_seed_and_first_click_reproduce_the_layout(size):
+    layout = _layout(GameEngine(*size, seed=1234), 4, 5)
+    assert _layout(GameEngine(*size, seed=1234), 4, 5) == layout
+    assert _layout(GameEngine(*size, seed=1235), 4, 5) != layout
+    engine = GameEngine(*size)
+    engine.seed = 1234
+    assert _layout(engine, 4, 5) == layout
+    # the seed is kept for the next game
+    engine.reset()
+    assert _layout(engine, 4, 5) == layout
+
+
+def test_seeded_games_leave_the_global_random_alone():
+    random.seed('global')
+    expected = random.random()
+    random.seed('global')
+    _layout(GameEngine(16, 16, 40, seed=7), 8, 8)
+    assert random.random() == expected
+
+
+def test_infinite_engine_keeps_its_seed():
+    engine = InfiniteEngine(seed=99)
+    assert engine.seed == 99 and engine.board.seed == 99
+    engine.reset()
+    assert engine.board.seed == 99
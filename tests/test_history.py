@@ -0,0 +1,202 @@
+"""Undo/redo: every history position restores the board and engine it was recorded at."""
+
+import random
+
+import pytest
+
+from board import STATE_EXPLODED
+from engine import GameEngine, PLAYING, READY
+from history import History
+from packed_board import PackedBoard
+from savegame import load_game
+from test_savegame import _FixedLayout, _same_game, _tracked
+
+
+def _snapshot(engine):
+    board = engine.board
+    return (engine.state, engine.clicks, board.mines_placed, sorted(map(int, board.mine_indices)),
+            board.player_state(), board.revealed_count, board.flagged_count, board.exploded)
+
+
+def _play(engine, moves, rng):
+    """Make up to `moves` random clicks, flags and chords; return the snapshot after each."""
+    snapshots = [_snapshot(engine)]
+    while len(snapshots) <= moves and not engine.is_over:
+        x, y = rng.randrange(engine.width), rng.randrange(engine.height)
+        action = rng.choice((engine.click, engine.click, engine.flag, engine.chord))
+        if action(x, y):
+            snapshots.append(_snapshot(engine))
+    return snapshots
+
+
+@pytest.fixture(params=['board', 'packed'])
+def engine(request):
+    engine = GameEngine(16, 16, 30)
+    if request.param == 'packed':
+        engine.board = PackedBoard(16, 16, 30)
+    return engine
+
+
+@pytest.mark.parametrize('checkpoint_interval', [0, 3])
+def test_undo_redo_round_trip(engine, checkpoint_interval):
+    for game in range(20):
+        random.seed(f"history:{game}")
+        history = History(engine, checkpoint_interval=checkpoint_interval)
+        snapshots = _play(engine, 40, random.Random(game))
+        assert history.position == len(snapshots) - 1
+        for n in reversed(range(len(snapshots) - 1)):
+            assert history.undo()
+            assert _snapshot(engine) == snapshots[n]
+        # back before the first click: no mines at all
+        assert engine.state == READY and not engine.board.mines_placed
+        assert not history.undo()
+        for n in range(1, len(snapshots)):
+            assert history.redo()
+            assert _snapshot(engine) == snapshots[n]
+        for n in random.Random(game).sample(range(len(snapshots)), len(snapshots)):
+            history.seek(n)
+            assert _snapshot(engine) == snapshots[n]
+        history.close()
+        engine.reset()
+
+
+def test_new_first_click_after_undo(engine):
+    history = History(engine)
+    random.seed('first')
+    engine.click(2, 2)
+    first = sorted(engine.board.mine_indices)
+    history.undo()
+    random.seed('second')
+    engine.click(13, 13)
+    assert engine.state == PLAYING and sorted(engine.board.mine_indices) != first
+    # the old layout's first click cannot be redone on top of the new one
+    assert not history.redo() and history.position == 1
+    history.undo()
+    assert _snapshot(engine)[:5] == (READY, 0, False, [], bytes(16 * 16))
+
+
+@pytest.mark.parametrize('mapped', [False, True])
+def test_autosave_after_undoing_the_first_click(tmp_path, engine, mapped):
+    path = str(tmp_path / 'game.msws')
+    history = History(engine)
+    savefile = _tracked(engine, path)
+    random.seed('autosave:first')
+    engine.click(2, 2)
+    savefile.save(engine, 1)
+    history.undo()
+    random.seed('autosave:second')
+    engine.click(13, 13)
+    savefile.save(engine, 2)
+    loaded, _ = load_game(path, mapped=mapped)
+    _same_game(loaded, engine)
+    if mapped:
+        loaded.board.close()
+    # saved while back before the first click: no mines in the file either
+    history.undo()
+    savefile.save(engine, 3)
+    loaded, _ = load_game(path, mapped=mapped)
+    _same_game(loaded, engine)
+    assert loaded.state == READY and not loaded.board.mines_placed
+    if mapped:
+        loaded.board.close()
+
+
+class _CountingBoard(PackedBoard):
+    """PackedBoard that counts reads of its mine layout."""
+
+    reads = 0
+
+    @property
+    def mine_indices(self):
+        self.reads += 1
+        return self._mine_indices
+
+    @mine_indices.setter
+    def mine_indices(self, value):
+        self._mine_indices = value
+
+
+def test_layout_is_read_only_for_checkpoints():
+    engine = GameEngine(16, 16, 30)
+    engine.board = board = _CountingBoard(16, 16, 30)
+    random.seed('lazy')
+    engine.click(8, 8)
+    reads = board.reads
+    History(engine, checkpoint_interval=2)
+    assert board.reads == reads
+    engine.flag(0, 0)
+    assert board.reads == reads
+    engine.flag(1, 0)
+    assert board.reads == reads + 1
+
+
+def test_checkpoint_after_undoing_the_first_click(engine):
+    history = History(engine, checkpoint_interval=1)
+    random.seed('checkpoint')
+    engine.click(2, 2)
+    history.undo()
+    engine.flag(0, 0)
+    before = _snapshot(engine)
+    engine.flag(1, 0)
+    history.seek(1)
+    history.seek(2)
+    assert _snapshot(engine)[:4] == (READY, 2, False, [])
+    history.seek(1)
+    assert _snapshot(engine) == before
+
+
+class _FixedLayout:
+    """`layouts` source that always hands out the same mines."""
+
+    def __init__(self, mines):
+        self.mines = mines
+
+    def take(self, width, height, mines, x, y):
+        return self.mines
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_redo_of_a_chord_hitting_two_mines(packed):
+    engine = GameEngine(6, 6, 2, layouts=_FixedLayout([0, 2]))
+    if packed:
+        engine.board = PackedBoard(6, 6, 2)
+    history = History(engine)
+    # two wrong flags next to the 2 at (1,1), so chording it opens both mines above
+    engine.flag(0, 1)
+    engine.flag(2, 1)
+    engine.click(5, 5)
+    assert engine.board.cell(1, 1).revealed and engine.board.cell(1, 1).adjacent == 2
+    engine.chord(1, 1)
+    lost = _snapshot(engine)
+    assert sum(1 for b in engine.board.player_state() if b & STATE_EXPLODED) == 2
+    history.undo()
+    assert not any(b & STATE_EXPLODED for b in engine.board.player_state())
+    history.redo()
+    assert _snapshot(engine) == lost
+
+
+def test_large_board_with_numpy_layouts():
+    np = pytest.importorskip('numpy')
+    engine = GameEngine(100, 100, 2000, seed=1)
+    history = History(engine)
+    assert engine.click(50, 50)
+    history.undo()
+    assert not engine.board.mines_placed
+    # layouts handed out as NumPy arrays, empty ones included
+    safe = {y * 100 + x for y in range(49, 52) for x in range(49, 52)}
+    mines = np.array([i for i in random.Random(2).sample(range(100 * 100), 2100) if i not in safe][:2000])
+    engine = GameEngine(100, 100, 2000, layouts=_FixedLayout(mines))
+    history = History(engine)
+    snapshots = [_snapshot(engine)]
+    assert engine.click(50, 50)
+    snapshots.append(_snapshot(engine))
+    snapshots += _play(engine, 30, random.Random(3))[1:]
+    for snapshot in reversed(snapshots[:-1]):
+        history.undo()
+        assert _snapshot(engine) == snapshot
+    for snapshot in snapshots[1:]:
+        history.redo()
+        assert _snapshot(engine) == snapshot
+    engine = GameEngine(100, 100, 0, layouts=_FixedLayout(np.array([], dtype=np.int64)))
+    History(engine)
+    assert engine.click(0, 0) and engine.is_over
@@ -0,0 +1,110 @@
+"""Infinite board: chunks rebuilt from the seed, floods across chunk borders, and chunk eviction."""
+
+import os
+from collections import deque
+
+from engine import LOST, PLAYING
+from infinite_board import InfiniteBoard, InfiniteEngine
+
+CHUNK = 8
+
+
+def _neighbors(x, y):
+    return [(x + dx, y + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy]
+
+
+def _cells(board, xs, ys):
+    return [(board.cell(x, y).mine, board.cell(x, y).adjacent) for y in ys for x in xs]
+
+
+def test_chunks_come_from_the_seed():
+    xs = ys = range(-2 * CHUNK, 2 * CHUNK)
+    a = InfiniteBoard(seed=5, chunk_size=CHUNK)
+    expected = _cells(a, xs, ys)
+    assert _cells(InfiniteBoard(seed=5, chunk_size=CHUNK), xs[::-1], ys[::-1]) == expected[::-1]
+    assert _cells(InfiniteBoard(seed=6, chunk_size=CHUNK), xs, ys) != expected
+    # adjacent counts include the mines of the neighboring chunks
+    for x in xs[1:-1]:
+        for y in ys[1:-1]:
+            assert a.cell(x, y).adjacent == sum(a.cell(nx, ny).mine for nx, ny in _neighbors(x, y))
+    # a chunk evicted without player state is rebuilt the same
+    small = InfiniteBoard(seed=5, chunk_size=CHUNK, live_chunks=1)
+    assert _cells(small, xs, ys) == expected
+
+
+def _flood(board, x, y):
+    """Return the cells a click at (x,y) opens, by a plain breadth-first search."""
+    opened = {(x, y)}
+    queue = deque(opened)
+    while queue:
+        cx, cy = queue.popleft()
+        if board.cell(cx, cy).mine or board.cell(cx, cy).adjacent:
+            continue
+        for n in _neighbors(cx, cy):
+            if n not in opened:
+                opened.add(n)
+                queue.append(n)
+    return opened
+
+
+def test_reveal_crosses_chunk_borders():
+    reference = InfiniteBoard(density=0.12, seed=2, chunk_size=CHUNK)
+    board = InfiniteBoard(density=0.12, seed=2, chunk_size=CHUNK, live_chunks=4)
+    crossed = 0
+    for x in range(0, 40 * CHUNK, 3):
+        if board.cell(x, 0).revealed or reference.cell(x, 0).mine:
+            continue
+        expected = _flood(reference, x, 0)
+        opened = board.reveal(x, 0)
+        assert len(opened) == len(set(opened))
+        # later openings stop at cells an earlier one revealed
+        assert set(opened) <= expected
+        assert all(board.cell(cx, cy).revealed for cx, cy in expected)
+        crossed += len({(cx // CHUNK, cy // CHUNK) for cx, cy in opened}) > 1
+    assert crossed
+    assert not board.check_loss()
+
+
+def test_trim_keeps_player_state(tmp_path):
+    spill = str(tmp_path)
+    board = InfiniteBoard(seed=1, chunk_size=CHUNK, live_chunks=2, cold_chunks=2, spill_dir=spill)
+    for k in range(8):
+        assert board.toggle_flag(k * CHUNK, 0)
+        assert len(board._live) <= 2 and len(board._cold) <= 2
+    assert len(os.listdir(spill)) == 4
+    # chunks that were only looked at are dropped, not kept or spilled
+    for k in range(8, 16):
+        board.cell(k * CHUNK, 0)
+    assert board.chunk_counts == {'live': 2, 'cold': 2} and len(os.listdir(spill)) == 6
+    assert all(board.cell(k * CHUNK, 0).flagged for k in range(8))
+    assert board.flagged_count == 8
+    board.close()
+    assert os.path.isdir(spill)
+
+
+def test_own_spill_dir_is_removed_on_close():
+    board = InfiniteBoard(seed=1, chunk_size=CHUNK, live_chunks=1, cold_chunks=0)
+    board.toggle_flag(0, 0)
+    board.toggle_flag(CHUNK, 0)
+    spill = board.spill_dir
+    assert os.listdir(spill)
+    board.close()
+    assert not os.path.exists(spill)
+
+
+def test_engine_first_click_is_safe():
+    for seed in range(20):
+        engine = InfiniteEngine(seed=seed, chunk_size=CHUNK)
+        changed = engine.click(3, -3)
+        assert engine.state == PLAYING and (3, -3) in changed
+        assert engine.board.seed == seed
+        engine.board.close()
+
+
+def test_engine_loses_on_a_mine():
+    engine = InfiniteEngine(seed=4, chunk_size=CHUNK)
+    engine.click(0, 0)
+    x = next(x for x in range(10, 1000) if engine.board.cell(x, 0).mine)
+    engine.click(x, 0)
+    assert engine.state == LOST and engine.board.exploded == (x, 0)
+    engine.board.close()
@@ -0,0 +1,95 @@
+"""Board metrics: 3BV, openings and islands against a plain flood-fill count."""
+
+import random
+
+import pytest
+
+from board import Board
+from metrics import board_metrics, count_regions, layout_metrics
+
+
+def _neighbors(width, height, i):
+    y, x = divmod(i, width)
+    return [ny * width + nx for ny in range(max(0, y - 1), min(height, y + 2))
+            for nx in range(max(0, x - 1), min(width, x + 2)) if (nx, ny) != (x, y)]
+
+
+def _flood_regions(width, height, cells):
+    """Count the 8-way connected regions of the set `cells` with one flood fill each."""
+    seen = set()
+    count = 0
+    for start in cells:
+        if start in seen:
+            continue
+        count += 1
+        seen.add(start)
+        stack = [start]
+        while stack:
+            for n in _neighbors(width, height, stack.pop()):
+                if n in cells and n not in seen:
+                    seen.add(n)
+                    stack.append(n)
+    return count
+
+
+def _flood_metrics(width, height, mines):
+    """Reference count: adjacency per cell, then a flood fill per opening and per island."""
+    mines = set(mines)
+    adjacent = {i: sum(n in mines for n in _neighbors(width, height, i))
+                for i in range(width * height) if i not in mines}
+    zeros = {i for i, a in adjacent.items() if a == 0}
+    isolated = {i for i, a in adjacent.items() if a and not any(n in zeros for n in _neighbors(width, height, i))}
+    openings = _flood_regions(width, height, zeros)
+    numbers = tuple(sum(1 for a in adjacent.values() if a == n) for n in range(9))
+    return openings + len(isolated), openings, len(isolated), _flood_regions(width, height, isolated), numbers
+
+
+def _random_layout(width, height, density, seed):
+    rng = random.Random(seed)
+    return rng.sample(range(width * height), int(width * height * density))
+
+
+@pytest.mark.parametrize('width,height,mines,expected', [
+    # no mines: one opening clears the board
+    (4, 4, [], (1, 1, 0, 0)),
+    # a mine in the middle: eight numbers that form one island
+    (3, 3, [4], (8, 0, 8, 1)),
+    # a mine splits a row into two openings
+    (5, 1, [2], (2, 2, 0, 0)),
+    # every cell a mine
+    (2, 2, [0, 1, 2, 3], (0, 0, 0, 0)),
+    # two numbers in a row, kept apart by a mine: two islands
+    (5, 1, [0, 2, 4], (2, 0, 2, 2)),
+])
+def test_hand_counted_layouts(numpy_path, width, height, mines, expected):
+    m = layout_metrics(width, height, mines)
+    assert (m.bbbv, m.openings, m.isolated, m.islands) == expected
+
+
+@pytest.mark.parametrize('width,height,density', [
+    (9, 9, 0.12), (16, 16, 0.16), (30, 16, 0.21), (30, 16, 0.4), (1, 50, 0.2), (50, 1, 0.2),
+    # big enough for the NumPy paths
+    (120, 100, 0.15), (100, 120, 0.3), (1, 10_000, 0.2), (10_000, 1, 0.2),
+])
+def test_layout_metrics_match_a_flood_fill(numpy_path, width, height, density):
+    for seed in range(3 if width * height < 1000 else 1):
+        mines = _random_layout(width, height, density, seed)
+        m = layout_metrics(width, height, mines)
+        assert (m.bbbv, m.openings, m.isolated, m.islands, m.numbers) == _flood_metrics(width, height, mines)
+
+
+@pytest.mark.parametrize('width,height', [(7, 5), (120, 100)])
+def test_count_regions_joins_runs_through_diagonals(numpy_path, width, height):
+    rng = random.Random(width)
+    for density in (0.2, 0.45, 0.6):
+        mask = bytes(1 if rng.random() < density else 0 for _ in range(width * height))
+        cells = {i for i, b in enumerate(mask) if b}
+        assert count_regions(mask, width, height) == _flood_regions(width, height, cells)
+
+
+def test_board_metrics_needs_placed_mines():
+    board = Board(9, 9, 10)
+    with pytest.raises(ValueError):
+        board_metrics(board)
+    board.set_mines([0, 10, 20, 30, 40, 50, 60, 70, 80, 8])
+    assert board_metrics(board) == layout_metrics(9, 9, board.mine_indices)
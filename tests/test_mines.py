@@ -0,0 +1,42 @@
+"""Mine placement: first-click safety, mine count and adjacency counts."""
+
+import random
+from array import array
+
+import pytest
+
+from mines import adjacency_counts, mine_mask, neighbor_table, safe_zone, sample_mines
+
+
+@pytest.mark.parametrize('width,height,mines', [(9, 9, 10), (16, 16, 40), (30, 16, 99), (5, 5, 16)])
+def test_sample_mines_avoids_the_safe_zone(width, height, mines):
+    rng = random.Random(f"{width}x{height}")
+    for _ in range(50):
+        x, y = rng.randrange(width), rng.randrange(height)
+        layout = [int(i) for i in sample_mines(width, height, mines, x, y)]
+        assert len(layout) == len(set(layout)) == mines
+        assert all(0 <= i < width * height for i in layout)
+        assert not set(layout) & set(safe_zone(width, height, x, y))
+
+
+def test_sample_mines_caps_at_the_free_cells():
+    # a 3x3 board has no room outside the safe zone of its center
+    assert len(sample_mines(3, 3, 5, 1, 1)) == 0
+
+
+@pytest.mark.parametrize('width,height', [(1, 1), (1, 7), (7, 1), (9, 9), (30, 16)])
+def test_adjacency_counts_match_a_neighbor_count(width, height):
+    rng = random.Random(width * height)
+    layout = rng.sample(range(width * height), (width * height) // 4)
+    mask = mine_mask(width, height, layout)
+    counts = adjacency_counts(width, height, mask)
+    table = neighbor_table(width, height)
+    assert list(counts) == [sum(mask[n] for n in table[i]) for i in range(width * height)]
+
+
+@pytest.mark.parametrize('width,height,mines', [(9, 9, 10), (100, 100, 2000)])
+def test_sample_mines_returns_an_index_array(numpy_path, width, height, mines):
+    layout = sample_mines(width, height, mines, 5, 5, random.Random(1))
+    assert type(layout) is array and layout.typecode == 'q'
+    assert len(set(layout)) == mines
+    assert not set(layout) & set(safe_zone(width, height, 5, 5))
@@ -0,0 +1,66 @@
+"""No-guess layouts: the solvability check and the on-disk layout cache."""
+
+import json
+import random
+
+from noguess import LayoutCache, generate, is_solvable, position_class
+
+
+def test_is_solvable():
+    # one mine left of the opening, which the 1 next to it pins down
+    assert is_solvable(5, 1, [0], 4, 0)
+    # a mine in the left column of a 4x2 board: both covered cells touch the same two 1s
+    assert not is_solvable(4, 2, [0], 3, 0)
+
+
+def _cache_with_layout(path, size=(9, 9, 10), click=(4, 4)):
+    random.seed('noguess')
+    width, height, mines = size
+    layout, zeros = generate(width, height, mines, *click)
+    cache = LayoutCache(path)
+    key = (width, height, mines, position_class(width, height, *click))
+    cache._bucket(key).append((click[1] * width + click[0], layout, set(zeros)))
+    return cache, key, layout
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'layouts.json')
+    cache, key, layout = _cache_with_layout(path)
+    cache.save()
+    loaded = LayoutCache(path)
+    assert len(loaded) == 1
+    assert list(loaded._entries[key]) == list(cache._entries[key])
+    assert loaded.take(9, 9, 10, 4, 4) == layout
+    assert len(loaded) == 0
+
+
+def test_corrupt_entries_are_skipped(tmp_path):
+    path = str(tmp_path / 'layouts.json')
+    cache, key, layout = _cache_with_layout(path)
+    cache.save()
+    with open(path) as f:
+        data = json.load(f)
+    name = ':'.join(map(str, key))
+    click = data[name][0][0]
+    data[name] += [
+        [click],                          # not a pair
+        ['40', layout],                   # click is not an integer
+        [click, layout[:-1] + [81]],      # mine off the board
+        [click, layout[:-1]],             # a mine short
+        [click, [click] + layout[1:]],    # mine under the first click
+        7,
+    ]
+    data['9:9'] = [[click, layout]]
+    data['9:9:10:middle'] = [[click, layout]]
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    loaded = LayoutCache(path)
+    assert len(loaded) == 1
+    assert loaded.take(9, 9, 10, 4, 4) == layout
+
+
+def test_unreadable_file_gives_an_empty_cache(tmp_path):
+    path = tmp_path / 'layouts.json'
+    for text in ('{"9:9:10:center": [[40, [1, 2', '[]', 'null'):
+        path.write_text(text)
+        assert len(LayoutCache(str(path))) == 0
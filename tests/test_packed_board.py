@@ -0,0 +1,70 @@
+"""`PackedBoard` must behave exactly like `Board` for the same layout and moves."""
+
+import random
+
+import pytest
+
+from board import Board
+from packed_board import PackedBoard
+
+
+def _pair(width, height, mines, seed):
+    rng = random.Random(seed)
+    layout = rng.sample(range(width * height), mines)
+    boards = Board(width, height, mines), PackedBoard(width, height, mines)
+    for board in boards:
+        board.set_mines(layout)
+    return boards
+
+
+def _same(plain, packed):
+    assert packed.player_state() == plain.player_state()
+    assert packed.revealed_count == plain.revealed_count
+    assert packed.flagged_count == plain.flagged_count
+    assert packed.safe_left == plain.safe_left
+    assert packed.check_win() == plain.check_win()
+    assert packed.check_loss() == plain.check_loss()
+    assert packed.exploded == plain.exploded
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_same_moves_same_state(seed):
+    plain, packed = _pair(16, 12, 30, seed)
+    assert [[c.adjacent for c in row] for row in packed.grid] == [[c.adjacent for c in row] for row in plain.grid]
+    rng = random.Random(seed)
+    for _ in range(60):
+        x, y = rng.randrange(16), rng.randrange(12)
+        if rng.random() < 0.3:
+            assert packed.toggle_flag(x, y) == plain.toggle_flag(x, y)
+        else:
+            assert sorted(packed.reveal(x, y)) == sorted(plain.reveal(x, y))
+        _same(plain, packed)
+        if plain.check_loss():
+            break
+
+
+def test_loss_and_win_sweeps():
+    plain, packed = _pair(9, 9, 10, 'sweep')
+    for board in (plain, packed):
+        board.reveal_all_mines()
+        board.flag_all_mines()
+    _same(plain, packed)
+
+
+def test_player_state_round_trip():
+    plain, packed = _pair(10, 10, 15, 'state')
+    for x, y in ((0, 0), (5, 5), (9, 9)):
+        plain.reveal(x, y)
+        plain.toggle_flag(x, (y + 3) % 10)
+    packed.load_player_state(plain.player_state())
+    _same(plain, packed)
+
+
+def test_clear_reuses_the_board():
+    plain, packed = _pair(8, 8, 10, 'clear')
+    for board in (plain, packed):
+        board.reveal(3, 3)
+        board.clear()
+        assert not board.mines_placed
+        assert board.revealed_count == 0 and board.flagged_count == 0
+        assert board.player_state() == bytes(64)
@@ -0,0 +1,108 @@
+"""Replays: a recorded game reads back action for action, and every seek matches replaying from the start."""
+
+import random
+
+import pytest
+
+from engine import GameEngine, LOST
+from replay import ReplayPlayer, ReplayWriter, verify
+
+INTERVAL = 8
+
+
+class _Clock:
+    """Fake `time.monotonic` that moves 0.25 s per call."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.25
+        return self.now
+
+
+def _state(engine):
+    return engine.state, engine.clicks, engine.board.player_state()
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Record a 16x16 game that ends on a mine.
+
+    Returns the path, the actions, the engine state before the first and
+    after every action, and the layout.
+    """
+    random.seed('replay')
+    rng = random.Random(1)
+    engine = GameEngine(16, 16, 40)
+    path = str(tmp_path / 'game.mswr')
+    writer = ReplayWriter(path, engine, keyframe_interval=INTERVAL, clock=_Clock())
+    actions, states = [], [_state(engine)]
+    while len(actions) < 60 and not engine.is_over:
+        x, y = rng.randrange(16), rng.randrange(16)
+        action = rng.choice(('click', 'click', 'flag', 'chord'))
+        if action == 'click' and engine.board.mines_placed and engine.board.cell(x, y).mine:
+            continue
+        if getattr(engine, action)(x, y):
+            writer.record(action, x, y, engine)
+            actions.append((action, x, y))
+            states.append(_state(engine))
+    if not engine.is_over:
+        mine = next(i for i in engine.board.mine_indices if not engine.board.cell(i % 16, i // 16).flagged)
+        engine.click(mine % 16, mine // 16)
+        writer.record('click', mine % 16, mine // 16, engine)
+        actions.append(('click', mine % 16, mine // 16))
+        states.append(_state(engine))
+    assert engine.state == LOST and len(actions) > 3 * INTERVAL
+    writer.close(engine)
+    return path, actions, states, sorted(map(int, engine.board.mine_indices))
+
+
+def test_round_trip(recorded):
+    path, actions, states, layout = recorded
+    player = ReplayPlayer(path)
+    assert (player.width, player.height, player.mines) == (16, 16, 40)
+    assert player.layout == layout
+    assert [player.action(n)[1:] for n in range(len(player))] == actions
+    assert list(player.ticks) == sorted(player.ticks) and player.duration > 0
+    assert [k[0] for k in player.keyframes] == list(range(INTERVAL, len(actions), INTERVAL)) + [len(actions)]
+    player.close()
+    assert verify(path) == (path, None, len(actions))
+
+
+def test_seek_matches_replaying_from_the_start(recorded):
+    path, actions, states, _ = recorded
+    player = ReplayPlayer(path)
+    positions = [0, len(actions)]
+    for k in range(INTERVAL, len(actions), INTERVAL):
+        positions += [k - 1, k, k + 1]
+    # forwards, backwards, and in a shuffled order (fresh restores and continued seeks)
+    order = sorted(positions) + sorted(positions, reverse=True) + random.Random(2).sample(positions, len(positions))
+    for n in order:
+        assert _state(player.seek(n)) == states[n]
+    fresh = player.new_engine()
+    for n in range(len(actions)):
+        player.apply(fresh, n)
+        assert _state(fresh) == states[n + 1]
+    assert _state(player.seek_tick(player.ticks[9])) == states[10]
+    player.close()
+
+
+def test_truncated_file_replays_up_to_its_last_record(recorded, tmp_path):
+    path, actions, states, _ = recorded
+    with open(path, 'rb') as f:
+        data = f.read()
+    player = ReplayPlayer(path)
+    # cut anywhere from inside the last keyframe back to the first records
+    start = player.keyframes[-2][4]
+    player.close()
+    cut = str(tmp_path / 'cut.mswr')
+    lengths = set()
+    for end in range(len(data) - 1, start, -1):
+        with open(cut, 'wb') as f:
+            f.write(data[:end])
+        player = ReplayPlayer(cut)
+        lengths.add(len(player))
+        assert _state(player.seek(len(player))) == states[len(player)]
+        player.close()
+    assert min(lengths) < len(actions) - 1
@@ -0,0 +1,186 @@
+"""Save files: full and incremental saves load back to the same game, in RAM or memory-mapped."""
+
+import random
+
+import pytest
+
+from engine import GameEngine, PLAYING, READY
+from packed_board import EXPLODED, FLAGGED, REVEALED
+from savegame import MappedBoard, SaveFile, load_game, read_header, resumable
+
+
+def _play(engine, moves, rng):
+    """Make up to `moves` random clicks and flags that avoid the mines (so the game goes on)."""
+    board = engine.board
+    for _ in range(moves):
+        x, y = rng.randrange(engine.width), rng.randrange(engine.height)
+        if board.mines_placed and board.cell(x, y).mine or rng.random() < 0.2:
+            engine.flag(x, y)
+        else:
+            engine.click(x, y)
+
+
+def _same_game(loaded, engine):
+    board, original = loaded.board, engine.board
+    assert (loaded.width, loaded.height, loaded.mines) == (engine.width, engine.height, engine.mines)
+    assert (loaded.state, loaded.clicks) == (engine.state, engine.clicks)
+    assert board.mines_placed == original.mines_placed
+    assert sorted(map(int, board.mine_indices)) == sorted(map(int, original.mine_indices))
+    assert board.player_state() == original.player_state()
+    assert (board.revealed_count, board.flagged_count) == (original.revealed_count, original.flagged_count)
+    assert board.exploded == original.exploded
+
+
+def _tracked(engine, path):
+    """Return a SaveFile for `path` that is told about every change, like `main.Game` does."""
+    savefile = SaveFile(path)
+
+    def on_changes(batch):
+        if batch.reset:
+            savefile.reset()
+            return
+        if batch.mines_placed:
+            savefile.layout_changed()
+        savefile.mark(batch.cells())
+
+    engine.subscribe(on_changes)
+    return savefile
+
+
+@pytest.mark.parametrize('mapped', [False, True])
+@pytest.mark.parametrize('size', [(9, 9, 10), (300, 300, 9000)])
+def test_round_trip(tmp_path, size, mapped):
+    path = str(tmp_path / 'game.msws')
+    random.seed(f"save:{size}")
+    engine = GameEngine(*size)
+    savefile = _tracked(engine, path)
+    savefile.save(engine, 3)
+    _same_game(load_game(path, mapped=mapped)[0], engine)
+    rng = random.Random(1)
+    # the first save after the first click writes everything, later ones only changed pages
+    for step in range(3):
+        _play(engine, 20, rng)
+        savefile.save(engine, 10 + step)
+        loaded, elapsed = load_game(path, mapped=mapped)
+        _same_game(loaded, engine)
+        assert elapsed == 10 + step
+        assert isinstance(loaded.board, MappedBoard) == mapped
+    assert resumable(path) == (engine.state == PLAYING)
+
+
+def test_mapped_resume_keeps_playing(tmp_path):
+    path = str(tmp_path / 'game.msws')
+    random.seed('mapped')
+    engine = GameEngine(200, 200, 6000)
+    savefile = _tracked(engine, path)
+    rng = random.Random(2)
+    _play(engine, 30, rng)
+    savefile.save(engine, 5)
+
+    resumed, _ = load_game(path, mapped=True)
+    shadow, _ = load_game(path, mapped=False)
+    resumed_save = _tracked(resumed, path)
+    # the same moves on the mapped board and on an in-memory copy
+    _play(resumed, 30, random.Random(3))
+    _play(shadow, 30, random.Random(3))
+    _same_game(resumed, shadow)
+    resumed_save.save(resumed, 8)
+    resumed.board.close()
+    _same_game(load_game(path, mapped=False)[0], shadow)
+    assert read_header(path).elapsed == 8
+
+
+def test_new_game_overwrites_the_save(tmp_path):
+    path = str(tmp_path / 'game.msws')
+    engine = GameEngine(16, 16, 40)
+    savefile = _tracked(engine, path)
+    _play(engine, 10, random.Random(4))
+    savefile.save(engine, 1)
+    engine.reset()
+    savefile.save(engine, 0)
+    loaded, _ = load_game(path)
+    assert loaded.state == READY and not loaded.board.mines_placed
+    _same_game(loaded, engine)
+
+
+def test_mapped_remove_mines_keeps_player_state(tmp_path):
+    path = str(tmp_path / 'game.msws')
+    engine = GameEngine(300, 300, 9000)
+    _play(engine, 20, random.Random(5))
+    SaveFile(path).save(engine, 1)
+    loaded, _ = load_game(path, mapped=True)
+    board, state = loaded.board, loaded.board.player_state()
+    board.remove_mines()
+    assert not board.mines_placed and list(board.mine_indices) == []
+    assert board.player_state() == state
+    assert all(not board.cells[i] & ~(REVEALED | FLAGGED | EXPLODED) for i in range(300 * 300))
+    board.close()
+
+
+def test_mapped_clear_empties_the_board(tmp_path):
+    path = str(tmp_path / 'game.msws')
+    engine = GameEngine(300, 300, 9000)
+    _play(engine, 20, random.Random(8))
+    SaveFile(path).save(engine, 1)
+    loaded, _ = load_game(path, mapped=True)
+    board = loaded.board
+    batches = []
+    board.subscribe(batches.append)
+    board.clear()
+    assert len(batches) == 1 and batches[0].reset
+    assert not board.mines_placed and list(board.mine_indices) == []
+    assert board.revealed_count == board.flagged_count == 0 and board.exploded is None
+    assert board.player_state() == bytes(300 * 300) and not any(board.cells[i] for i in range(0, 300 * 300, 97))
+    # the cleared planes reach the file on save
+    board.save(loaded, 0)
+    board.close()
+    reloaded, _ = load_game(path)
+    assert not reloaded.board.mines_placed and reloaded.board.player_state() == bytes(300 * 300)
+
+
+def test_reset_closes_the_mapped_board(tmp_path):
+    path = str(tmp_path / 'game.msws')
+    engine = GameEngine(16, 16, 40)
+    _play(engine, 5, random.Random(6))
+    SaveFile(path).save(engine, 1)
+    loaded, _ = load_game(path, mapped=True)
+    mapped = loaded.board
+    loaded.reset()
+    assert loaded.board is not mapped and not isinstance(loaded.board, MappedBoard)
+    assert mapped._map.closed
+    # nothing maps the file any more, so the next save can replace it
+    SaveFile(path).save(loaded, 0)
+    assert load_game(path)[0].state == READY
+
+
+class _FixedLayout:
+    """`layouts` source that always hands out the same mines."""
+
+    def __init__(self, mines):
+        self.mines = mines
+
+    def take(self, width, height, mines, x, y):
+        return self.mines
+
+
+@pytest.mark.parametrize('mapped', [False, True])
+def test_every_exploded_mine_is_saved(tmp_path, mapped):
+    path = str(tmp_path / 'game.msws')
+    engine = GameEngine(6, 6, 2, layouts=_FixedLayout([0, 2]))
+    savefile = _tracked(engine, path)
+    # two wrong flags next to the 2 at (1,1): chording it blows up both mines above
+    engine.flag(0, 1)
+    engine.flag(2, 1)
+    engine.click(5, 5)
+    savefile.save(engine, 1)
+    engine.chord(1, 1)
+    # an incremental save: only the changed pages and the header
+    savefile.save(engine, 2)
+    assert [i for i, b in enumerate(engine.board.player_state()) if b & EXPLODED] == [0, 2]
+    loaded, _ = load_game(path, mapped=mapped)
+    _same_game(loaded, engine)
+    if mapped:
+        # and back through the mapped board's own save
+        loaded.board.save(loaded, 3)
+        loaded.board.close()
+        _same_game(load_game(path, mapped=False)[0], engine)
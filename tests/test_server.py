@@ -0,0 +1,32 @@
+"""GameServer.handle answers malformed requests with an error reply instead of raising."""
+
+import json
+
+import pytest
+
+from server import GameServer
+
+
+@pytest.mark.parametrize('request_', [
+    [],
+    {},
+    {'op': ['click']},
+    {'op': {'a': 1}},
+    {'op': 'click', 'session': ['x']},
+    {'op': 'view', 'session': {'id': 1}},
+    {'op': 'click', 'session': 7, 'x': 0, 'y': 0},
+    {'op': 'new', 'size': [json.loads('1e400'), 9, 10]},
+    {'op': 'new', 'size': {'cols': 9}},
+])
+def test_bad_requests_get_error_replies(request_):
+    reply = GameServer().handle(request_)
+    assert set(reply) == {'error'}
+
+
+def test_bad_coordinates():
+    server = GameServer()
+    session = server.handle({'op': 'new', 'size': 'beginner'})['session']
+    for x in (json.loads('1e400'), [1], None):
+        assert 'error' in server.handle({'op': 'click', 'session': session, 'x': x, 'y': 0})
+    reply = server.handle({'op': 'click', 'session': session, 'x': 4, 'y': 4, 'id': [1]})
+    assert reply['state'] == 'playing' and reply['id'] == [1]
@@ -0,0 +1,68 @@
+"""Solver probabilities against brute-force enumeration on small boards."""
+
+import random
+from itertools import combinations
+
+import pytest
+
+from board import Board
+from mines import neighbor_table
+from solver import Solver
+
+
+def brute_force(board):
+    """Return {covered index: mine probability} by enumerating every layout that fits the visible numbers."""
+    w, h = board.width, board.height
+    cells = [cell for row in board.grid for cell in row]
+    table = neighbor_table(w, h)
+    covered = [i for i, c in enumerate(cells) if not c.revealed]
+    numbers = [(i, c.adjacent) for i, c in enumerate(cells) if c.revealed]
+    hits = dict.fromkeys(covered, 0)
+    total = 0
+    for layout in combinations(covered, board.mines):
+        mines = set(layout)
+        if all(sum(n in mines for n in table[i]) == count for i, count in numbers):
+            total += 1
+            for i in layout:
+                hits[i] += 1
+    return {i: hits[i] / total for i in covered}
+
+
+def _played(seed, width=6, height=4, mines=5):
+    rng = random.Random(seed)
+    board = Board(width, height, mines)
+    board.set_mines(rng.sample(range(width * height), mines))
+    safe = [i for i in range(width * height) if not board.grid[i // width][i % width].mine]
+    for i in rng.sample(safe, rng.randrange(1, 5)):
+        board.reveal(i % width, i // width)
+    return board
+
+
+@pytest.mark.parametrize('seed', range(25))
+def test_probabilities_match_brute_force(seed):
+    board = _played(seed)
+    if board.check_win():
+        pytest.skip('nothing left to guess')
+    solver = Solver(board)
+    expected = brute_force(board)
+    for i, p in expected.items():
+        y, x = divmod(i, board.width)
+        assert solver.probability(x, y) == pytest.approx(p, abs=1e-9)
+    assert solver.safe == {i for i, p in expected.items() if p == 0 and i in solver.probabilities}
+    assert solver.mines == {i for i, p in expected.items() if p == 1 and i in solver.probabilities}
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_incremental_update_matches_a_fresh_solver(seed):
+    board = _played(seed, 8, 6, 8)
+    solver = Solver(board)
+    for _ in range(5):
+        hint = solver.hint()
+        if hint is None or board.check_win():
+            break
+        _, x, y = hint
+        changed = board.reveal(x, y) if hint[0] == 'click' else (board.toggle_flag(x, y) and [y * board.width + x])
+        solver.update(changed)
+        fresh = Solver(board)
+        assert solver.probabilities == pytest.approx(fresh.probabilities)
+        assert solver.interior_probability == pytest.approx(fresh.interior_probability)
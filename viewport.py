@@ -0,0 +1,224 @@
+"""Camera and minimap for boards that do not fit the game window.
+
+`Camera` holds the scroll offset and zoom (cell size) of the grid area.
+`main.Game` only draws the cells in `Camera.visible_range()` and maps
+mouse positions through `Camera.cell_at`, so the cost of a frame follows
+the window size instead of the board size.
+
+`Minimap` is a downsampled overview of the whole board: one pixel per
+block of cells, kept in a small surface and only updated for the blocks
+whose cells changed. Drawing it is a single blit of that surface.
+"""
+
+import pygame
+
+from config import CELL_SIZE, ZOOM_LEVELS
+
+# Minimap colors
+MINIMAP_COVERED = (150, 150, 150)
+MINIMAP_REVEALED = (225, 225, 225)
+MINIMAP_FLAG = (200, 0, 0)
+MINIMAP_MINE = (0, 0, 0)
+MINIMAP_BORDER = (64, 64, 64)
+MINIMAP_VIEW = (255, 215, 0)
+
+
+class Camera:
+    """Scroll offset and zoom of the visible part of a ``cols x rows`` board.
+
+    Coordinates passed in and returned are relative to the top-left corner
+    of the grid area (below the header). The offset (`x`, `y`) is the board
+    pixel at that corner and is always clamped to the board.
+
+    Public methods:
+      - pan(dx, dy): scroll by pixels
+      - center_on(cx, cy): scroll so board cell position (cx, cy) is centered
+      - zoom(steps, px, py): step through `ZOOM_LEVELS`, keeping (px, py) in place
+      - visible_range(): cells that intersect the view
+      - cells_in(rect): cells that intersect a rectangle of the view
+      - cell_at(px, py) / cell_origin(x, y): view pixel <-> cell mapping
+
+    The mutating methods return True when the view actually moved.
+    """
+
+    def __init__(self, cols, rows, view_size, cell_size=CELL_SIZE, zoom_levels=ZOOM_LEVELS):
+        self.cols = cols
+        self.rows = rows
+        self.view_w, self.view_h = view_size
+        self.zoom_levels = sorted(set(zoom_levels) | {cell_size})
+        self.cell_size = cell_size
+        self.x = 0
+        self.y = 0
+
+    @property
+    def scrollable(self):
+        """True if the board is larger than the view at the current zoom."""
+        return self.cols * self.cell_size > self.view_w or self.rows * self.cell_size > self.view_h
+
+    def _clamp(self):
+        self.x = max(0, min(self.x, self.cols * self.cell_size - self.view_w))
+        self.y = max(0, min(self.y, self.rows * self.cell_size - self.view_h))
+
+    def pan(self, dx, dy):
+        """Scroll the view by (dx, dy) pixels."""
+        old = (self.x, self.y)
+        self.x += int(dx)
+        self.y += int(dy)
+        self._clamp()
+        return (self.x, self.y) != old
+
+    def center_on(self, cx, cy):
+        """Scroll so that board position (cx, cy), in cells, is in the middle of the view."""
+        cs = self.cell_size
+        return self.pan(cx * cs - self.view_w / 2 - self.x, cy * cs - self.view_h / 2 - self.y)
+
+    def zoom(self, steps, px=None, py=None):
+        """Move `steps` zoom levels in (positive) or out (negative).
+
+        The board point under view pixel (px, py), by default the view
+        center, stays where it is.
+        """
+        levels = self.zoom_levels
+        i = levels.index(self.cell_size)
+        j = max(0, min(len(levels) - 1, i + steps))
+        if i == j:
+            return False
+        px = self.view_w // 2 if px is None else px
+        py = self.view_h // 2 if py is None else py
+        old = self.cell_size
+        new = self.cell_size = levels[j]
+        self.x = int((self.x + px) * new / old - px)
+        self.y = int((self.y + py) * new / old - py)
+        self._clamp()
+        return True
+
+    def visible_range(self):
+        """Return ``(x0, y0, x1, y1)``: the cells with x0 <= x < x1 and y0 <= y < y1 are (partly) visible."""
+        return self.cells_in((0, 0, self.view_w, self.view_h))
+
+    def cells_in(self, rect):
+        """Return ``(x0, y0, x1, y1)`` like `visible_range()` for the view pixels in `rect` (x, y, w, h)."""
+        x, y, w, h = rect
+        px, py = max(0, x), max(0, y)
+        w = min(self.view_w, x + w) - px
+        h = min(self.view_h, y + h) - py
+        if w <= 0 or h <= 0:
+            return 0, 0, 0, 0
+        cs = self.cell_size
+        x1 = min(self.cols, -(-(self.x + px + w) // cs))
+        y1 = min(self.rows, -(-(self.y + py + h) // cs))
+        return (self.x + px) // cs, (self.y + py) // cs, x1, y1
+
+    def cell_at(self, px, py):
+        """Return the (x, y) cell under view pixel (px, py), or None if no cell is there."""
+        if not (0 <= px < self.view_w and 0 <= py < self.view_h):
+            return None
+        x = (self.x + px) // self.cell_size
+        y = (self.y + py) // self.cell_size
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return x, y
+        return None
+
+    def cell_origin(self, x, y):
+        """Return the view pixel of the top-left corner of cell (x, y)."""
+        return x * self.cell_size - self.x, y * self.cell_size - self.y
+
+
+class Minimap:
+    """Downsampled overview of a board, updated incrementally.
+
+    Every minimap pixel summarizes a square block of `block` x `block`
+    cells; the overview is scaled up by an integer `scale` when the board
+    is small. Changed cells are queued with `mark()`, and `refresh()` only
+    rescans the blocks they fall in.
+
+    Public methods:
+      - reset(): show an all-covered board
+      - mark(indices): queue flat cell indices that changed
+      - refresh(board): recolor the queued blocks; True if anything changed
+      - draw(screen, camera): blit the overview and the view rectangle
+      - cell_at(px, py): board position (in cells) under a screen pixel
+    """
+
+    def __init__(self, cols, rows, max_size):
+        self.cols = cols
+        self.rows = rows
+        max_w, max_h = max(1, max_size[0]), max(1, max_size[1])
+        self.block = max(1, -(-cols // max_w), -(-rows // max_h))
+        self.blocks_x = -(-cols // self.block)
+        self.blocks_y = -(-rows // self.block)
+        self.scale = max(1, min(max_w // self.blocks_x, max_h // self.blocks_y))
+        self.surface = pygame.Surface((self.blocks_x, self.blocks_y))
+        self.rect = pygame.Rect(0, 0, self.blocks_x * self.scale, self.blocks_y * self.scale)
+        self._dirty_blocks = set()
+        self.reset()
+
+    def reset(self):
+        """Paint every block as covered and forget queued changes."""
+        self.surface.fill(MINIMAP_COVERED)
+        self._dirty_blocks.clear()
+
+    def mark(self, indices):
+        """Queue flat cell indices (``y * cols + x``) whose state changed."""
+        cols, block, blocks_x = self.cols, self.block, self.blocks_x
+        dirty = self._dirty_blocks
+        for i in indices:
+            y, x = divmod(int(i), cols)
+            dirty.add((y // block) * blocks_x + x // block)
+
+    def refresh(self, board):
+        """Recolor the blocks queued by `mark()` from `board`; return True if any were queued."""
+        if not self._dirty_blocks:
+            return False
+        grid = board.grid
+        block = self.block
+        for b in self._dirty_blocks:
+            by, bx = divmod(b, self.blocks_x)
+            x0, y0 = bx * block, by * block
+            xs = range(x0, min(self.cols, x0 + block))
+            revealed = flagged = mines = total = 0
+            for y in range(y0, min(self.rows, y0 + block)):
+                row = grid[y]
+                for x in xs:
+                    cell = row[x]
+                    total += 1
+                    if cell.revealed:
+                        if cell.mine:
+                            mines += 1
+                        else:
+                            revealed += 1
+                    elif cell.flagged:
+                        flagged += 1
+            self.surface.set_at((bx, by), self._color(revealed, flagged, mines, total))
+        self._dirty_blocks.clear()
+        return True
+
+    @staticmethod
+    def _color(revealed, flagged, mines, total):
+        """Blend the block color from the share of revealed cells; mines and flags stand out."""
+        if mines:
+            return MINIMAP_MINE
+        if flagged * 4 >= total:
+            return MINIMAP_FLAG
+        t = revealed / total
+        return tuple(int(c + (r - c) * t) for c, r in zip(MINIMAP_COVERED, MINIMAP_REVEALED))
+
+    def draw(self, screen, camera):
+        """Blit the overview at `rect` with a frame and the camera's view rectangle; return the touched rect."""
+        if self.scale == 1:
+            screen.blit(self.surface, self.rect)
+        else:
+            screen.blit(pygame.transform.scale(self.surface, self.rect.size), self.rect)
+        frame = self.rect.inflate(2, 2)
+        pygame.draw.rect(screen, MINIMAP_BORDER, frame, 1)
+        # view rectangle: camera pixels -> cells -> minimap pixels
+        k = self.scale / (self.block * camera.cell_size)
+        view = pygame.Rect(self.rect.x + int(camera.x * k), self.rect.y + int(camera.y * k),
+                           max(2, int(camera.view_w * k)), max(2, int(camera.view_h * k)))
+        pygame.draw.rect(screen, MINIMAP_VIEW, view.clip(self.rect), 1)
+        return frame
+
+    def cell_at(self, px, py):
+        """Return the board position (in cells, fractional) under screen pixel (px, py)."""
+        k = self.block / self.scale
+        return (px - self.rect.x) * k, (py - self.rect.y) * k